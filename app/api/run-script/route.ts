@@ -46,7 +46,7 @@ export async function GET() {
 
 export async function POST(req: NextRequest) {
   try {
-    const { script, args = [] } = await req.json();
+    const { script, args = [], stream = false } = await req.json();
 
     const real = ALLOWED[script as keyof typeof ALLOWED];
     if (!real) return NextResponse.json({ success: false, error: "Script no permitido" }, { status: 400 });
@@ -63,6 +63,30 @@ export async function POST(req: NextRequest) {
       env: process.env,
     });
 
+    // NDJSON (p. ej. parse con "trace": "stream"): se reenvía stdout a medida que llega
+    if (stream) {
+      let err = "";
+      child.stderr.on("data", d => (err += d.toString()));
+      const body = new ReadableStream({
+        start(controller) {
+          child.stdout.on("data", d => controller.enqueue(d));
+          child.on("close", code => {
+            if (code !== 0) {
+              const line = JSON.stringify({ type: "error", success: false, error: err || "Fallo al ejecutar Python" });
+              controller.enqueue(new TextEncoder().encode(line + "\n"));
+            }
+            controller.close();
+          });
+        },
+        cancel() {
+          child.kill();
+        },
+      });
+      return new Response(body, {
+        headers: { "Content-Type": "application/x-ndjson; charset=utf-8", "Cache-Control": "no-cache" },
+      });
+    }
+
     let out = "", err = "";
     child.stdout.on("data", d => (out += d.toString()));
     child.stderr.on("data", d => (err += d.toString()));
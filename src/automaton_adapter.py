@@ -130,12 +130,9 @@ def _lr1_dfa_to_visual(g: Grammar, automaton) -> Dict:
 
     states: Dict[str, Dict] = {}
 
-    def _item_sort_key(x: LR1Item):
-        return (x.left, " ".join(x.alpha), " ".join(x.beta), x.lookahead)
-
     for st in automaton.states:
         sid = f"I{st.id}"
-        label = "\\n".join(str(it) for it in sorted(st.items, key=_item_sort_key))
+        label = "\\n".join(st.item_strings())
         states[sid] = {
             "name": sid,
             "is_final": _is_accept_state(st.items, g.augmented_start or ""),
@@ -0,0 +1,151 @@
+"""
+Parse por lotes: una gramática, muchas entradas.
+
+La tabla se compila (o se lee de la caché) una sola vez; cada proceso del pool
+la recibe al iniciar y la reutiliza para todas sus entradas. El archivo de
+entradas es JSON lines: cada línea es un string o un objeto {"id": ..., "input": ...}.
+Los resultados salen en el orden del archivo, a medida que se terminan, y al
+final se informan las estadísticas de throughput.
+"""
+from __future__ import annotations
+import json
+import multiprocessing
+import os
+import time
+from dataclasses import replace
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from grammar_spec import Grammar
+from grammar_cache import compile_grammar
+from parse_table import LR1ParseTable
+from parser_driver import ParserDriver
+from scanner import Scanner
+
+
+# (índice, id, texto, error de lectura)
+_Job = Tuple[int, object, Optional[str], Optional[str]]
+
+_worker_grammar: Optional[Grammar] = None
+_worker_driver: Optional[ParserDriver] = None
+
+
+def _init_worker(grammar: Grammar, table: LR1ParseTable) -> None:
+    global _worker_grammar, _worker_driver
+    _worker_grammar = grammar
+    _worker_driver = ParserDriver(table)
+    table.compiled()
+
+
+def _parse_job(job: _Job) -> Dict:
+    index, ident, text, read_error = job
+    out: Dict = {"index": index}
+    if ident is not None:
+        out["id"] = ident
+    if read_error is not None:
+        out.update(accepted=False, error=read_error, tokens=0)
+        return out
+
+    tokens = Scanner(text, _worker_grammar).tokenize_all()
+    res = _worker_driver.parse(tokens, max_steps=10000 + 64 * len(tokens), trace="none")
+    out["accepted"] = res.accepted
+    out["tokens"] = len(tokens)
+    if not res.accepted:
+        out["error"] = res.error_message
+        if res.error_pos is not None and res.error_pos < len(tokens):
+            tok = tokens[res.error_pos]
+            out["error_pos"] = res.error_pos
+            out["line"] = tok.line
+            out["col"] = tok.col
+    return out
+
+
+def read_inputs(lines: Iterable[str]) -> Iterator[_Job]:
+    """Entradas desde líneas JSON (las vacías se saltan)."""
+    index = 0
+    for raw in lines:
+        raw = raw.strip()
+        if not raw:
+            continue
+        try:
+            item = json.loads(raw)
+        except ValueError as e:
+            yield (index, None, None, f"JSON inválido: {e}")
+        else:
+            if isinstance(item, dict):
+                text = item.get("input")
+                yield (index, item.get("id"), text if isinstance(text, str) else None,
+                       None if isinstance(text, str) else "Falta 'input' (string)")
+            elif isinstance(item, str):
+                yield (index, None, item, None)
+            else:
+                yield (index, None, None, "Cada línea debe ser un string o un objeto con 'input'")
+        index += 1
+
+
+class BatchStats:
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self.inputs = 0
+        self.accepted = 0
+        self.tokens = 0
+        self.compile_seconds = 0.0
+        self.start = time.perf_counter()
+        self.seconds = 0.0
+
+    def add(self, result: Dict) -> None:
+        self.inputs += 1
+        self.accepted += bool(result.get("accepted"))
+        self.tokens += result.get("tokens", 0)
+
+    def to_dict(self) -> Dict:
+        secs = self.seconds or 1e-9
+        return {
+            "inputs": self.inputs,
+            "accepted": self.accepted,
+            "rejected": self.inputs - self.accepted,
+            "tokens": self.tokens,
+            "workers": self.workers,
+            "compile_seconds": round(self.compile_seconds, 4),
+            "seconds": round(self.seconds, 4),
+            "inputs_per_sec": round(self.inputs / secs, 1),
+            "tokens_per_sec": round(self.tokens / secs, 1),
+        }
+
+
+def batch_parse(
+    grammar_text: str,
+    jobs: Iterable[_Job],
+    precedence_levels=None,
+    mode: str = "lr1",
+    workers: Optional[int] = None,
+    chunksize: int = 64,
+    stats: Optional[BatchStats] = None,
+) -> Iterator[Dict]:
+    """
+    Resultados por entrada ({"index", "id"?, "accepted", "tokens", "error"?,
+    "error_pos"?, "line"?, "col"?}), en orden. Con workers=1 no se usa pool.
+    """
+    workers = workers or os.cpu_count() or 1
+    stats = stats if stats is not None else BatchStats(workers)
+    stats.workers = workers
+
+    t0 = time.perf_counter()
+    compiled = compile_grammar(grammar_text, precedence_levels, mode, with_automaton=False)
+    grammar = compiled.grammar
+    # los workers sólo necesitan la tabla, no el autómata
+    table = replace(compiled.table, automaton=None)
+    stats.compile_seconds = time.perf_counter() - t0
+    stats.start = time.perf_counter()
+
+    if workers == 1:
+        _init_worker(grammar, table)
+        for r in map(_parse_job, jobs):
+            stats.add(r)
+            yield r
+    else:
+        with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(grammar, table)) as pool:
+            for r in pool.imap(_parse_job, jobs, chunksize=chunksize):
+                stats.add(r)
+                yield r
+    stats.seconds = time.perf_counter() - stats.start
+
@@ -0,0 +1,188 @@
+"""
+Forma compilada de LR1ParseTable para el driver.
+
+Terminales y no terminales se numeran y ACTION/GOTO quedan en dos `array('i')`
+planos, una fila por estado:
+
+    action[s * action_stride + t]     GOTO: goto[s * goto_stride + A]
+
+Codificación de una celda ACTION:
+
+    0        error
+    s + 1    shift al estado s        (> 0)
+    -1       accept
+    -(p + 2) reduce por la producción p (< -1)
+
+La última columna de ACTION corresponde a los símbolos que no son terminales de
+la gramática (p. ej. 'ERR' del scanner) y es siempre error. En GOTO, -1 = vacío.
+"""
+from __future__ import annotations
+from array import array
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+from grammar_spec import Production
+from parse_table import LR1ParseTable, ActionKind, Action
+from scanner import ScanToken
+
+
+ERROR = 0
+ACCEPT = -1
+
+
+def encode_shift(state: int) -> int:
+    return state + 1
+
+
+def encode_reduce(prod: int) -> int:
+    return -(prod + 2)
+
+
+@dataclass
+class CompiledRun:
+    accepted: bool
+    steps: int
+    # posición del token donde falló, estado y símbolo (terminal o no terminal del GOTO)
+    error_pos: Optional[int] = None
+    error_state: Optional[int] = None
+    error_symbol: Optional[str] = None
+    # "syntax" (ACTION vacío), "goto" (GOTO indefinido tras reducir) o "max_steps"
+    reason: Optional[str] = None
+    shifts: int = 0
+    reductions: int = 0
+
+
+class CompiledTable:
+    def __init__(self, table: LR1ParseTable) -> None:
+        self.terminals: List[str] = list(table.terminals)
+        self.nonterminals: List[str] = list(table.nonterminals)
+        self.term_id: Dict[str, int] = {t: i for i, t in enumerate(self.terminals)}
+        self.nt_id: Dict[str, int] = {A: i for i, A in enumerate(self.nonterminals)}
+        self.unknown_id = len(self.terminals)
+        self.eof_id = self.term_id["$"]
+
+        states = table.action.keys() | table.goto.keys()
+        self.n_states = max(states) + 1 if states else 0
+        self.action_stride = len(self.terminals) + 1
+        self.goto_stride = len(self.nonterminals)
+
+        self.productions: List[Production] = []
+        self._prod_id: Dict[Production, int] = {}
+
+        action = array("i", [ERROR]) * (self.n_states * self.action_stride)
+        for s, row in table.action.items():
+            base = s * self.action_stride
+            for t, act in row.items():
+                action[base + self.term_id[t]] = self.encode(act)
+
+        goto = array("i", [-1]) * (self.n_states * self.goto_stride)
+        for s, row in table.goto.items():
+            base = s * self.goto_stride
+            for A, dst in row.items():
+                goto[base + self.nt_id[A]] = dst
+
+        self.action = action
+        self.goto = goto
+        # por producción: id del LHS en GOTO y largo del RHS
+        self.prod_lhs = array("i", (self.nt_id.get(p.left, -1) for p in self.productions))
+        self.prod_len = array("i", (len(p.right) for p in self.productions))
+
+    def encode(self, act: Action) -> int:
+        if act.kind == ActionKind.SHIFT:
+            return encode_shift(act.target)
+        if act.kind == ActionKind.ACCEPT:
+            return ACCEPT
+        p = self._prod_id.get(act.production)
+        if p is None:
+            p = self._prod_id[act.production] = len(self.productions)
+            self.productions.append(act.production)
+        return encode_reduce(p)
+
+    def decode(self, code: int) -> Optional[Action]:
+        """Action equivalente a una celda (None si es error)."""
+        if code > 0:
+            return Action(ActionKind.SHIFT, target=code - 1)
+        if code == ACCEPT:
+            return Action(ActionKind.ACCEPT)
+        if code < ACCEPT:
+            return Action(ActionKind.REDUCE, production=self.productions[-code - 2])
+        return None
+
+    def action_at(self, state: int, terminal: str) -> int:
+        return self.action[state * self.action_stride + self.term_id.get(terminal, self.unknown_id)]
+
+    def goto_at(self, state: int, nonterminal: str) -> int:
+        return self.goto[state * self.goto_stride + self.nt_id[nonterminal]]
+
+    def valid_terminals(self) -> List[FrozenSet[str]]:
+        """
+        Por estado, los terminales con ACTION no vacío (shift, reduce o accept):
+        los que el scanner puede devolver ahí sin provocar un error de sintaxis.
+        Se calcula una vez, de las filas de ACTION; filas con los mismos
+        terminales comparten el conjunto.
+        """
+        valid = getattr(self, "_valid_terminals", None)
+        if valid is None:
+            action = self.action
+            stride = self.action_stride
+            terminals = self.terminals
+            shared: Dict[FrozenSet[str], FrozenSet[str]] = {}
+            valid = []
+            for s in range(self.n_states):
+                base = s * stride
+                row = frozenset(t for a, t in enumerate(terminals) if action[base + a] != ERROR)
+                valid.append(shared.setdefault(row, row))
+            self._valid_terminals = valid
+        return valid
+
+    def encode_tokens(self, tokens: Iterable[ScanToken]) -> array:
+        """Ids de terminal de una secuencia de tokens (se mapean una sola vez, antes del parse)."""
+        term_id = self.term_id
+        unknown = self.unknown_id
+        return array("i", (term_id.get(tok.symbol, unknown) for tok in tokens))
+
+    def run(self, ids: array, max_steps: int = 10000) -> CompiledRun:
+        """
+        Driver LR sobre la forma compilada: reconoce `ids` (terminados en '$' o no;
+        pasado el final se lee '$') sin construir pasos ni consultar diccionarios.
+        """
+        action = self.action
+        goto = self.goto
+        astride = self.action_stride
+        gstride = self.goto_stride
+        prod_lhs = self.prod_lhs
+        prod_len = self.prod_len
+        n = len(ids)
+        eof = self.eof_id
+
+        stack = [0]
+        i = 0
+        a = ids[0] if n else eof
+        step = 0
+        reductions = 0
+        while step < max_steps:
+            step += 1
+            s = stack[-1]
+            code = action[s * astride + a]
+            if code > 0:
+                stack.append(code - 1)
+                i += 1
+                a = ids[i] if i < n else eof
+            elif code < ACCEPT:
+                reductions += 1
+                p = -code - 2
+                k = prod_len[p]
+                if k:
+                    del stack[-k:]
+                t = stack[-1]
+                A = prod_lhs[p]
+                dst = goto[t * gstride + A] if A >= 0 else -1
+                if dst < 0:
+                    return CompiledRun(False, step, i, t, self.productions[p].left, "goto", i, reductions)
+                stack.append(dst)
+            elif code == ACCEPT:
+                return CompiledRun(True, step, shifts=i, reductions=reductions)
+            else:
+                sym = self.terminals[a] if a < len(self.terminals) else None
+                return CompiledRun(False, step, i, s, sym, "syntax", i, reductions)
+        return CompiledRun(False, step, i, stack[-1], None, "max_steps", i, reductions)
@@ -0,0 +1,227 @@
+"""
+Tabla LR comprimida, consultable sin descomprimir.
+
+Parte de la forma compilada (CompiledTable, misma codificación de celdas) y aplica:
+
+  1) reducción por defecto: en cada estado, la reducción más frecuente de la
+     fila pasa a `default_action[s]` y sus celdas se quitan. Con un token que no
+     es válido el parser reduce antes de detectar el error (nunca desplaza
+     uno inválido), así que acepta exactamente lo mismo, pero el estado donde se
+     informa el error puede ser otro;
+  2) filas idénticas (tras quitar la reducción por defecto) se guardan una vez:
+     `row_of[s]` es la fila del estado s;
+  3) row displacement / comb vector: las filas distintas se superponen en un
+     solo vector `value`, desplazadas por `base[r]`; `check[i]` dice a qué fila
+     pertenece la celda i.
+
+        action(s, t):  r = row_of[s]; i = base[r] + t
+                       value[i] si check[i] == r, si no default_action[s]
+
+GOTO se comprime igual pero por columnas (como yacc): cada no terminal tiene su
+destino más frecuente en `goto_default[A]` y las excepciones van a otro comb
+vector indexado por estado. GOTO sólo se consulta en entradas que existen, así
+que el valor por defecto nunca cambia el resultado.
+"""
+from __future__ import annotations
+from array import array
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from compiled_table import CompiledTable, CompiledRun, ACCEPT, ERROR
+from scanner import ScanToken
+
+
+def _pack(rows: Sequence[Sequence[Tuple[int, int]]]) -> Tuple[array, array, array]:
+    """
+    Superpone filas dispersas [(columna, valor), ...] en (base, value, check).
+    First-fit, colocando primero las filas con más celdas.
+    """
+    base = array("i", [0]) * len(rows)
+    value = array("i")
+    check = array("i")
+    order = sorted(range(len(rows)), key=lambda r: (-len(rows[r]), r))
+    for r in order:
+        cells = rows[r]
+        if not cells:
+            continue
+        b = -cells[0][0]    # la primera celda cae en la posición 0 como mínimo
+        while True:
+            if all(b + c >= len(check) or check[b + c] < 0 for c, _ in cells):
+                break
+            b += 1
+        end = b + max(c for c, _ in cells) + 1
+        if end > len(check):
+            value.extend([0] * (end - len(check)))
+            check.extend([-1] * (end - len(check)))
+        for c, v in cells:
+            value[b + c] = v
+            check[b + c] = r
+        base[r] = b
+    return base, value, check
+
+
+class CompressedTable:
+    def __init__(self, compiled: CompiledTable) -> None:
+        self.compiled = compiled
+        self.terminals = compiled.terminals
+        self.nonterminals = compiled.nonterminals
+        self.term_id = compiled.term_id
+        self.nt_id = compiled.nt_id
+        self.unknown_id = compiled.unknown_id
+        self.eof_id = compiled.eof_id
+        self.productions = compiled.productions
+        self.prod_lhs = compiled.prod_lhs
+        self.prod_len = compiled.prod_len
+        n_states = compiled.n_states
+        astride = compiled.action_stride
+
+        # 1) reducción por defecto por estado
+        self.default_action = array("i", [ERROR]) * n_states
+        sparse_rows: List[Tuple[Tuple[int, int], ...]] = []
+        for s in range(n_states):
+            row = compiled.action[s * astride:(s + 1) * astride]
+            counts: Dict[int, int] = {}
+            for code in row:
+                if code < ACCEPT:
+                    counts[code] = counts.get(code, 0) + 1
+            default = ERROR
+            if counts:
+                default = max(counts, key=lambda c: (counts[c], c))
+            self.default_action[s] = default
+            sparse_rows.append(tuple(
+                (t, code) for t, code in enumerate(row) if code != ERROR and code != default
+            ))
+
+        # 2) filas idénticas
+        self.row_of = array("i", [0]) * n_states
+        unique: Dict[Tuple[Tuple[int, int], ...], int] = {}
+        rows: List[Tuple[Tuple[int, int], ...]] = []
+        for s, cells in enumerate(sparse_rows):
+            r = unique.get(cells)
+            if r is None:
+                r = unique[cells] = len(rows)
+                rows.append(cells)
+            self.row_of[s] = r
+
+        # 3) comb vector
+        self.base, self.value, self.check = _pack(rows)
+
+        # GOTO por columnas: destino por defecto + excepciones por estado
+        gstride = compiled.goto_stride
+        self.goto_default = array("i", [-1]) * gstride
+        columns: List[List[Tuple[int, int]]] = []
+        for A in range(gstride):
+            col = [(s, compiled.goto[s * gstride + A]) for s in range(n_states)]
+            col = [(s, dst) for s, dst in col if dst >= 0]
+            counts = {}
+            for _, dst in col:
+                counts[dst] = counts.get(dst, 0) + 1
+            default = max(counts, key=lambda d: (counts[d], -d)) if counts else -1
+            self.goto_default[A] = default
+            columns.append([(s, dst) for s, dst in col if dst != default])
+        self.goto_base, self.goto_value, self.goto_check = _pack(columns)
+
+        self.unique_rows = len(rows)
+        self.default_reductions = sum(1 for d in self.default_action if d != ERROR)
+
+    #  Consulta
+
+    def action(self, state: int, term: int) -> int:
+        r = self.row_of[state]
+        i = self.base[r] + term
+        if 0 <= i < len(self.check) and self.check[i] == r:
+            return self.value[i]
+        return self.default_action[state]
+
+    def goto(self, state: int, nt: int) -> int:
+        i = self.goto_base[nt] + state
+        if 0 <= i < len(self.goto_check) and self.goto_check[i] == nt:
+            return self.goto_value[i]
+        return self.goto_default[nt]
+
+    def action_at(self, state: int, terminal: str) -> int:
+        return self.action(state, self.term_id.get(terminal, self.unknown_id))
+
+    def goto_at(self, state: int, nonterminal: str) -> int:
+        return self.goto(state, self.nt_id[nonterminal])
+
+    def encode_tokens(self, tokens: Iterable[ScanToken]) -> array:
+        return self.compiled.encode_tokens(tokens)
+
+    #  Tamaño
+
+    def stats(self) -> Dict[str, float]:
+        """Celdas de la tabla densa vs. enteros guardados en la forma comprimida."""
+        c = self.compiled
+        dense = c.n_states * (c.action_stride + c.goto_stride)
+        packed = (
+            len(self.default_action) + len(self.row_of)
+            + len(self.base) + len(self.value) + len(self.check)
+            + len(self.goto_default) + len(self.goto_base)
+            + len(self.goto_value) + len(self.goto_check)
+        )
+        return {
+            "dense_cells": dense,
+            "compressed_cells": packed,
+            "ratio": round(dense / packed, 2) if packed else 1.0,
+            "states": c.n_states,
+            "unique_rows": self.unique_rows,
+            "default_reductions": self.default_reductions,
+        }
+
+    #  Driver
+
+    def run(self, ids: array, max_steps: int = 10000) -> CompiledRun:
+        """Mismo driver que CompiledTable.run, consultando la forma comprimida."""
+        row_of = self.row_of
+        base = self.base
+        value = self.value
+        check = self.check
+        ncheck = len(check)
+        default_action = self.default_action
+        gbase = self.goto_base
+        gvalue = self.goto_value
+        gcheck = self.goto_check
+        ngcheck = len(gcheck)
+        gdefault = self.goto_default
+        prod_lhs = self.prod_lhs
+        prod_len = self.prod_len
+        n = len(ids)
+        eof = self.eof_id
+
+        stack = [0]
+        i = 0
+        a = ids[0] if n else eof
+        step = 0
+        reductions = 0
+        while step < max_steps:
+            step += 1
+            s = stack[-1]
+            r = row_of[s]
+            j = base[r] + a
+            code = value[j] if 0 <= j < ncheck and check[j] == r else default_action[s]
+            if code > 0:
+                stack.append(code - 1)
+                i += 1
+                a = ids[i] if i < n else eof
+            elif code < ACCEPT:
+                reductions += 1
+                p = -code - 2
+                k = prod_len[p]
+                if k:
+                    del stack[-k:]
+                t = stack[-1]
+                A = prod_lhs[p]
+                if A < 0:
+                    dst = -1
+                else:
+                    j = gbase[A] + t
+                    dst = gvalue[j] if 0 <= j < ngcheck and gcheck[j] == A else gdefault[A]
+                if dst < 0:
+                    return CompiledRun(False, step, i, t, self.productions[p].left, "goto", i, reductions)
+                stack.append(dst)
+            elif code == ACCEPT:
+                return CompiledRun(True, step, shifts=i, reductions=reductions)
+            else:
+                sym = self.terminals[a] if a < len(self.terminals) else None
+                return CompiledRun(False, step, i, s, sym, "syntax", i, reductions)
+        return CompiledRun(False, step, i, stack[-1], None, "max_steps", i, reductions)
@@ -0,0 +1,54 @@
+from __future__ import annotations
+from typing import List
+
+
+def digraph(edges: List[List[int]], base: List[int]) -> List[int]:
+    """
+    Algoritmo Digraph (DeRemer & Pennello): F(x) = base(x) ∪ ∪{F(y) : x R y}.
+
+    Recorre el grafo con Tarjan: cada componente fuertemente conexa se resuelve
+    una sola vez (todos sus nodos comparten F) y las componentes se cierran en
+    orden topológico inverso, así que cada valor se propaga una vez. `base` y F
+    son máscaras de bits. Iterativo para no depender del límite de recursión.
+    """
+    n = len(base)
+    F = list(base)
+    depth = [0] * n
+    done = n + 1
+    stack: List[int] = []
+
+    for root in range(n):
+        if depth[root]:
+            continue
+        stack.append(root)
+        depth[root] = len(stack)
+        work = [(root, 0, len(stack))]
+        while work:
+            x, i, d = work[-1]
+            rel = edges[x]
+            if i < len(rel):
+                work[-1] = (x, i + 1, d)
+                y = rel[i]
+                if depth[y] == 0:
+                    stack.append(y)
+                    depth[y] = len(stack)
+                    work.append((y, 0, len(stack)))
+                    continue
+                depth[x] = min(depth[x], depth[y])
+                F[x] |= F[y]
+                continue
+
+            work.pop()
+            if depth[x] == d:
+                # x es raíz de su componente: todos comparten F(x)
+                while True:
+                    top = stack.pop()
+                    depth[top] = done
+                    F[top] = F[x]
+                    if top == x:
+                        break
+            if work:
+                parent = work[-1][0]
+                depth[parent] = min(depth[parent], depth[x])
+                F[parent] |= F[x]
+    return F
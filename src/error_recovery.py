@@ -0,0 +1,321 @@
+"""
+Recuperación de errores en modo pánico usando las entradas GOTO de la tabla.
+
+Ante un error en el token i se buscan candidatos para retomar, token por
+token desde i; para el token j son, en orden:
+
+  - borrar i..j-1 y seguir en el mismo estado (si j > i);
+  - recorriendo la pila desde el tope: si el estado s tiene GOTO(s, A) = t y
+    ACTION(t, token j) no es error, desapilar hasta s y apilar A (la frase
+    errónea cuenta como una A), descartando i..j-1.
+
+Cada candidato se valida simulando el parse (sin copiar la pila): se elige el
+primero que desplaza VALIDATE_SHIFTS tokens sin error, o, si ninguno lo logra
+en `max_attempts` intentos, el que más avanzó descontando los tokens
+descartados; si no hubo ninguno, el primer punto de retome en los
+`max_attempts` tokens siguientes, sin validar. Si tampoco lo hay, el error
+queda sin reparar (repair = None) y el parse termina. Para cada estado el mapa
+terminal -> [(A, t)] se calcula una sola vez, y el conjunto de terminales con
+algún retome en la pila se junta una vez por pila (borrar tokens no la cambia),
+así que un token sin candidatos cuesta O(1). Cada error cuesta entonces O(`max_attempts` +
+profundidad de la pila) más las simulaciones acotadas, y si un nuevo error cae
+en el mismo token donde se retomó la búsqueda empieza en el siguiente: el costo
+total es lineal en la entrada. `max_errors` acota además la cantidad de
+errores informados.
+
+Como en yacc, un error antes de desplazar QUIET_SHIFTS tokens después de una
+reparación se considera parte del anterior (se repara, pero no se informa).
+"""
+from __future__ import annotations
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from compiled_table import CompiledTable, ACCEPT, ERROR
+from scanner import ScanToken
+
+
+QUIET_SHIFTS = 3
+VALIDATE_SHIFTS = 10
+
+
+@dataclass
+class RecoveredError:
+    # posición del token, estado y lookahead donde se detectó
+    pos: int
+    state: int
+    symbol: str
+    lexeme: str
+    line: int
+    col: int
+    message: str
+    # "delete" (se saltó el token), "panic" (se retomó con un no terminal) o None (no se pudo)
+    repair: Optional[str] = None
+    # tokens descartados y no terminal con el que se retomó
+    skipped: int = 0
+    resumed_with: Optional[str] = None
+    resume_pos: Optional[int] = None
+
+
+@dataclass
+class RecoveryRun:
+    # True sólo si la entrada era correcta (sin errores)
+    accepted: bool
+    errors: List[RecoveredError] = field(default_factory=list)
+    # se llegó al final de la entrada (aceptando tras las reparaciones)
+    completed: bool = False
+    # se cortó por max_errors o max_steps
+    truncated: bool = False
+    steps: int = 0
+    shifts: int = 0
+    reductions: int = 0
+
+
+class RecoveryTable:
+    """Mapas de reparación por estado (terminal -> [(no terminal, estado destino)]), perezosos."""
+
+    def __init__(self, compiled: CompiledTable) -> None:
+        self.compiled = compiled
+        self._maps: Dict[int, Dict[int, List[Tuple[int, int]]]] = {}
+
+    def options(self, state: int) -> Dict[int, List[Tuple[int, int]]]:
+        m = self._maps.get(state)
+        if m is not None:
+            return m
+        c = self.compiled
+        m = {}
+        gbase = state * c.goto_stride
+        for A in range(c.goto_stride):
+            t = c.goto[gbase + A]
+            if t < 0:
+                continue
+            abase = t * c.action_stride
+            for a in range(len(c.terminals)):
+                if c.action[abase + a] != ERROR:
+                    m.setdefault(a, []).append((A, t))
+        self._maps[state] = m
+        return m
+
+
+def parse_with_recovery(compiled: CompiledTable, tokens: List[ScanToken], max_errors: int = 25,
+                        max_attempts: int = 32, max_steps: Optional[int] = None,
+                        recovery: Optional[RecoveryTable] = None, ids: Optional[array] = None) -> RecoveryRun:
+    """
+    Driver LR que no se detiene en el primer error: informa cada uno y retoma
+    con la reparación de pánico descrita arriba. `tokens` es la salida de
+    Scanner (terminada en '$' o no).
+    """
+    if ids is None:
+        ids = compiled.encode_tokens(tokens)
+    if recovery is None:
+        recovery = RecoveryTable(compiled)
+    if max_steps is None:
+        max_steps = 10000 + 64 * len(ids)
+    action = compiled.action
+    goto = compiled.goto
+    astride = compiled.action_stride
+    gstride = compiled.goto_stride
+    prod_lhs = compiled.prod_lhs
+    prod_len = compiled.prod_len
+    n = len(ids)
+    eof = compiled.eof_id
+
+    run = RecoveryRun(accepted=False)
+    stack = [0]
+    i = 0
+    a = ids[0] if n else eof
+    step = 0
+    resumed_at = -1
+    since_resume = QUIET_SHIFTS
+    resumable: Optional[Set[int]] = None
+    moved_at = 0
+    while step < max_steps:
+        step += 1
+        s = stack[-1]
+        code = action[s * astride + a]
+        if code > 0:
+            stack.append(code - 1)
+            run.shifts += 1
+            since_resume += 1
+            i += 1
+            a = ids[i] if i < n else eof
+        elif code < ACCEPT:
+            run.reductions += 1
+            p = -code - 2
+            k = prod_len[p]
+            if k:
+                del stack[-k:]
+            t = stack[-1]
+            A = prod_lhs[p]
+            dst = goto[t * gstride + A] if A >= 0 else -1
+            if dst < 0:
+                # tabla inconsistente: no hay reparación razonable
+                run.truncated = True
+                break
+            stack.append(dst)
+        elif code == ACCEPT:
+            run.accepted = not run.errors
+            run.completed = True
+            break
+        else:
+            if since_resume < QUIET_SHIFTS:
+                err = run.errors[-1]
+            else:
+                err = _error_at(tokens, i, s)
+                run.errors.append(err)
+                if len(run.errors) >= max_errors:
+                    run.truncated = True
+                    break
+            # no retomar dos veces en el mismo token
+            j = i + 1 if i == resumed_at else i
+            # si desde el último retome sólo se borraron tokens, la pila es la misma
+            moved = run.shifts + run.reductions
+            if resumable is None or moved != moved_at:
+                resumable = _resumable(recovery, stack)
+            found = _find_resume(recovery, stack, ids, j, n, eof, max_attempts, resumable)
+            if found is None:
+                break
+            j, depth, A, t = found
+            if A >= 0 or depth < len(stack) - 1:
+                resumable = None
+            moved_at = moved
+            del stack[depth + 1:]
+            if A >= 0:
+                stack.append(t)
+                err.repair = "panic"
+                err.resumed_with = compiled.nonterminals[A]
+            elif err.repair is None:
+                err.repair = "delete"
+            err.skipped += j - i
+            err.resume_pos = j
+            i = resumed_at = j
+            since_resume = 0
+            a = ids[i] if i < n else eof
+    else:
+        run.truncated = True
+    run.steps = step
+    return run
+
+
+def _resumable(recovery: RecoveryTable, stack: List[int]) -> Set[int]:
+    """Terminales con algún punto de retome en la pila (un token fuera del conjunto no tiene candidatos)."""
+    out: Set[int] = set()
+    for state in set(stack):
+        out.update(recovery.options(state))
+    return out
+
+
+def _find_resume(recovery: RecoveryTable, stack: List[int], ids: array, i: int, n: int, eof: int,
+                 max_attempts: int, resumable: Optional[Set[int]] = None) -> Optional[Tuple[int, int, int, int]]:
+    """
+    (token j, profundidad en la pila, A, estado GOTO) para retomar, o None.
+    A = -1 es sólo borrar los tokens i..j-1, sin tocar la pila. Se toma el
+    primer candidato con el que el parse avanza VALIDATE_SHIFTS tokens sin
+    error; tras `max_attempts` intentos (cada token mirado cuenta como uno), el
+    de mejor avance menos tokens descartados, o si no hubo ninguno el primero
+    que aparezca en los `max_attempts` tokens siguientes.
+    """
+    c = recovery.compiled
+    top = len(stack) - 1
+    if resumable is None:
+        resumable = _resumable(recovery, stack)
+    best = None
+    best_score = -n - 2
+    attempts = 0
+    j = i
+    while j <= n and attempts < max_attempts:
+        attempts += 1
+        a = ids[j] if j < n else eof
+        candidates = [(top, -1, -1)] if j > i else []
+        if a in resumable:
+            for depth in range(top, -1, -1):
+                for A, t in recovery.options(stack[depth]).get(a, ()):
+                    candidates.append((depth, A, t))
+        for depth, A, t in candidates:
+            if attempts >= max_attempts:
+                break
+            attempts += 1
+            shifted = _shifts(c, stack, depth, t, ids, j, n, eof)
+            if shifted >= VALIDATE_SHIFTS:
+                return j, depth, A, t
+            # cada token descartado resta uno
+            if shifted - (j - i) > best_score:
+                best, best_score = (j, depth, A, t), shifted - (j - i)
+        if a == eof:
+            return best
+        j += 1
+    if best is not None:
+        return best
+    # basura larga: el primer punto de retome en los `max_attempts` tokens
+    # siguientes, sin validar (los tokens saltados se consumen); si no hay,
+    # el error queda sin reparar
+    end = min(n, j + max_attempts - 1)
+    while j <= end:
+        a = ids[j] if j < n else eof
+        if a in resumable:
+            for depth in range(top, -1, -1):
+                opts = recovery.options(stack[depth]).get(a)
+                if opts:
+                    return j, depth, opts[0][0], opts[0][1]
+        if a == eof:
+            return None
+        j += 1
+    return None
+
+
+def _shifts(c: CompiledTable, stack: List[int], depth: int, t: int, ids: array, j: int, n: int,
+            eof: int) -> int:
+    """
+    Tokens que se desplazan desde j (hasta VALIDATE_SHIFTS; aceptar cuenta como
+    uno más) con la pila stack[:depth+1] + [t] (t = -1: sin t), sin copiarla.
+    """
+    action, goto = c.action, c.goto
+    astride, gstride = c.action_stride, c.goto_stride
+    base = depth
+    top = [t] if t >= 0 else []
+    shifted = 0
+    steps = 0
+    while shifted < VALIDATE_SHIFTS and steps < 64 * VALIDATE_SHIFTS:
+        steps += 1
+        a = ids[j] if j < n else eof
+        s = top[-1] if top else stack[base]
+        code = action[s * astride + a]
+        if code > 0:
+            top.append(code - 1)
+            shifted += 1
+            j += 1
+        elif code < ACCEPT:
+            p = -code - 2
+            k = c.prod_len[p]
+            if k >= len(top):
+                base -= k - len(top)
+                top.clear()
+            elif k:
+                del top[-k:]
+            s = top[-1] if top else stack[base]
+            A = c.prod_lhs[p]
+            dst = goto[s * gstride + A] if A >= 0 else -1
+            if dst < 0:
+                return shifted
+            top.append(dst)
+        elif code == ACCEPT:
+            return shifted + 1
+        else:
+            return shifted
+    return shifted
+
+
+def _error_at(tokens: List[ScanToken], i: int, state: int) -> RecoveredError:
+    tok = tokens[i] if i < len(tokens) else ScanToken("$", "$", -1, -1)
+    return RecoveredError(
+        pos=i,
+        state=state,
+        symbol=tok.symbol,
+        lexeme=tok.lexeme,
+        line=tok.line,
+        col=tok.col,
+        message=(
+            f"ERROR de sintaxis: en estado I{state}, con lookahead '{tok.symbol}' "
+            f"(lexema='{tok.lexeme}' @ {tok.line}:{tok.col})."
+        ),
+    )
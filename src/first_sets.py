@@ -1,26 +1,51 @@
 from __future__ import annotations
-from typing import Dict, Set, Iterable, List, Tuple, Optional
-from grammar_spec import Grammar, Production
+from typing import Dict, Set, Iterable, List, Tuple, Optional, FrozenSet
+from grammar_spec import Grammar
+from digraph import digraph
 
 EPSILON = "ε"
 
 class FirstSets:
-    def __init__(self, grammar: Grammar, first_map: Dict[str, Set[str]]) -> None:
+    def __init__(
+        self,
+        grammar: Grammar,
+        first_map: Dict[str, Set[str]],
+        first_bits: Optional[Dict[str, int]] = None,
+        nullable: Optional[Set[str]] = None,
+    ) -> None:
         self.grammar = grammar
         self.first_map: Dict[str, Set[str]] = first_map
-    
-    def first_of_symbol(self, symbol: str) -> Set[str]:
+
+        # Numeración de terminales (incluye '$'): bit i de una máscara = terminal_list[i]
+        self.terminal_list: List[str] = sorted(grammar.terminals | {"$"})
+        self.terminal_id: Dict[str, int] = {t: i for i, t in enumerate(self.terminal_list)}
+
+        if first_bits is None or nullable is None:
+            first_bits, nullable = self._bits_from_map(first_map)
+        self.first_bits: Dict[str, int] = first_bits
+        self.nullable: Set[str] = nullable
+
+        self._frozen: Dict[str, FrozenSet[str]] = {}
+        self._suffix: Optional[Tuple[List[List[int]], List[List[bool]]]] = None
+
+    def first_of_symbol(self, symbol: str) -> FrozenSet[str]:
+        cached = self._frozen.get(symbol)
+        if cached is not None:
+            return cached
         if symbol == "$":
-            return {"$"}
-        if symbol not in self.first_map:
-            return {symbol}
-        return set(self.first_map[symbol])
-    
+            fs = frozenset({"$"})
+        elif symbol not in self.first_map:
+            fs = frozenset({symbol})
+        else:
+            fs = frozenset(self.first_map[symbol])
+        self._frozen[symbol] = fs
+        return fs
+
     def first_of_sequence(self, seq: Iterable[str]) -> Set[str]:
         seq_list = list(seq)
         if not seq_list:
             return {EPSILON}
-        
+
         result: Set[str] = set()
 
         for i, sym in enumerate(seq_list):
@@ -32,72 +57,148 @@ class FirstSets:
 
         else:
             result.add(EPSILON)
-        
+
         return result
-    
+
+    def first_bits_of_sequence(self, seq: Iterable[str]) -> Tuple[int, bool]:
+        """(máscara de FIRST(seq) sin ε, seq anulable) sobre `terminal_list`."""
+        mask = 0
+        for sym in seq:
+            bits = self.first_bits.get(sym)
+            if bits is None:
+                bits = 1 << self.terminal_id[sym]   # '$' o terminal
+            mask |= bits
+            if sym not in self.nullable:
+                return mask, False
+        return mask, True
+
+    def suffix_tables(self) -> Tuple[List[List[int]], List[List[bool]]]:
+        """
+        Tablas por posición de producción, calculadas una vez por gramática:
+        first[p][d] = máscara de FIRST(rhs_p[d:]) y nullable[p][d] = rhs_p[d:] anulable,
+        con p el índice en grammar.productions y 0 <= d <= len(rhs_p).
+        """
+        if self._suffix is None:
+            firsts: List[List[int]] = []
+            nullables: List[List[bool]] = []
+            for prod in self.grammar.productions:
+                n = len(prod.right)
+                first = [0] * (n + 1)
+                null = [True] * (n + 1)
+                for d in range(n - 1, -1, -1):
+                    X = prod.right[d]
+                    bits = self.first_bits.get(X)
+                    if bits is None:
+                        bits = 1 << self.terminal_id[X]
+                    if X in self.nullable:
+                        first[d] = bits | first[d + 1]
+                        null[d] = null[d + 1]
+                    else:
+                        first[d] = bits
+                        null[d] = False
+                firsts.append(first)
+                nullables.append(null)
+            self._suffix = (firsts, nullables)
+        return self._suffix
+
+    def names_of(self, mask: int) -> Set[str]:
+        """Terminales codificados en una máscara."""
+        out: Set[str] = set()
+        while mask:
+            low = mask & -mask
+            out.add(self.terminal_list[low.bit_length() - 1])
+            mask ^= low
+        return out
 
     def is_nullable_symbol(self, symbol: str) -> bool:
         return EPSILON in self.first_of_symbol(symbol)
-    
+
     def is_nullable_sequence(self, seq: Iterable[str]) -> bool:
         return EPSILON in self.first_of_sequence(seq)
-    
+
 
     @staticmethod
     def compute_first_sets(grammar: Grammar) -> "FirstSets":
+        """
+        FIRST y anulables con máscaras de bits:
+          1) anulables con contadores por producción (lineal en la gramática);
+          2) grafo A → B si B aparece en A → α B … con α anulable; los terminales
+             alcanzados así forman la base de A;
+          3) Digraph resuelve el grafo por componentes fuertemente conexas en orden
+             topológico (en una componente todos comparten FIRST), sin iterar la
+             gramática completa hasta el punto fijo.
+        """
+        nullable = FirstSets._compute_nullable(grammar)
+
+        terminal_list = sorted(grammar.terminals | {"$"})
+        terminal_id = {t: i for i, t in enumerate(terminal_list)}
+        nts = sorted(grammar.nonterminals)
+        nt_id = {A: i for i, A in enumerate(nts)}
+
+        base = [0] * len(nts)
+        edges: List[List[int]] = [[] for _ in nts]
+        for prod in grammar.productions:
+            a = nt_id[prod.left]
+            for X in prod.right:
+                j = nt_id.get(X)
+                if j is None:
+                    base[a] |= 1 << terminal_id[X]
+                    break
+                edges[a].append(j)
+                if X not in nullable:
+                    break
+
+        solved = digraph(edges, base)
+
+        first_bits: Dict[str, int] = {A: solved[nt_id[A]] for A in nts}
         first: Dict[str, Set[str]] = {}
         for t in grammar.terminals:
             first[t] = {t}
-        for A in grammar.nonterminals:
-            first.setdefault(A, set())
-
-        changed = True
-        while changed:
-            changed = False
-            for prod in grammar.productions:
-                A = prod.left
-                alpha = list(prod.right)
-                if not alpha:
-                    if EPSILON not in first[A]:
-                        first[A].add(EPSILON)
-                        changed = True
-                    continue
-
-                all_nullable = True
-                for i, X in enumerate(alpha):
-                    fX = FirstSets._first_of_symbol_current(grammar, first, X)
-                    added = FirstSets._union_excluding_epsilon(first[A], fX)
-                    if added:
-                        changed = True
-                    
-                    if EPSILON not in fX:
-                        all_nullable = False
-                        break
-
-                if all_nullable:
-                    if EPSILON not in first[A]:
-                        first[A].add(EPSILON)
-                        changed = True
-        return FirstSets(grammar, first) 
-    
+            first_bits[t] = 1 << terminal_id[t]
+        fs = FirstSets(grammar, first, first_bits, nullable)
+        for A in nts:
+            names = fs.names_of(first_bits[A])
+            if A in nullable:
+                names.add(EPSILON)
+            first[A] = names
+        return fs
 
     @staticmethod
-    def _first_of_symbol_current(grammar: Grammar, first: Dict[str, Set[str]], symbol: str) -> Set[str]:    
-        if symbol == "$":
-            return {"$"}
-        if grammar.is_terminal(symbol):
-            return {symbol}
-        if grammar.is_nonterminal(symbol):
-            return first.setdefault(symbol, set())
-        
-        return {symbol}
-    
-    @staticmethod
-    def _union_excluding_epsilon(target: Set[str], source: Set[str]) -> bool:
-        before = len(target)
-        if EPSILON in source:
-            target.update(x for x in source if x != EPSILON)
-        else:
-            target.update(source)
-        return len(target) != before
-    
\ No newline at end of file
+    def _compute_nullable(grammar: Grammar) -> Set[str]:
+        nullable: Set[str] = set()
+        pending: List[int] = []            # símbolos del RHS aún no anulables, por producción
+        uses: Dict[str, List[int]] = {}    # no terminal -> producciones que lo usan
+        queue: List[str] = []
+        for i, prod in enumerate(grammar.productions):
+            if any(X not in grammar.nonterminals for X in prod.right):
+                pending.append(-1)         # tiene un terminal: nunca anulable
+                continue
+            pending.append(len(prod.right))
+            for X in prod.right:
+                uses.setdefault(X, []).append(i)
+            if not prod.right and prod.left not in nullable:
+                nullable.add(prod.left)
+                queue.append(prod.left)
+
+        while queue:
+            B = queue.pop()
+            for i in uses.get(B, ()):
+                pending[i] -= 1
+                A = grammar.productions[i].left
+                if pending[i] == 0 and A not in nullable:
+                    nullable.add(A)
+                    queue.append(A)
+        return nullable
+
+    def _bits_from_map(self, first_map: Dict[str, Set[str]]) -> Tuple[Dict[str, int], Set[str]]:
+        bits: Dict[str, int] = {}
+        nullable: Set[str] = set()
+        for sym, names in first_map.items():
+            mask = 0
+            for t in names:
+                if t == EPSILON:
+                    nullable.add(sym)
+                elif t in self.terminal_id:
+                    mask |= 1 << self.terminal_id[t]
+            bits[sym] = mask
+        return bits, nullable
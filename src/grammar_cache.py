@@ -0,0 +1,268 @@
+"""
+Caché en disco de gramáticas compiladas.
+
+La clave es un hash de (texto de gramática normalizado, niveles de precedencia,
+modo de construcción). Cada entrada guarda la gramática y la tabla en
+`<clave>.table.pkl` y, si se pidió, el autómata en `<clave>.automaton.pkl`
+(sólo `build` lo necesita para listar los ítems; `parse` sólo usa la tabla).
+
+El directorio se acota en bytes con desalojo LRU: el mtime de los archivos
+marca el último uso y se refresca en cada acierto.
+
+Variables de entorno:
+    LR1_CACHE=0              desactiva la caché
+    LR1_CACHE_DIR            directorio (por defecto ~/.cache/lr1)
+    LR1_CACHE_MAX_BYTES      tope de tamaño (por defecto 64 MiB)
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from grammar_spec import Grammar
+from first_sets import FirstSets
+from parse_table import LR1ParseTable
+from precedence import PrecedenceConfig
+from lr1_items import LR1Automaton
+
+
+# subir al cambiar el formato de lo que se guarda (tabla, autómata, estados)
+CACHE_VERSION = 3
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_TABLE_SUFFIX = ".table.pkl"
+_AUTOMATON_SUFFIX = ".automaton.pkl"
+
+
+@dataclass
+class CompiledGrammar:
+    grammar: Grammar
+    table: LR1ParseTable
+    # "hit" | "miss" | "off"
+    cache: str = "off"
+
+    @property
+    def automaton(self) -> Optional[LR1Automaton]:
+        return self.table.automaton
+
+
+def normalize_grammar_text(text: str) -> str:
+    """Quita líneas vacías, comentarios y espacios redundantes (no cambian la gramática)."""
+    lines = []
+    for raw in (text or "").splitlines():
+        line = " ".join(raw.split())
+        if line and not line.startswith("#"):
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def _normalize_precedence(levels) -> List[Dict]:
+    return [
+        {"assoc": (lvl.get("assoc") or "left").lower(), "tokens": list(lvl.get("tokens") or [])}
+        for lvl in (levels or [])
+    ]
+
+
+def cache_key(grammar_text: str, precedence_levels=None, mode: str = "lr1") -> str:
+    payload = json.dumps(
+        {
+            "v": CACHE_VERSION,
+            "grammar": normalize_grammar_text(grammar_text),
+            "precedence": _normalize_precedence(precedence_levels),
+            "mode": mode,
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class GrammarCache:
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        enabled: Optional[bool] = None,
+    ) -> None:
+        if enabled is None:
+            enabled = os.environ.get("LR1_CACHE", "1").lower() not in ("0", "false", "off", "no")
+        if directory is None:
+            directory = os.environ.get("LR1_CACHE_DIR") or os.path.join(
+                os.path.expanduser("~"), ".cache", "lr1"
+            )
+        if max_bytes is None:
+            try:
+                max_bytes = int(os.environ.get("LR1_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+            except ValueError:
+                max_bytes = DEFAULT_MAX_BYTES
+        self.enabled = enabled
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, key + suffix)
+
+    #  Lectura / escritura
+
+    def load(self, key: str, with_automaton: bool = False) -> Optional[CompiledGrammar]:
+        """Entrada de la caché o None; con `with_automaton` sólo acierta si el autómata también está."""
+        if not self.enabled:
+            return None
+        paths = [self._path(key, _TABLE_SUFFIX)]
+        if with_automaton:
+            paths.append(self._path(key, _AUTOMATON_SUFFIX))
+        try:
+            with open(paths[0], "rb") as f:
+                version, grammar, table = pickle.load(f)
+            if version != CACHE_VERSION:
+                return None
+            if with_automaton:
+                with open(paths[1], "rb") as f:
+                    table.automaton = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # archivo truncado o de otra versión: se descarta la entrada
+            self._remove(key)
+            return None
+        for p in paths:
+            self._touch(p)
+        return CompiledGrammar(grammar, table, cache="hit")
+
+    def store(self, key: str, compiled: CompiledGrammar) -> None:
+        if not self.enabled:
+            return
+        table = compiled.table
+        automaton = table.automaton
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            table.automaton = None   # la tabla se guarda sin el autómata
+            self._write(self._path(key, _TABLE_SUFFIX), (CACHE_VERSION, compiled.grammar, table))
+            if automaton is not None:
+                self._write(self._path(key, _AUTOMATON_SUFFIX), automaton)
+            self.evict()
+        except (OSError, pickle.PicklingError):
+            pass   # sin caché se sigue funcionando igual
+        finally:
+            table.automaton = automaton
+
+    def _write(self, path: str, obj) -> None:
+        # escritura atómica: otro proceso nunca ve un archivo a medias
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+    def _touch(self, path: str) -> None:
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def _remove(self, key: str) -> None:
+        for suffix in (_TABLE_SUFFIX, _AUTOMATON_SUFFIX):
+            try:
+                os.remove(self._path(key, suffix))
+            except OSError:
+                pass
+
+    #  Desalojo LRU
+
+    def entries(self) -> List[Tuple[str, int, float]]:
+        """(clave, bytes, último uso) por entrada, del uso más antiguo al más reciente."""
+        sizes: Dict[str, int] = {}
+        used: Dict[str, float] = {}
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        for name in names:
+            for suffix in (_TABLE_SUFFIX, _AUTOMATON_SUFFIX):
+                if name.endswith(suffix):
+                    key = name[: -len(suffix)]
+                    break
+            else:
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            sizes[key] = sizes.get(key, 0) + st.st_size
+            used[key] = max(used.get(key, 0.0), st.st_mtime)
+        return sorted(((k, sizes[k], used[k]) for k in sizes), key=lambda e: e[2])
+
+    def evict(self) -> int:
+        """Borra entradas LRU hasta quedar bajo `max_bytes`; devuelve cuántas borró."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for key, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(key)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> None:
+        for key, _, _ in self.entries():
+            self._remove(key)
+
+
+def _add_canonical_states(compiled: CompiledGrammar, mode: str, first: Optional[FirstSets] = None) -> bool:
+    """
+    En modo minimal, el tamaño de referencia para build: cuántos estados
+    tendría la colección canónica. Construirla es justo lo que el modo evita,
+    así que sólo se hace cuando se pide el autómata. True si se agregó.
+    """
+    automaton = compiled.table.automaton
+    if mode != "minimal" or automaton is None or "canonical_states" in automaton.stats:
+        return False
+    from minimal_lr1 import count_canonical_states
+    if first is None:
+        first = FirstSets.compute_first_sets(compiled.grammar)
+    automaton.stats["canonical_states"] = count_canonical_states(compiled.grammar, first)
+    return True
+
+
+def compile_grammar(
+    grammar_text: str,
+    precedence_levels=None,
+    mode: str = "lr1",
+    with_automaton: bool = True,
+    cache: Optional[GrammarCache] = None,
+) -> CompiledGrammar:
+    """
+    Gramática + tabla (y autómata si `with_automaton`) para el texto dado, desde
+    la caché si ya se compiló antes con la misma precedencia y modo.
+    """
+    cache = cache if cache is not None else GrammarCache()
+    key = cache_key(grammar_text, precedence_levels, mode)
+    hit = cache.load(key, with_automaton=with_automaton)
+    if hit is not None:
+        # la entrada pudo guardarla un parse, que no cuenta los estados canónicos
+        if with_automaton and _add_canonical_states(hit, mode):
+            cache.store(key, hit)
+        return hit
+
+    g = Grammar.from_text(grammar_text)
+    first = FirstSets.compute_first_sets(g)
+    prec_cfg = PrecedenceConfig.from_payload(g, precedence_levels or [])
+    table = LR1ParseTable.from_grammar(g, first, precedence=prec_cfg, mode=mode)
+    compiled = CompiledGrammar(g, table, cache="miss" if cache.enabled else "off")
+    if with_automaton:
+        _add_canonical_states(compiled, mode, first)
+    cache.store(key, compiled)
+    return compiled
@@ -0,0 +1,574 @@
+"""
+Reparseo incremental para uso tipo editor.
+
+Se guardan los tokens y el árbol del último parse con posiciones relativas:
+
+  tokens:  tok_sym (id de terminal), tok_adv (caracteres desde el fin del token
+           anterior hasta el fin de éste), tok_len y tok_leaf (su hoja en el
+           árbol). La posición absoluta sale de sumar avances, así que una
+           edición no obliga a corregir los tokens que le siguen; para ubicar
+           una edición se suma desde la anterior (como el gap de un buffer de
+           editor), no desde el principio.
+  nodos:   prod (-1 = hoja/token), term (id de terminal de una hoja), ntoks
+           (cantidad de tokens que cubre, no su posición), left_state (estado LR
+           en la pila justo antes de apilar el nodo), parent y el rango de hijos
+           en `children`.
+
+edit(start, end, texto) re-escanea sólo desde el token anterior a la edición
+hasta volver a coincidir con un token viejo (mismo inicio desplazado, símbolo y
+largo). Si los símbolos no cambiaron (espacios, un número por otro) el árbol es
+el mismo. Si cambiaron, el parser recorre el árbol viejo de izquierda a derecha
+como entrada: un subárbol fuera de la zona dañada se apila entero (un GOTO) si
+el estado actual es su left_state y el token que siguió a su última reducción
+(su lookahead) no cambió; si no, se descompone en sus hijos. Con el mismo estado
+y los mismos tokens y lookahead el parser LR repite exactamente las mismas
+acciones, así que el árbol resultante es el de un parse completo.
+
+Ese recorrido empieza por el subárbol más chico que contiene la zona dañada sin
+empezar en ella, desde su left_state: si termina en un solo nodo del mismo no
+terminal, justo antes del mismo lookahead, el parse completo seguiría igual que
+antes, y el nodo nuevo reemplaza al viejo en su padre. Si no, se prueba con el
+padre (hasta _GRAFT_TRIES ancestros) y si tampoco, se reparsea desde la raíz.
+En una lista recursiva a izquierda se conservan así el prefijo y la espina de
+arriba; si cambia la cantidad de tokens, sólo se corrige ntoks de los ancestros.
+
+Los nodos nuevos se agregan a los mismos arrays; cuando éstos duplican lo que
+tenían después de la última compactación, se copian sólo los nodos vivos (cada
+compactación se paga con los nodos creados desde la anterior).
+"""
+from __future__ import annotations
+from array import array
+from bisect import bisect_left
+from itertools import accumulate, islice
+from operator import sub
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from grammar_spec import Grammar
+from parse_table import LR1ParseTable
+from parser_driver import ParseResult
+from scanner import Scanner, ScanToken
+
+# ancestros que se prueban antes de reparsear desde la raíz: cada intento
+# descompone el subárbol hasta la edición, así que subir sin límite por una
+# espina larga costaría O(profundidad²) cuando el cambio no queda contenido
+_GRAFT_TRIES = 4
+
+
+class IncrementalParser:
+    def __init__(self, table: LR1ParseTable, grammar: Grammar) -> None:
+        self.table = table
+        self.compiled = table.compiled()
+        self._scanner = Scanner("", grammar)
+        self.text = ""
+
+        self.tok_sym = array("i")
+        self.tok_adv = array("i")
+        self.tok_len = array("i")
+        self.tok_leaf = array("i")
+        # (i, e): los tokens [0, i) terminan en e; edit() suma avances desde acá
+        self._gap: Tuple[int, int] = (0, 0)
+
+        self._clear_nodes()
+        self.last_stats: Dict[str, int] = {}
+
+    def _clear_nodes(self) -> None:
+        self.prod = array("i")
+        self.term = array("i")
+        self.ntoks = array("i")
+        self.left_state = array("i")
+        self.parent = array("i")
+        self.child_start = array("i")
+        self.child_count = array("i")
+        self.children = array("i")
+        self.root = -1
+        # nodos tras la última compactación (o el último parse desde cero)
+        self._base = 0
+
+    #  API
+
+    def parse(self, text: str) -> ParseResult:
+        """Parse completo de `text` (punto de partida de las ediciones)."""
+        self.text = text
+        syms, starts, lens = self._scan(text, 0, None)
+        self.tok_sym = array("i", syms)
+        self.tok_len = array("i", lens)
+        self.tok_adv = array("i", _advances(starts, lens, 0))
+        self.tok_leaf = array("i", [-1]) * len(syms)
+        self._gap = (0, 0)
+        self._clear_nodes()
+        return self._reparse(0, 0, len(syms), relexed=len(syms))
+
+    def edit(self, start: int, end: int, new_text: str) -> ParseResult:
+        """Reemplaza text[start:end] por `new_text` y reparsea lo mínimo."""
+        old = self.text
+        if not 0 <= start <= end <= len(old):
+            raise ValueError(f"Rango de edición inválido: [{start}, {end}) en texto de {len(old)} caracteres")
+        delta = len(new_text) - (end - start)
+        text = old[:start] + new_text + old[end:]
+        self.text = text
+
+        n_old = len(self.tok_sym)
+        # primer token que toca la edición, y uno más atrás por si se fusiona con ella
+        k, end_before = self._locate(start)
+        if k >= 2:
+            d0, scan_from = k - 1, end_before - self.tok_adv[k - 1]
+        else:
+            d0, scan_from = 0, 0
+
+        syms, starts, lens = self._scan(text, scan_from, (d0, end, delta))
+        m = len(syms)
+        d1 = self._resync
+        new_sym = array("i", syms)
+        same = m == d1 - d0 and self.tok_sym[d0:d1] == new_sym
+        leaf = self.tok_leaf[d0] if d0 < n_old and self.root >= 0 else -1
+
+        self.tok_sym[d0:d1] = new_sym
+        self.tok_len[d0:d1] = array("i", lens)
+        self.tok_adv[d0:d1] = array("i", _advances(starts, lens, scan_from))
+        if d1 < n_old:
+            last_end = starts[-1] + lens[-1] if m else scan_from
+            self.tok_adv[d0 + m] = self._resync_end + delta - last_end
+        self._gap = (d0, scan_from)
+
+        if same and self.root >= 0:
+            # los mismos símbolos dan el mismo parse: sólo cambiaron lexemas o espacios
+            self.last_stats = self._stats(1, 0, 0, 0, m)
+            return ParseResult(accepted=True, summary=self.last_stats)
+        if not same:
+            self.tok_leaf[d0:d1] = array("i", [-1]) * m
+        if leaf >= 0:
+            for target in islice(self._enclosing(leaf, d0, d1), _GRAFT_TRIES):
+                res = self._reparse(d0, d1, m, relexed=m, target=target)
+                if res is not None:
+                    return res
+        return self._reparse(d0, d1, m, relexed=m)
+
+    def tokens(self) -> List[ScanToken]:
+        """Tokens actuales como ScanToken (con línea y columna), sin '$'."""
+        out: List[ScanToken] = []
+        names = self.compiled.terminals
+        text = self.text
+        line, line_start, pos = 1, 0, 0
+        for sym, adv, ln in zip(self.tok_sym, self.tok_adv, self.tok_len):
+            end = pos + adv
+            start = end - ln
+            nl = text.count("\n", pos, start)
+            if nl:
+                line += nl
+                line_start = text.rfind("\n", pos, start) + 1
+            lexeme = text[start:end]
+            symbol = names[sym] if sym < len(names) else "ERR"
+            out.append(ScanToken(symbol, lexeme, line, start - line_start + 1))
+            pos = end
+        return out
+
+    def to_json(self) -> Optional[Dict]:
+        """Árbol actual en el mismo formato que ParseTree.to_json."""
+        if self.root < 0:
+            return None
+        toks = self.tokens()
+        productions = self.compiled.productions
+        out: Dict = {}
+        stack: List[Tuple[int, int, Dict]] = [(self.root, 0, out)]
+        while stack:
+            n, a, d = stack.pop()
+            p = self.prod[n]
+            if p < 0:
+                tok = toks[a]
+                d.update(symbol=tok.symbol, lexeme=tok.lexeme, line=tok.line, col=tok.col)
+                continue
+            prod = productions[p]
+            kids = [{} for _ in range(self.child_count[n])]
+            d.update(
+                symbol=prod.left,
+                production=f"{prod.left} → {' '.join(prod.right) if prod.right else 'ε'}",
+                children=kids,
+            )
+            cs = self.child_start[n]
+            for i, kd in enumerate(kids):
+                ch = self.children[cs + i]
+                stack.append((ch, a, kd))
+                a += self.ntoks[ch]
+        return out
+
+    #  Escaneo
+
+    def _locate(self, offset: int) -> Tuple[int, int]:
+        """
+        (k, e): k es el primer token que termina en `offset` o después y e el fin
+        del token k - 1 (0 si k = 0). Suma avances desde el gap, en bloques que se
+        duplican, así que el costo depende de la distancia a la edición anterior.
+        """
+        adv = self.tok_adv
+        n = len(adv)
+        i, e = self._gap
+        step = 64
+        if offset > e:
+            while i < n:
+                ends = list(accumulate(adv[i:i + step], initial=e))
+                k = bisect_left(ends, offset, 1)
+                if k < len(ends):
+                    return i + k - 1, ends[k - 1]
+                i, e = i + len(ends) - 1, ends[-1]
+                step *= 2
+            return n, e
+        while i > 0:
+            lo = max(0, i - step)
+            # fines de los tokens lo-1 .. i-1, de menor a mayor
+            ends = list(accumulate(reversed(adv[lo:i]), sub, initial=e))[::-1]
+            k = bisect_left(ends, offset)
+            if k > 0:
+                return lo + k - 1, ends[k - 1]
+            i, e = lo, ends[0]
+            step *= 2
+        return 0, 0
+
+    def _scan(self, text: str, pos: int, resync) -> Tuple[List[int], List[int], List[int]]:
+        """
+        Tokens desde `pos`. Sin `resync` hasta el final; con (j, end, delta), donde
+        el token viejo j es el primero que termina después de `pos`, hasta el
+        primer token que coincide con uno viejo posterior a la edición (su índice
+        queda en self._resync y su fin viejo en self._resync_end).
+        """
+        sc = self._scanner
+        sc.reset(text, pos)
+        term_id = self.compiled.term_id
+        unknown = self.compiled.unknown_id
+        syms: List[int] = []
+        starts: List[int] = []
+        lens: List[int] = []
+        tok_sym, tok_adv, tok_len = self.tok_sym, self.tok_adv, self.tok_len
+        n_old = len(tok_sym)
+        if resync is not None:
+            j, end, delta = resync
+            # fin viejo del token j, avanzando junto con j
+            oend = pos + tok_adv[j] if j < n_old else 0
+        self._resync = n_old
+        while True:
+            tok = sc.next_token()
+            if tok.symbol == "$":
+                break
+            L = len(tok.lexeme)
+            tstart = sc.i - L
+            sym = term_id.get(tok.symbol, unknown)
+            if resync is not None and tstart >= end + delta:
+                # tokens viejos (desplazados) que empiezan antes que éste ya no sirven
+                while j < n_old and oend - tok_len[j] + delta < tstart:
+                    j += 1
+                    if j < n_old:
+                        oend += tok_adv[j]
+                if (j < n_old and oend - tok_len[j] >= end
+                        and oend - tok_len[j] + delta == tstart
+                        and tok_sym[j] == sym and tok_len[j] == L):
+                    self._resync = j
+                    self._resync_end = oend
+                    break
+            syms.append(sym)
+            starts.append(tstart)
+            lens.append(L)
+        return syms, starts, lens
+
+    #  Parse con reutilización de subárboles
+
+    def _enclosing(self, leaf: int, d0: int, d1: int) -> Iterator[Tuple[int, int]]:
+        """
+        (nodo, primer token) de los ancestros de `leaf` (la hoja del token viejo
+        d0) que cubren [d0, d1) y empiezan antes de d0, de abajo hacia arriba y
+        sin la raíz.
+        """
+        parent, ntoks = self.parent, self.ntoks
+        children, child_start = self.children, self.child_start
+        node, a = leaf, d0
+        while True:
+            p = parent[node]
+            if p < 0 or parent[p] < 0:
+                return
+            i = child_start[p]
+            while children[i] != node:
+                a -= ntoks[children[i]]
+                i += 1
+            node = p
+            if a < d0 and a + ntoks[node] >= d1:
+                yield node, a
+
+    def _reparse(self, d0: int, d1: int, m: int, relexed: int,
+                 target: Optional[Tuple[int, int]] = None) -> Optional[ParseResult]:
+        """
+        Tokens viejos [d0, d1) fueron reemplazados por los nuevos [d0, d0 + m).
+        Un índice viejo k >= d1 corresponde al nuevo k - d1 + d0 + m.
+
+        Con `target` = (nodo, primer token) reparsea sólo ese subárbol desde su
+        left_state y lo reemplaza en su padre; devuelve None si el resultado no
+        es un solo nodo del mismo no terminal que termina donde terminaba el viejo.
+        """
+        c = self.compiled
+        action, goto = c.action, c.goto
+        astride, gstride = c.action_stride, c.goto_stride
+        prod_lhs, prod_len = c.prod_lhs, c.prod_len
+        eof = c.eof_id
+
+        prod, term, ntoks = self.prod, self.term, self.ntoks
+        left_state, parent = self.left_state, self.parent
+        child_start, child_count, children = self.child_start, self.child_count, self.children
+        tok_sym, tok_leaf = self.tok_sym, self.tok_leaf
+        n_new = len(tok_sym)
+        first_new = len(prod)
+
+        if target is None:
+            todo: List[Tuple[int, int]] = [(self.root, 0)] if self.root >= 0 else []
+            stack = [0]
+            pos = 0
+            stop = lhs = -1
+        else:
+            old, pos = target
+            todo = [target]
+            stack = [left_state[old]]
+            # fin del subárbol en índices nuevos: ahí tiene que quedar un solo nodo `lhs`
+            stop = pos + ntoks[old] + m - (d1 - d0)
+            lhs = prod_lhs[prod[old]]
+        nodes: List[int] = []
+        reused = created = broken = steps = 0
+        max_steps = 10000 + 64 * (n_new + 1)
+
+        def breakdown(node: int, a: int) -> None:
+            todo.pop()
+            cs = child_start[node]
+            kids = []
+            for i in range(child_count[node]):
+                ch = children[cs + i]
+                kids.append((ch, a))
+                a += ntoks[ch]
+            todo.extend(reversed(kids))
+
+        while steps < max_steps:
+            steps += 1
+            # siguiente elemento de entrada: subárbol viejo reutilizable u hoja nueva (-1)
+            elem = -1
+            if todo and not (d0 <= pos < d0 + m):
+                op = pos if pos < d0 else pos - d0 - m + d1
+                while todo:
+                    node, a = todo[-1]
+                    b = a + ntoks[node]
+                    if b <= op or b == a:
+                        todo.pop()          # ya consumido, dañado o vacío
+                        continue
+                    if a == op:
+                        if prod[node] < 0:
+                            intact = a < d0 or a >= d1
+                        else:
+                            intact = b < d0 or a >= d1
+                        if intact:
+                            elem = node
+                            break
+                    breakdown(node, a)
+                    broken += 1
+
+            la = tok_sym[pos] if pos < n_new else eof
+            s = stack[-1]
+            if elem >= 0 and prod[elem] >= 0 and left_state[elem] == s:
+                # mismo estado y mismo contexto: el subárbol se apila entero
+                todo.pop()
+                stack.append(goto[s * gstride + prod_lhs[prod[elem]]])
+                nodes.append(elem)
+                pos += ntoks[elem]
+                reused += 1
+                continue
+
+            code = action[s * astride + la]
+            if code > 0:
+                if elem >= 0 and prod[elem] >= 0:
+                    breakdown(elem, todo[-1][1])
+                    broken += 1
+                    continue
+                if pos == stop:
+                    # el subárbol absorbería el token que lo seguía; el árbol viejo queda intacto
+                    return None
+                if elem >= 0:
+                    todo.pop()
+                    leaf = elem
+                    left_state[leaf] = s
+                else:
+                    leaf = len(prod)
+                    prod.append(-1)
+                    term.append(la)
+                    ntoks.append(1)
+                    left_state.append(s)
+                    parent.append(-1)
+                    child_start.append(0)
+                    child_count.append(0)
+                    created += 1
+                tok_leaf[pos] = leaf
+                stack.append(code - 1)
+                nodes.append(leaf)
+                pos += 1
+            elif code < -1:
+                p = -code - 2
+                k = prod_len[p]
+                if target is not None and k >= len(stack):
+                    # la reducción toma símbolos de antes del subárbol
+                    return None
+                node = len(prod)
+                prod.append(p)
+                term.append(-1)
+                parent.append(-1)
+                child_start.append(len(children))
+                child_count.append(k)
+                if k:
+                    kids = nodes[-k:]
+                    del nodes[-k:]
+                    del stack[-k:]
+                    children.extend(kids)
+                    ntoks.append(sum(ntoks[x] for x in kids))
+                else:
+                    ntoks.append(0)
+                t = stack[-1]
+                left_state.append(t)
+                created += 1
+                nodes.append(node)
+                dst = goto[t * gstride + prod_lhs[p]]
+                if dst < 0:
+                    if target is not None:
+                        return None
+                    return self._fail(t, c.productions[p].left, pos,
+                                      f"ERROR interno: GOTO(I{t}, {c.productions[p].left}) indefinido.",
+                                      reused, created, broken, steps, relexed)
+                stack.append(dst)
+                if pos == stop and len(stack) == 2 and prod_lhs[p] == lhs:
+                    # mismo no terminal, mismo estado y mismo lookahead: el resto del parse no cambia
+                    self._graft(target[0], node, m - (d1 - d0))
+                    return self._done(first_new, reused, created, broken, steps, relexed)
+            elif code == -1:
+                if target is not None:
+                    return None
+                self.root = nodes[-1] if nodes else -1
+                if self.root >= 0:
+                    parent[self.root] = -1
+                return self._done(first_new, reused, created, broken, steps, relexed)
+            else:
+                if elem >= 0 and prod[elem] >= 0:
+                    breakdown(elem, todo[-1][1])
+                    broken += 1
+                    continue
+                if target is not None:
+                    return None
+                return self._fail(s, None, pos, None, reused, created, broken, steps, relexed)
+
+        if target is not None:
+            return None
+        return self._fail(stack[-1], None, pos, "Se superó el máximo de pasos (posible bucle).",
+                          reused, created, broken, steps, relexed)
+
+    def _graft(self, old: int, new: int, delta: int) -> None:
+        """Pone `new` en el lugar de `old` dentro de su padre; los ancestros cubren `delta` tokens más."""
+        parent, ntoks, children = self.parent, self.ntoks, self.children
+        p = parent[old]
+        i = self.child_start[p]
+        while children[i] != old:
+            i += 1
+        children[i] = new
+        parent[new] = p
+        if delta:
+            while p >= 0:
+                ntoks[p] += delta
+                p = parent[p]
+
+    def _done(self, first_new: int, reused: int, created: int, broken: int,
+              steps: int, relexed: int) -> ParseResult:
+        parent, children = self.parent, self.children
+        child_start, child_count = self.child_start, self.child_count
+        for n in range(first_new, len(self.prod)):
+            cs = child_start[n]
+            for i in range(cs, cs + child_count[n]):
+                parent[children[i]] = n
+        if first_new == 0:
+            self._base = len(self.prod)
+        self.last_stats = self._stats(reused, created, broken, steps, relexed)
+        self._maybe_compact()
+        return ParseResult(accepted=True, summary=self.last_stats)
+
+    def _fail(self, state: int, symbol: Optional[str], pos: int, message: Optional[str],
+              reused: int, created: int, broken: int, steps: int, relexed: int) -> ParseResult:
+        # sin árbol válido la próxima edición reparsea todo
+        self._clear_nodes()
+        self.last_stats = self._stats(reused, created, broken, steps, relexed)
+        if message is None:
+            toks = self.tokens()
+            tok = toks[pos] if pos < len(toks) else self._eof_token()
+            symbol = tok.symbol
+            message = (
+                f"ERROR de sintaxis: en estado I{state}, con lookahead '{tok.symbol}' "
+                f"(lexema='{tok.lexeme}' @ {tok.line}:{tok.col})."
+            )
+        return ParseResult(
+            accepted=False,
+            error_message=message,
+            error_state=state,
+            error_symbol=symbol,
+            error_pos=pos,
+            summary=self.last_stats,
+        )
+
+    def _eof_token(self) -> ScanToken:
+        text = self.text
+        line = text.count("\n") + 1
+        return ScanToken("$", "$", line, len(text) - (text.rfind("\n") + 1) + 1)
+
+    def _stats(self, reused: int, created: int, broken: int, steps: int, relexed: int) -> Dict[str, int]:
+        return {
+            "tokens": len(self.tok_sym),
+            "relexed_tokens": relexed,
+            "reused_subtrees": reused,
+            "new_nodes": created,
+            "broken_down": broken,
+            "steps": steps,
+        }
+
+    #  Compactación
+
+    def _maybe_compact(self) -> None:
+        if len(self.prod) > 2 * self._base + 1024:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Copia los nodos vivos a arrays nuevos (los de versiones viejas se descartan)."""
+        old = (self.prod, self.term, self.ntoks, self.left_state,
+               self.child_start, self.child_count, self.children)
+        o_prod, o_term, o_ntoks, o_left, o_cs, o_cc, o_children = old
+        root = self.root
+        self._clear_nodes()
+        new_id: Dict[int, int] = {}
+        # post-orden iterativo: los hijos reciben id antes que el padre
+        stack: List[Tuple[int, bool]] = [(root, False)]
+        while stack:
+            n, done = stack.pop()
+            if not done:
+                stack.append((n, True))
+                cs = o_cs[n]
+                for i in range(o_cc[n] - 1, -1, -1):
+                    stack.append((o_children[cs + i], False))
+                continue
+            node = new_id[n] = len(self.prod)
+            self.prod.append(o_prod[n])
+            self.term.append(o_term[n])
+            self.ntoks.append(o_ntoks[n])
+            self.left_state.append(o_left[n])
+            self.parent.append(-1)
+            self.child_start.append(len(self.children))
+            self.child_count.append(o_cc[n])
+            cs = o_cs[n]
+            for i in range(o_cc[n]):
+                ch = new_id[o_children[cs + i]]
+                self.children.append(ch)
+                self.parent[ch] = node
+        self.root = new_id[root]
+        self._base = len(self.prod)
+        self.tok_leaf = array("i", (new_id[x] for x in self.tok_leaf))
+
+
+def _advances(starts: List[int], lens: List[int], prev_end: int) -> List[int]:
+    out: List[int] = []
+    for st, ln in zip(starts, lens):
+        end = st + ln
+        out.append(end - prev_end)
+        prev_end = end
+    return out
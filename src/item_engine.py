@@ -0,0 +1,365 @@
+"""
+Motor compacto de ítems LR(1).
+
+Un núcleo LR(0) (producción, punto) se codifica como un entero:
+
+    core = (prod << dot_bits) | dot
+
+y un estado LR(1) se guarda como un mapa núcleo -> máscara de lookaheads
+(bit i = engine.lookaheads[i]), en lugar de un ítem por cada terminal. Las
+máscaras crecen en el lugar durante closure y dos estados se comparan por sus
+pares (núcleo, máscara). Un ítem individual sigue pudiendo empaquetarse como
+(core << la_bits) | la; los `LR1Item` sólo se materializan cuando un estado se
+muestra (`CoreLR1State.items` / `item_strings`).
+"""
+from __future__ import annotations
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from grammar_spec import Grammar, Production
+from first_sets import FirstSets
+from lr1_items import LR1Item, LR1State, LR1Automaton, symbol_sort_key
+
+
+class ItemEngine:
+    def __init__(self, grammar: Grammar, first_sets: FirstSets) -> None:
+        self.grammar = grammar
+        self.first_sets = first_sets
+
+        self.productions: List[Production] = list(grammar.productions)
+        self.prod_left: List[str] = [p.left for p in self.productions]
+        self.prod_right: List[Tuple[str, ...]] = [tuple(p.right) for p in self.productions]
+
+        # lookaheads posibles: terminales + '$', con la misma numeración que las máscaras de FIRST
+        self.lookaheads: List[str] = first_sets.terminal_list
+        self.la_id: Dict[str, int] = first_sets.terminal_id
+
+        max_rhs = max((len(r) for r in self.prod_right), default=0)
+        self.la_bits = max(1, len(self.lookaheads).bit_length())
+        self.dot_bits = max(1, (max_rhs + 1).bit_length())
+        self._la_mask = (1 << self.la_bits) - 1
+        self._dot_mask = (1 << self.dot_bits) - 1
+
+        # producciones por LHS en el orden de la gramática
+        self.prods_of: Dict[str, Tuple[int, ...]] = {}
+        for i, left in enumerate(self.prod_left):
+            self.prods_of.setdefault(left, ())
+            self.prods_of[left] += (i,)
+        for A in grammar.nonterminals:
+            self.prods_of.setdefault(A, ())
+
+        # símbolo tras el punto por núcleo; None si el ítem está completo
+        self._core_next: List[Optional[str]] = [None] * (len(self.productions) << self.dot_bits)
+        for p, rhs in enumerate(self.prod_right):
+            for dot, X in enumerate(rhs):
+                self._core_next[(p << self.dot_bits) | dot] = X
+
+        # FIRST(sufijo) / anulable por (producción, punto), precalculados en FirstSets
+        self._suffix_first, self._suffix_nullable = first_sets.suffix_tables()
+
+        # caches de expansiones de closure para toda la construcción
+        self._expansions: Dict[Tuple[str, int], Dict[int, int]] = {}
+        self._expansions0: Dict[str, FrozenSet[int]] = {}
+        self._core_text: Dict[int, Tuple[Tuple[str, str, str], str]] = {}
+
+    def __getstate__(self) -> Dict:
+        # las expansiones memoizadas sólo sirven durante la construcción
+        state = dict(self.__dict__)
+        state["_expansions"] = {}
+        state["_expansions0"] = {}
+        state["_core_text"] = {}
+        return state
+
+    #  Codificación
+
+    def pack(self, prod: int, dot: int, la: int) -> int:
+        return (((prod << self.dot_bits) | dot) << self.la_bits) | la
+
+    def unpack(self, item: int) -> Tuple[int, int, int]:
+        la = item & self._la_mask
+        rest = item >> self.la_bits
+        return rest >> self.dot_bits, rest & self._dot_mask, la
+
+    def core_of(self, item: int) -> int:
+        """Núcleo LR(0) (prod, punto) de un ítem empaquetado."""
+        return item >> self.la_bits
+
+    def core_parts(self, core: int) -> Tuple[int, int]:
+        return core >> self.dot_bits, core & self._dot_mask
+
+    def core_next(self, core: int) -> Optional[str]:
+        return self._core_next[core]
+
+    def to_item(self, item: int) -> LR1Item:
+        prod, dot, la = self.unpack(item)
+        rhs = self.prod_right[prod]
+        return LR1Item(self.prod_left[prod], rhs[:dot], rhs[dot:], self.lookaheads[la])
+
+    def from_item(self, item: LR1Item) -> int:
+        rhs = item.alpha + item.beta
+        for p in self.prods_of.get(item.left, ()):
+            if self.prod_right[p] == rhs:
+                return self.pack(p, len(item.alpha), self.la_id[item.lookahead])
+        raise KeyError(f"Ítem fuera de la gramática: {item}")
+
+    def core_text(self, core: int) -> Tuple[Tuple[str, str, str], str]:
+        """(clave de orden como item_sort_key sin lookahead, texto 'A → α · β , ')."""
+        cached = self._core_text.get(core)
+        if cached is None:
+            prod, dot = self.core_parts(core)
+            rhs = self.prod_right[prod]
+            left = self.prod_left[prod]
+            key = (left, " ".join(rhs[:dot]), " ".join(rhs[dot:]))
+            cached = self._core_text[core] = (key, str(LR1Item(left, rhs[:dot], rhs[dot:], "")))
+        return cached
+
+    def start_item(self) -> int:
+        assert self.grammar.augmented_start is not None and self.grammar.start_symbol is not None
+        for p in self.prods_of[self.grammar.augmented_start]:
+            if self.prod_right[p] == (self.grammar.start_symbol,):
+                return self.pack(p, 0, self.la_id["$"])
+        raise ValueError("No existe la producción aumentada S' → S.")
+
+    #  Closure / sucesores sobre núcleo -> máscara
+
+    def suffix_first(self, core: int) -> Tuple[int, bool]:
+        """(máscara de FIRST(β), β anulable) para el resto β de la producción desde `core`."""
+        prod, dot = self.core_parts(core)
+        return self._suffix_first[prod][dot], self._suffix_nullable[prod][dot]
+
+    def closure_masks(self, kernel: Dict[int, int]) -> Dict[int, int]:
+        # closure(K) = K ∪ (∪ expansión(X, L) por cada núcleo de K con ·X), donde
+        # la expansión de cada par (no terminal, máscara de lookaheads) se calcula
+        # una sola vez por construcción y se reutiliza en todos los estados.
+        result = dict(kernel)
+        nonterminals = self.grammar.nonterminals
+        for core, mask in kernel.items():
+            X = self._core_next[core]
+            if X is None or X not in nonterminals:
+                continue
+            prod, dot = self.core_parts(core)
+            la = self._suffix_first[prod][dot + 1]
+            if self._suffix_nullable[prod][dot + 1]:
+                la |= mask
+            for c, m in self._expansion(X, la).items():
+                old = result.get(c, 0)
+                if m & ~old:
+                    result[c] = old | m
+        return result
+
+    def _expansion(self, X: str, lookaheads: int) -> Dict[int, int]:
+        """Núcleos (con sus máscaras) que genera [X → · δ, L] para L = `lookaheads` (memoizado)."""
+        if not lookaheads:
+            # FIRST(β L) vacío (β no genera cadenas): no hay ítems [X → · δ, a]
+            return {}
+        key = (X, lookaheads)
+        cached = self._expansions.get(key)
+        if cached is not None:
+            return cached
+
+        result: Dict[int, int] = {p << self.dot_bits: lookaheads for p in self.prods_of[X]}
+        queue = deque(result)
+        nonterminals = self.grammar.nonterminals
+        # worklist: un núcleo vuelve a la cola sólo si su máscara creció
+        while queue:
+            core = queue.popleft()
+            Y = self._core_next[core]
+            if Y is None or Y not in nonterminals:
+                continue
+            prod, dot = self.core_parts(core)
+            la = self._suffix_first[prod][dot + 1]
+            if self._suffix_nullable[prod][dot + 1]:
+                la |= result[core]
+            for p in self.prods_of[Y]:
+                c = p << self.dot_bits
+                old = result.get(c, 0)
+                if la & ~old:
+                    result[c] = old | la
+                    queue.append(c)
+
+        self._expansions[key] = result
+        return result
+
+    def successor_kernel_masks(self, cores: Dict[int, int]) -> Dict[str, Dict[int, int]]:
+        """Kernels de goto(I, X) para todos los X, en una sola pasada sobre los núcleos de I."""
+        buckets: Dict[str, Dict[int, int]] = {}
+        core_next = self._core_next
+        for core, mask in cores.items():
+            X = core_next[core]
+            if X is None:
+                continue
+            bucket = buckets.get(X)
+            if bucket is None:
+                buckets[X] = {core + 1: mask}
+            else:
+                bucket[core + 1] = mask
+        # mismo orden de símbolos que el recorrido goto-por-símbolo
+        return {X: buckets[X] for X in sorted(buckets, key=symbol_sort_key)}
+
+    #  Colección canónica
+
+    def build(self) -> LR1Automaton:
+        states: List[LR1State] = []
+        transitions: Dict[int, Dict[str, int]] = {}
+        # Identidad de estados por kernel: closure sólo sale del kernel y nunca
+        # agrega ítems con el punto avanzado, así que dos estados son iguales
+        # si y sólo si sus kernels (pares núcleo, máscara) lo son.
+        state_index: Dict[FrozenSet[Tuple[int, int]], int] = {}
+        stats = {"closures": 0, "closures_skipped": 0}
+
+        def get_or_add_state(kernel: Dict[int, int]) -> Tuple[int, bool]:
+            """Devuelve (id_estado, es_nuevo); sólo calcula closure para kernels nuevos."""
+            key = frozenset(kernel.items())
+            sid = state_index.get(key)
+            if sid is not None:
+                stats["closures_skipped"] += 1
+                return sid, False
+            sid = len(states)
+            states.append(CoreLR1State(sid, self.closure_masks(kernel), self))
+            stats["closures"] += 1
+            state_index[key] = sid
+            return sid, True
+
+        start = self.start_item()
+        get_or_add_state({self.core_of(start): 1 << self.unpack(start)[2]})
+        worklist = deque([0])
+
+        while worklist:
+            sid = worklist.popleft()
+
+            for X, K in self.successor_kernel_masks(states[sid].cores).items():
+                tid, is_new = get_or_add_state(K)
+                transitions.setdefault(sid, {})[X] = tid
+                if is_new:
+                    worklist.append(tid)
+
+        stats["states"] = len(states)
+        return LR1Automaton(states, transitions, stats)
+
+    #  Autómata LR(0) (núcleos sin lookahead), base de LALR(1)
+
+    def closure0(self, cores: Iterable[int]) -> FrozenSet[int]:
+        kernel = list(cores)
+        result: Set[int] = set(kernel)
+        for c in kernel:
+            X = self._core_next[c]
+            if X is not None and X in self.grammar.nonterminals:
+                result |= self._expansion0(X)
+        return frozenset(result)
+
+    def _expansion0(self, X: str) -> FrozenSet[int]:
+        cached = self._expansions0.get(X)
+        if cached is not None:
+            return cached
+        result: Set[int] = {p << self.dot_bits for p in self.prods_of[X]}
+        queue = deque(result)
+        while queue:
+            Y = self._core_next[queue.popleft()]
+            if Y is None or Y not in self.grammar.nonterminals:
+                continue
+            for p in self.prods_of[Y]:
+                c = p << self.dot_bits
+                if c not in result:
+                    result.add(c)
+                    queue.append(c)
+        frozen = frozenset(result)
+        self._expansions0[X] = frozen
+        return frozen
+
+    def build_lr0(self) -> Tuple[List[FrozenSet[int]], List[FrozenSet[int]], List[Dict[str, int]]]:
+        """Devuelve (kernels, closures, transiciones) del autómata LR(0), con la misma numeración BFS."""
+        kernels: List[FrozenSet[int]] = []
+        closures: List[FrozenSet[int]] = []
+        transitions: List[Dict[str, int]] = []
+        index: Dict[FrozenSet[int], int] = {}
+
+        def get_or_add(kernel: FrozenSet[int]) -> Tuple[int, bool]:
+            sid = index.get(kernel)
+            if sid is not None:
+                return sid, False
+            sid = len(kernels)
+            index[kernel] = sid
+            kernels.append(kernel)
+            closures.append(self.closure0(kernel))
+            transitions.append({})
+            return sid, True
+
+        get_or_add(frozenset([self.core_of(self.start_item())]))
+        worklist = deque([0])
+        while worklist:
+            sid = worklist.popleft()
+            buckets: Dict[str, List[int]] = {}
+            for c in closures[sid]:
+                X = self._core_next[c]
+                if X is not None:
+                    buckets.setdefault(X, []).append(c + 1)
+            for X in sorted(buckets, key=symbol_sort_key):
+                tid, is_new = get_or_add(frozenset(buckets[X]))
+                transitions[sid][X] = tid
+                if is_new:
+                    worklist.append(tid)
+        return kernels, closures, transitions
+
+
+class CoreLR1State(LR1State):
+    """Estado LR(1) como mapa núcleo LR(0) → máscara de lookaheads (bit i = engine.lookaheads[i])."""
+
+    def __init__(self, id: int, cores: Dict[int, int], engine: ItemEngine) -> None:
+        self.id = id
+        self.cores = cores
+        self.engine = engine
+        self._items: Optional[FrozenSet[LR1Item]] = None
+
+    def __getstate__(self) -> Dict:
+        state = dict(self.__dict__)
+        state["_items"] = None
+        return state
+
+    @property
+    def items(self) -> FrozenSet[LR1Item]:
+        if self._items is None:
+            eng = self.engine
+            self._items = frozenset(
+                eng.to_item((core << eng.la_bits) | la)
+                for core, mask in self.cores.items()
+                for la in iter_bits(mask)
+            )
+        return self._items
+
+    def item_strings(self) -> List[str]:
+        eng = self.engine
+        rows = []
+        for core, mask in self.cores.items():
+            key, prefix = eng.core_text(core)
+            for i in iter_bits(mask):
+                la = eng.lookaheads[i]
+                rows.append((key, la, prefix + la))
+        rows.sort()
+        lines: List[str] = []
+        for _, _, line in rows:
+            # producciones duplicadas dan el mismo ítem: se muestra una vez
+            if not lines or lines[-1] != line:
+                lines.append(line)
+        return lines
+
+    def reductions(self) -> Iterable[Tuple[str, Tuple[str, ...], str]]:
+        eng = self.engine
+        # producciones duplicadas dan el mismo reduce: se emite una vez, como con los LR1Item
+        seen: Set[Tuple[str, Tuple[str, ...], str]] = set()
+        for core in sorted(self.cores):
+            if eng.core_next(core) is not None:
+                continue
+            prod = core >> eng.dot_bits
+            for la in iter_bits(self.cores[core]):
+                red = (eng.prod_left[prod], eng.prod_right[prod], eng.lookaheads[la])
+                if red not in seen:
+                    seen.add(red)
+                    yield red
+
+
+def iter_bits(mask: int) -> Iterable[int]:
+    """Índices de los bits encendidos de `mask`, de menor a mayor."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
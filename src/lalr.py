@@ -0,0 +1,188 @@
+"""
+Construcción LALR(1) sobre el autómata LR(0), con lookaheads calculados por las
+relaciones de DeRemer & Pennello (1982):
+
+    DR(p, A)     = terminales que se leen justo tras goto(p, A)
+    reads        (p, A) reads (r, C)     si r = goto(p, A) y C es anulable
+    includes     (p, A) includes (p', B) si B → β A γ, γ anulable y p' --β--> p
+    lookback     (q, A → ω) lookback (p, A) si p --ω--> q
+
+    Read   = DR   cerrado bajo reads
+    Follow = Read cerrado bajo includes
+    LA(q, A → ω) = ∪ { Follow(p, A) : (q, A → ω) lookback (p, A) }
+
+Los conjuntos se manejan como máscaras de bits sobre `engine.lookaheads`.
+"""
+from __future__ import annotations
+from collections import deque
+from typing import Dict, List, Set, Tuple
+
+from grammar_spec import Grammar, Production
+from first_sets import FirstSets
+from lr1_items import LR1Automaton, LR1State
+from item_engine import ItemEngine, CoreLR1State, iter_bits
+from digraph import digraph
+
+
+def build_lalr_collection(grammar: Grammar, first_sets: FirstSets) -> LR1Automaton:
+    assert grammar.augmented_start is not None and grammar.start_symbol is not None
+
+    engine = ItemEngine(grammar, first_sets)
+    _, closures, trans = engine.build_lr0()
+    nonterminals = grammar.nonterminals
+    nullable = {A for A in nonterminals if first_sets.is_nullable_symbol(A)}
+
+    # Transiciones por no terminal (p, A), numeradas
+    nt_index: Dict[Tuple[int, str], int] = {}
+    nt_trans: List[Tuple[int, str]] = []
+    for p, edges in enumerate(trans):
+        for X in edges:
+            if X in nonterminals:
+                nt_index[(p, X)] = len(nt_trans)
+                nt_trans.append((p, X))
+
+    accept_core = engine.core_of(engine.start_item()) + 1   # S' → S ·
+    eof_bit = 1 << engine.la_id["$"]
+
+    # DR y reads
+    dr: List[int] = []
+    reads: List[List[int]] = []
+    for p, A in nt_trans:
+        r = trans[p][A]
+        mask = 0
+        rel: List[int] = []
+        for X in trans[r]:
+            if X in nonterminals:
+                if X in nullable:
+                    rel.append(nt_index[(r, X)])
+            else:
+                mask |= 1 << engine.la_id[X]
+        if accept_core in closures[r]:
+            mask |= eof_bit
+        dr.append(mask)
+        reads.append(rel)
+
+    read_sets = digraph(reads, dr)
+
+    # includes y lookback, recorriendo cada producción B → ω desde los estados que la predicen
+    includes: List[List[int]] = [[] for _ in nt_trans]
+    lookback: Dict[Tuple[int, int], List[int]] = {}
+    for p_start, cl in enumerate(closures):
+        for core in cl:
+            prod, dot = engine.core_parts(core)
+            if dot != 0:
+                continue
+            B = engine.prod_left[prod]
+            src = nt_index.get((p_start, B))
+            if src is None:
+                continue   # S' → S: no hay transición sobre S'
+            rhs = engine.prod_right[prod]
+            q = p_start
+            for i, X in enumerate(rhs):
+                if X in nonterminals and _all_nullable(rhs[i + 1:], nullable):
+                    includes[nt_index[(q, X)]].append(src)
+                q = trans[q][X]
+            lookback.setdefault((q, prod), []).append(src)
+
+    follow = digraph(includes, read_sets)
+
+    # Máscaras de lookahead por núcleo. Para [A → α · β] en q:
+    # LA = ∪ Follow(p, A) con p --α--> q (para ítems completos es el LA de la reducción).
+    preds: List[Dict[str, List[int]]] = [{} for _ in trans]
+    for p, edges in enumerate(trans):
+        for X, q in edges.items():
+            preds[q].setdefault(X, []).append(p)
+
+    aug_prod = engine.core_parts(accept_core)[0]
+    states: List[LR1State] = []
+    for q, cl in enumerate(closures):
+        cores: Dict[int, int] = {}
+        for core in cl:
+            prod, dot = engine.core_parts(core)
+            if prod == aug_prod:
+                cores[core] = eof_bit
+                continue
+            if dot == len(engine.prod_right[prod]) and (q, prod) in lookback:
+                mask = 0
+                for t in lookback[(q, prod)]:
+                    mask |= follow[t]
+                cores[core] = mask
+                continue
+            A = engine.prod_left[prod]
+            mask = 0
+            for p in _walk_back(preds, q, engine.prod_right[prod][:dot]):
+                t = nt_index.get((p, A))
+                if t is not None:
+                    mask |= follow[t]
+            cores[core] = mask
+        states.append(CoreLR1State(q, cores, engine))
+
+    transitions = {p: dict(edges) for p, edges in enumerate(trans) if edges}
+    stats = {
+        "states": len(states),
+        "nonterminal_transitions": len(nt_trans),
+        "includes_edges": sum(len(e) for e in includes),
+    }
+    return LR1Automaton(states, transitions, stats, mode="lalr")
+
+
+def find_merge_conflicts(grammar: Grammar, first_sets: FirstSets, table) -> List:
+    """
+    Conflictos reduce/reduce de una tabla LALR(1) que NO existen en la colección
+    canónica LR(1): son los que introduce la fusión de estados con igual núcleo.
+    La colección canónica sólo se construye si la tabla tiene conflictos r/r.
+    """
+    from parse_table import ActionKind
+
+    rr = [c for c in table.conflicts
+          if c.existing.kind == ActionKind.REDUCE and c.incoming.kind == ActionKind.REDUCE]
+    if not rr:
+        return []
+
+    engine = ItemEngine(grammar, first_sets)
+    canonical = engine.build()
+    _, _, lr0_trans = engine.build_lr0()
+
+    # estado canónico -> estado LR(0) (= LALR) al que se fusiona, siguiendo las mismas
+    # transiciones desde el inicial: comparar núcleos no sirve, porque un ítem sin
+    # ningún lookahead no existe en LR(1) y el núcleo canónico puede quedar más chico
+    lr0_of = {0: 0}
+    queue = deque([0])
+    while queue:
+        s = queue.popleft()
+        for X, t in canonical.transitions.get(s, {}).items():
+            if t not in lr0_of:
+                lr0_of[t] = lr0_trans[lr0_of[s]][X]
+                queue.append(t)
+
+    # (estado LALR, lookahead) -> conjuntos de producciones reducibles en algún estado canónico fusionado
+    canonical_reduces: Dict[Tuple[int, str], List[Set[Production]]] = {}
+    for st in canonical.states:
+        q = lr0_of[st.id]
+        by_la: Dict[str, Set[Production]] = {}
+        for core, mask in st.cores.items():
+            if engine.core_next(core) is None:
+                prod = engine.core_parts(core)[0]
+                for la in iter_bits(mask):
+                    by_la.setdefault(engine.lookaheads[la], set()).add(engine.productions[prod])
+        for a, prods in by_la.items():
+            canonical_reduces.setdefault((q, a), []).append(prods)
+
+    introduced = []
+    for c in rr:
+        pair = {c.existing.production, c.incoming.production}
+        if not any(pair <= prods for prods in canonical_reduces.get((c.state_id, c.symbol), [])):
+            introduced.append(c)
+    return introduced
+
+
+def _all_nullable(seq, nullable: Set[str]) -> bool:
+    return all(X in nullable for X in seq)
+
+
+def _walk_back(preds: List[Dict[str, List[int]]], q: int, alpha: Tuple[str, ...]) -> Set[int]:
+    """Estados p tales que p --alpha--> q."""
+    current = {q}
+    for X in reversed(alpha):
+        current = {p for s in current for p in preds[s].get(X, ())}
+    return current
@@ -1,9 +1,8 @@
 import sys, json
+from dataclasses import asdict
 
 from grammar_spec import Grammar
-from first_sets import FirstSets
-from lr1_items import build_canonical_collection
-from parse_table import LR1ParseTable
+from grammar_cache import compile_grammar
 
 # NUEVO: precedencia y análisis de ambigüedad
 from precedence import PrecedenceConfig
@@ -72,13 +71,9 @@ def _table_to_json(grammar: Grammar, table, automaton):
 
     states_json = []
     for st in states_sorted:
-        items_sorted = sorted(
-            st.items,
-            key=lambda x: (x.left, " ".join(x.alpha), " ".join(x.beta), x.lookahead),
-        )
         row = {
             "state": st.id,
-            "items": [str(it) for it in items_sorted],
+            "items": st.item_strings(),
         }
 
         arow = table.action.get(st.id, {})
@@ -129,6 +124,9 @@ def _suggest_precedence(grammar: Grammar):
     return levels
 
 
+_MODE_LABELS = {"lr1": "LR(1)", "lalr": "LALR(1)", "minimal": "LR(1) mínimo"}
+
+
 def _normalize_arrows(txt: str) -> str:
     return (txt or "").replace("⇒", "->").replace("→", "->").replace("—>", "->").replace("–>", "->")
 
@@ -137,16 +135,16 @@ def cmd_build(payload):
     # normaliza flechas unicode en el backend por robustez
     grammar_text = _normalize_arrows(payload.get("grammar") or "")
     precedence_levels = payload.get("precedence")  # lista opcional de niveles
+    mode = payload.get("mode") or "lr1"            # "lr1" (canónico) | "lalr" | "minimal"
 
-    g = Grammar.from_text(grammar_text)
-    first = FirstSets.compute_first_sets(g)
-    automaton = build_canonical_collection(g, first)
+    # gramática + autómata + tabla, desde la caché en disco si ya se compiló
+    compiled = compile_grammar(grammar_text, precedence_levels, mode)
+    g, table = compiled.grammar, compiled.table
+    automaton = table.automaton
+    merge_conflicts = [str(c) for c in table.merge_conflicts]
 
     prec_cfg = PrecedenceConfig.from_payload(g, precedence_levels or [])
 
-    # la tabla acepta precedencia para resolver shift/reduce
-    table = LR1ParseTable.build_lr1_parse_table(g, automaton, precedence=prec_cfg)
-
     # análisis de conflictos / hints
     ambi = analyze_conflicts(g, table)
 
@@ -154,21 +152,31 @@ def cmd_build(payload):
     preview = make_expression_preview(g, prec_cfg)
 
     # Si hay conflictos, BLOQUEAMOS la tabla y devolvemos opciones
+    if merge_conflicts:
+        ambi["hints"].append(
+            "La fusión LALR(1) introdujo conflictos reduce/reduce que no existen en LR(1) canónico; "
+            "construye con mode 'lr1' o reescribe las producciones involucradas."
+        )
+
     if ambi["has_conflicts"]:
         return {
             "success": True,
             "blocked": True,
-            "message": "Se detectaron conflictos LR(1). Aplica una estrategia de desambiguación y vuelve a construir.",
+            "mode": mode,
+            "message": f"Se detectaron conflictos {_MODE_LABELS.get(mode, mode)}. Aplica una estrategia de desambiguación y vuelve a construir.",
             "table_data": _grammar_meta_to_json(g),  # solo metadatos (sin estados)
             "ambiguity": {
                 "is_lr1": False,
                 "has_conflicts": True,
                 "conflicts": ambi["conflicts"],
                 "hints": ambi["hints"],
+                "merge_conflicts": merge_conflicts,
                 "resolved_with_precedence": False
             },
             "suggested_precedence": _suggest_precedence(g),  # presets calculados
-            "desugared_preview": preview
+            "desugared_preview": preview,
+            "stats": automaton.stats,
+            "cache": compiled.cache,
         }
 
     # Sin conflictos → devolvemos tabla completa
@@ -178,43 +186,113 @@ def cmd_build(payload):
         "has_conflicts": False,
         "conflicts": [],
         "hints": [],
+        "merge_conflicts": [],
         "resolved_with_precedence": bool(precedence_levels)
     }
     base["blocked"] = False
+    base["mode"] = mode
     base["desugared_preview"] = preview
+    base["stats"] = automaton.stats
+    base["cache"] = compiled.cache
+    # tamaño de la tabla comprimida (reducciones por defecto + comb vector) vs. la densa
+    base["compression"] = table.compressed().stats()
     return base
 
 
+def _make_scanner(payload, text, grammar):
+    # "regex": RegexScanner; "lazy": además línea/columna sólo al pedirlas
+    from scanner import RegexScanner, Scanner
+    kind = payload.get("scanner")
+    if kind in ("regex", "lazy"):
+        return RegexScanner(text, grammar, lazy_positions=(kind == "lazy"))
+    return Scanner(text, grammar)
+
+
+def _fused_parse(payload, text, grammar, table, with_summary, keep_tokens):
+    # "fused": el scanner sólo prueba los terminales válidos en cada estado (ParserDriver.parse_fused)
+    from parser_driver import ParserDriver
+    tokens = [] if keep_tokens else None
+    max_steps = payload.get("max_steps")
+    res = ParserDriver(table).parse_fused(text, grammar, max_steps=int(max_steps) if max_steps else None,
+                                          with_summary=with_summary, tokens=tokens)
+    return tokens, res
+
+
+def _scan_tokens(payload, text, grammar, table):
+    # (tokens, palabras clave leídas como id o None); con "fused" los tokens del parse fusionado
+    # pasan después por el driver de siempre (traza, árbol, recuperación)
+    if payload.get("scanner") == "fused":
+        tokens, res = _fused_parse(payload, text, grammar, table, with_summary=True, keep_tokens=True)
+        return tokens, res.summary["contextual"]
+    return _make_scanner(payload, text, grammar).tokenize_all(), None
+
+
+def _max_steps(payload, tokens):
+    # sin "max_steps" explícito el límite crece con la entrada: sólo corta ciclos, no entradas largas
+    return int(payload.get("max_steps") or 10000 + 64 * len(tokens))
+
+
+def _step_json(s):
+    return {
+        "step": s.step,
+        "stack": s.stack_states,
+        "symbols": s.stack_symbols,
+        "input": s.input_window.split() if s.input_window else [],
+        "action": s.action_str,
+    }
+
+
 def cmd_parse(payload):
     # Reconstruimos la tabla para el parse con la MISMA precedencia (si se envía)
     grammar_text = _normalize_arrows(payload.get("grammar") or "")
     input_text   = payload.get("input", "")
     precedence_levels = payload.get("precedence") or []
+    mode = payload.get("mode") or "lr1"
+    trace = payload.get("trace") or "full"         # "none" | "summary" | "full"
+
+    # el parse sólo necesita la tabla: una gramática ya compilada no se reconstruye
+    compiled = compile_grammar(grammar_text, precedence_levels, mode, with_automaton=False)
+    g, table = compiled.grammar, compiled.table
+
+    if payload.get("input_file"):
+        return _parse_file(payload, table, g)
+
+    # Scanner + driver tal cual ("scanner": "regex" | "lazy" usa RegexScanner, mismos tokens;
+    # "fused" lee cada token según el estado del parser)
+    from parser_driver import ParserDriver
+    recover = bool(payload.get("recover"))
+    if recover and trace == "full":
+        trace = "summary"     # la recuperación no registra pasos
+    build_tree = bool(payload.get("tree"))
+    if payload.get("scanner") == "fused" and trace in ("none", "summary") and not build_tree and not recover:
+        # sin traza, árbol ni recuperación el parse fusionado ya es el resultado: una sola pasada
+        tokens, res = _fused_parse(payload, input_text, g, table, with_summary=(trace == "summary"),
+                                   keep_tokens=bool(payload.get("tree_stats")))
+    else:
+        tokens, contextual = _scan_tokens(payload, input_text, g, table)
+        res = ParserDriver(table).parse(tokens, max_steps=_max_steps(payload, tokens), trace=trace,
+                                        build_tree=build_tree,
+                                        recover=recover, max_errors=int(payload.get("max_errors") or 25),
+                                        max_attempts=int(payload.get("max_attempts") or 32))
+        if contextual is not None and res.summary is not None:
+            res.summary["contextual"] = contextual
 
-    g = Grammar.from_text(grammar_text)
-    first = FirstSets.compute_first_sets(g)
-    automaton = build_canonical_collection(g, first)
-    prec_cfg = PrecedenceConfig.from_payload(g, precedence_levels)
-    table = LR1ParseTable.build_lr1_parse_table(g, automaton, precedence=prec_cfg)
-
-    # Scanner + driver tal cual
-    from parser_driver import ParserDriver, Scanner
-    scanner = Scanner(input_text, g)
-    tokens = scanner.tokenize_all()
-    driver = ParserDriver(table)
-    res = driver.parse(tokens)
-
-    steps = []
-    for s in res.steps:
-        steps.append({
-            "step": s.step,
-            "stack": s.stack_states,
-            "symbols": s.stack_symbols,
-            "input": s.input_window.split() if s.input_window else [],
-            "action": s.action_str,
-        })
+    steps = [_step_json(s) for s in res.trace.iter_steps()] if res.trace is not None else []
 
     out = {"success": res.accepted, "steps": steps}
+    if trace != "full":
+        out["trace"] = trace
+        out["error_pos"] = res.error_pos
+        if res.summary is not None:
+            out["summary"] = res.summary
+    if res.tree is not None:
+        out["tree"] = res.tree.to_json()
+    if payload.get("tree_stats"):
+        # "tree_stats": costo de armar el árbol frente al driver sin traza (corre ambos aparte)
+        from parse_tree import measure_tree_overhead
+        out["tree_stats"] = measure_tree_overhead(table, tokens, repeat=int(payload.get("repeat") or 5))
+    if recover:
+        out["errors"] = [asdict(e) for e in res.errors or []]
     if not res.accepted:
         out["error"] = res.error_message or "Cadena rechazada"
     else:
@@ -222,9 +300,114 @@ def cmd_parse(payload):
     return out
 
 
+def _parse_file(payload, table, grammar):
+    # "input_file": ruta a un archivo que se mapea con mmap (MappedScanner + PushParser);
+    # no se arma la lista de tokens, así que no hay traza ni árbol
+    from mapped_input import parse_file
+    max_steps = payload.get("max_steps")
+    try:
+        res = parse_file(table, grammar, payload["input_file"],
+                         max_steps=None if max_steps is None else int(max_steps))
+    except OSError as e:
+        return {"success": False, "steps": [], "error": f"No se pudo abrir el archivo: {e}"}
+    out = {"success": res.accepted, "steps": [], "trace": "summary",
+           "error_pos": res.error_pos, "summary": res.summary}
+    if not res.accepted:
+        out["error"] = res.error_message or "Cadena rechazada"
+    else:
+        out["message"] = "Cadena aceptada"
+    return out
+
+
+def cmd_parse_stream(payload, out=sys.stdout):
+    """
+    parse con payload "trace": "stream": NDJSON, una línea {"type": "step", ...}
+    por paso a medida que ocurre (a lo sumo "step_window" pasos, por defecto
+    5000) y al final {"type": "result", ...}. Se hace flush cada "flush_every"
+    líneas para que el consumidor las reciba sin esperar al final.
+    """
+    grammar_text = _normalize_arrows(payload.get("grammar") or "")
+    compiled = compile_grammar(grammar_text, payload.get("precedence") or [], payload.get("mode") or "lr1",
+                               with_automaton=False)
+    from parser_driver import ParserDriver
+    tokens, contextual = _scan_tokens(payload, payload.get("input", ""), compiled.grammar, compiled.table)
+    window = payload.get("step_window", 5000)
+    flush_every = max(1, int(payload.get("flush_every") or 200))
+    pending = 0
+
+    def emit(step):
+        nonlocal pending
+        line = _step_json(step)
+        line["type"] = "step"
+        out.write(json.dumps(line, ensure_ascii=False) + "\n")
+        pending += 1
+        if pending >= flush_every:
+            out.flush()
+            pending = 0
+
+    res = ParserDriver(compiled.table).parse(
+        tokens, max_steps=_max_steps(payload, tokens),
+        trace="stream", on_step=emit, step_window=None if window is None else int(window),
+    )
+    if contextual is not None:
+        res.summary["contextual"] = contextual
+    final = {
+        "type": "result",
+        "success": res.accepted,
+        "error_pos": res.error_pos,
+        "summary": res.summary,
+        "truncated": res.summary["streamed"] < res.summary["steps"],
+    }
+    if res.accepted:
+        final["message"] = "Cadena aceptada"
+    else:
+        final["error"] = res.error_message or "Cadena rechazada"
+    out.write(json.dumps(final, ensure_ascii=False) + "\n")
+    out.flush()
+
+
+def cmd_batch(payload, out=sys.stdout):
+    """
+    payload {"grammar", "inputs": ruta a un archivo JSONL, "precedence"?, "mode"?, "workers"?}.
+    Escribe una línea JSON por entrada (en orden) y al final {"success": true, "stats": {...}}.
+    """
+    from batch_parse import BatchStats, batch_parse, read_inputs
+
+    path = payload.get("inputs")
+    if not path:
+        out.write(json.dumps({"success": False, "error": "Falta 'inputs' (ruta al archivo JSONL)"}) + "\n")
+        return
+    stats = BatchStats(0)
+    with open(path, encoding="utf-8") as f:
+        for r in batch_parse(
+            _normalize_arrows(payload.get("grammar") or ""),
+            read_inputs(f),
+            payload.get("precedence") or [],
+            payload.get("mode") or "lr1",
+            workers=payload.get("workers"),
+            stats=stats,
+        ):
+            out.write(json.dumps(r, ensure_ascii=False) + "\n")
+    out.write(json.dumps({"success": True, "stats": stats.to_dict()}) + "\n")
+    out.flush()
+
+
+def cmd_codegen(payload):
+    """payload {"grammar", "precedence"?, "mode"?, "compressed"?} -> módulo Python autónomo del parser."""
+    from parser_codegen import generate_parser_module
+
+    grammar_text = _normalize_arrows(payload.get("grammar") or "")
+    compiled = compile_grammar(grammar_text, payload.get("precedence") or [], payload.get("mode") or "lr1",
+                               with_automaton=False)
+    compressed = bool(payload.get("compressed"))
+    module = generate_parser_module(compiled.table, compiled.grammar, compressed=compressed,
+                                    grammar_text=grammar_text)
+    return {"success": True, "module": module, "bytes": len(module.encode("utf-8")), "compressed": compressed}
+
+
 def main():
     if len(sys.argv) < 3:
-        print(json.dumps({"success": False, "error": "Uso: lr1_adapter.py <build|parse> <json>"}))
+        print(json.dumps({"success": False, "error": "Uso: lr1_adapter.py <build|parse|batch|codegen> <json>"}))
         return
     cmd = sys.argv[1]
     try:
@@ -234,8 +417,14 @@ def main():
 
     if cmd == "build":
         print(json.dumps(cmd_build(payload)))
+    elif cmd == "parse" and payload.get("trace") == "stream":
+        cmd_parse_stream(payload)
     elif cmd == "parse":
         print(json.dumps(cmd_parse(payload)))
+    elif cmd == "batch":
+        cmd_batch(payload)
+    elif cmd == "codegen":
+        print(json.dumps(cmd_codegen(payload)))
     else:
         print(json.dumps({"success": False, "error": f"Comando desconocido: {cmd}"}))
 
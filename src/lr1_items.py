@@ -1,5 +1,5 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict, Set, Tuple, Iterable, List, FrozenSet, Optional
 
 from grammar_spec import Grammar, Production
@@ -43,29 +43,33 @@ class LR1Item:
     @staticmethod
     def closure(items: Iterable["LR1Item"], grammar: Grammar, first_sets: FirstSets) -> FrozenSet["LR1Item"]:
         result: Set[LR1Item] = set(items)
-        changed = True
-        prod_cache: Dict[str, List[Production]] = {A: list(grammar.productions_of(A)) for A in grammar.nonterminals}
-
-        while changed:
-            changed = False
-            for item in list(result):
-                X = item.next_symbol()
-                if X is None or not grammar.is_nonterminal(X):
-                    continue
-
-                gamma = item.beta[1:]
-                look_seq = list(gamma) + [item.lookahead]
-                lookaheads = first_sets.first_of_sequence(look_seq)
-
-                for p in prod_cache[X]:
-                    delta = p.right
-                    for b in lookaheads:
-                        if b == EPSILON:
-                            continue
-                        new_item = LR1Item(X, tuple(), tuple(delta), b)
-                        if new_item not in result:
-                            result.add(new_item)
-                            changed = True
+        worklist: List[LR1Item] = list(result)
+        prod_cache: Dict[str, List[Production]] = {}
+
+        # cada ítem entra una sola vez a la worklist
+        while worklist:
+            item = worklist.pop()
+            X = item.next_symbol()
+            if X is None or not grammar.is_nonterminal(X):
+                continue
+
+            gamma = item.beta[1:]
+            look_seq = list(gamma) + [item.lookahead]
+            lookaheads = first_sets.first_of_sequence(look_seq)
+
+            prods = prod_cache.get(X)
+            if prods is None:
+                prods = prod_cache[X] = list(grammar.productions_of(X))
+
+            for p in prods:
+                delta = p.right
+                for b in lookaheads:
+                    if b == EPSILON:
+                        continue
+                    new_item = LR1Item(X, tuple(), tuple(delta), b)
+                    if new_item not in result:
+                        result.add(new_item)
+                        worklist.append(new_item)
         return frozenset(result)
 def goto(items: Iterable[LR1Item], symbol: str, grammar: Grammar, first_sets: FirstSets) -> FrozenSet[LR1Item]:
     moved: List[LR1Item] = []
@@ -83,21 +87,35 @@ class LR1State:
     items: FrozenSet[LR1Item]
     def __str__(self) -> str:
         lines = [f"I{self.id}:"]
-        for it in sorted(self.items, key=item_sort_key):
+        for it in self.item_strings():
             lines.append(f"  {it}")
         return "\n".join(lines)
 
+    def item_strings(self) -> List[str]:
+        """Ítems como texto, en orden de item_sort_key."""
+        return [str(it) for it in sorted(self.items, key=item_sort_key)]
+
+    def reductions(self) -> Iterable[Tuple[str, Tuple[str, ...], str]]:
+        """(lhs, rhs, lookahead) de cada ítem completo, en orden determinista."""
+        for it in sorted(self.items, key=item_sort_key):
+            if it.is_complete():
+                yield it.left, it.alpha, it.lookahead
+
 @dataclass
 class LR1Automaton:
     states: List[LR1State]
     transitions: Dict[int, Dict[str, int]]
+    # estadísticas de construcción (p.ej. closures calculados / evitados)
+    stats: Dict[str, int] = field(default_factory=dict)
+    # modo de construcción: "lr1" (canónica), "lalr" o "minimal"
+    mode: str = "lr1"
     def to_dot(self, show_items: bool = False) -> str:
         def esc(s: str) -> str:
             return s.replace('"', r'\"')
         lines = ['digraph LR1 {', '  rankdir=LR;', '  node [shape=record];']
         for st in self.states:
             if show_items:
-                body = "\\l".join(esc(str(it)) for it in sorted(st.items, key=item_sort_key)) + "\\l"
+                body = "\\l".join(esc(it) for it in st.item_strings()) + "\\l"
                 lines.append(f'  S{st.id} [label="{{I{st.id}|{body}}}"];')
             else:
                 lines.append(f'  S{st.id} [label="I{st.id}"];')
@@ -119,48 +137,29 @@ class LR1Automaton:
 def build_canonical_collection(grammar: Grammar, first_sets: FirstSets) -> LR1Automaton:
     assert grammar.augmented_start is not None and grammar.start_symbol is not None
 
-    start_item = LR1Item(
-        left=grammar.augmented_start,
-        alpha=tuple(),
-        beta=(grammar.start_symbol,),
-        lookahead="$",
-    )
-    I0 = LR1Item.closure([start_item], grammar, first_sets)
-
-    states: List[LR1State] = []
-    transitions: Dict[int, Dict[str, int]] = {}
-    state_index: Dict[FrozenSet[LR1Item], int] = {}
-
-    def get_or_add_state(items: FrozenSet[LR1Item]) -> Tuple[int, bool]:
-        """Devuelve (id_estado, es_nuevo)."""
-        sid = state_index.get(items)
-        if sid is not None:
-            return sid, False
-        sid = len(states)
-        states.append(LR1State(sid, items))
-        state_index[items] = sid
-        return sid, True
-
-    s0, _ = get_or_add_state(I0)
-    worklist: List[FrozenSet[LR1Item]] = [I0]
-
-    symbols = sorted(grammar.all_symbols(), key=symbol_sort_key)
-
-    while worklist:
-        I = worklist.pop(0)
-        sid = state_index[I]
-
-        for X in symbols:
-            J = goto(I, X, grammar, first_sets)
-            if not J:
-                continue
-
-            tid, is_new = get_or_add_state(J)
-            transitions.setdefault(sid, {})[X] = tid
-            if is_new:
-                worklist.append(J)
-
-    return LR1Automaton(states, transitions)
+    # Los estados se construyen con ítems empaquetados (ver item_engine.py);
+    # el resultado es el mismo autómata, con los LR1Item decodificados bajo demanda.
+    from item_engine import ItemEngine
+    return ItemEngine(grammar, first_sets).build()
+
+
+CONSTRUCTION_MODES = ("lr1", "lalr", "minimal")
+
+
+def build_collection(grammar: Grammar, first_sets: FirstSets, mode: str = "lr1") -> LR1Automaton:
+    """
+    Construye el autómata según el modo: "lr1" (canónico), "lalr" (LALR(1) vía
+    DeRemer–Pennello) o "minimal" (LR(1) mínimo de Pager).
+    """
+    if mode == "lr1":
+        return build_canonical_collection(grammar, first_sets)
+    if mode == "lalr":
+        from lalr import build_lalr_collection
+        return build_lalr_collection(grammar, first_sets)
+    if mode == "minimal":
+        from minimal_lr1 import build_minimal_collection
+        return build_minimal_collection(grammar, first_sets)
+    raise ValueError(f"Modo de construcción desconocido: '{mode}' (usa uno de {', '.join(CONSTRUCTION_MODES)}).")
 
 
 def item_sort_key(it: LR1Item):
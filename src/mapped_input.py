@@ -0,0 +1,230 @@
+"""
+Entrada desde archivo con mmap, para archivos más grandes que la memoria.
+
+El archivo se mapea en sólo lectura y la regex de RegexScanner (compilada en
+bytes) recorre el buffer directamente, a través de un memoryview: no se lee
+el archivo a un str ni se copian bloques. Cada MappedToken guarda el símbolo y
+sus offsets; el lexema y la línea/columna se sacan del buffer recién cuando se
+piden (la columna contando los bytes que no son de continuación, sin
+decodificar), así que sólo se materializan para los tokens que el llamador
+conserva (p. ej. el del mensaje de error). parse_file() pasa los tokens a
+PushParser a medida que salen: la memoria depende de la pila del parser, no
+del archivo.
+
+Para texto ASCII (o UTF-8 sin letras ni dígitos no ASCII junto a los tokens)
+los tokens son los de Scanner sobre el texto decodificado, con las mismas
+líneas y columnas (las columnas cuentan caracteres, no bytes). En bytes, \\w y
+\\d son sólo ASCII: un dígito no ASCII sale como ERR y no cuenta para la regla
+de borde de los literales. Los bytes inválidos se decodifican con "replace"
+(en la columna, un byte de continuación suelto no cuenta).
+"""
+from __future__ import annotations
+import mmap
+import os
+import re
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from grammar_spec import Grammar
+from parse_table import LR1ParseTable
+from parser_driver import ParseResult, PushParser
+from scanner import Scanner, ScanToken, token_pattern
+
+
+# un carácter de error es una secuencia UTF-8 entera, no un byte suelto
+_UTF8_ERR = r"[\xc0-\xff][\x80-\xbf]*|[^ \t\r\n]"
+
+# tamaño de los bloques al contar saltos de línea y caracteres
+_COUNT_CHUNK = 1 << 20
+
+# bytes de continuación UTF-8 (10xxxxxx): no empiezan un carácter
+_UTF8_CONT = bytes(range(0x80, 0xC0))
+
+
+@lru_cache(maxsize=64)
+def _bytes_token_regex(literals: Tuple[str, ...]) -> "re.Pattern[bytes]":
+    return re.compile(token_pattern(list(literals), err=_UTF8_ERR).encode("utf-8"), re.S)
+
+
+class MappedSource:
+    """
+    Archivo mapeado en memoria (sólo lectura). `view` es un memoryview del
+    mapa; mientras haya vistas o búsquedas sobre él, close() falla con
+    BufferError en lugar de invalidar el buffer. Un archivo vacío no se mapea.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file = open(path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        self._map: Optional[mmap.mmap] = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        )
+        self.view = memoryview(self._map if self._map is not None else b"")
+        # último offset consultado con su línea, inicio de línea y columna, para avanzar desde ahí
+        self._line_at: Tuple[int, int, int, int] = (0, 1, 0, 1)
+
+    def text(self, start: int, end: int) -> str:
+        return str(self.view[start:end], "utf-8", "replace")
+
+    def position(self, offset: int) -> Tuple[int, int]:
+        """
+        (línea, columna) de un offset en bytes, como las de Scanner. Avanza desde
+        la consulta anterior (o desde el principio si el offset es menor), por
+        bloques: nunca decodifica ni copia más de un bloque de la línea.
+        """
+        if self._map is None:
+            return 1, 1
+        base, line, line_start, col = self._line_at
+        if offset < base:
+            base, line, line_start, col = 0, 1, 0, 1
+        buf = self._map
+        start = base
+        while base < offset:
+            end = min(base + _COUNT_CHUNK, offset)
+            nl = buf[base:end].count(b"\n")
+            if nl:
+                line += nl
+                line_start = buf.rfind(b"\n", base, end) + 1
+            base = end
+        if line_start > start:
+            col = self._chars(line_start, offset) + 1
+        else:
+            col += self._chars(start, offset)
+        self._line_at = (offset, line, line_start, col)
+        return line, col
+
+    def _chars(self, start: int, end: int) -> int:
+        """Caracteres en [start, end): los bytes que no son de continuación UTF-8."""
+        buf = self._map
+        n = 0
+        while start < end:
+            stop = min(start + _COUNT_CHUNK, end)
+            chunk = buf[start:stop]
+            n += len(chunk) if chunk.isascii() else len(chunk.translate(None, _UTF8_CONT))
+            start = stop
+        return n
+
+    def close(self) -> None:
+        self.view.release()
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "MappedSource":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class MappedToken:
+    """
+    Token sobre un MappedSource: sólo símbolo y offsets. `lexeme`, `line` y
+    `col` se leen del archivo al pedirlos (la posición se calcula una vez por
+    token); to_scan_token() da el ScanToken equivalente (independiente del
+    mapa) para guardarlo.
+    """
+
+    __slots__ = ("symbol", "start", "end", "source", "_pos")
+
+    def __init__(self, symbol: str, start: int, end: int, source: MappedSource) -> None:
+        self.symbol = symbol
+        self.start = start
+        self.end = end
+        self.source = source
+        self._pos: Optional[Tuple[int, int]] = None
+
+    def position(self) -> Tuple[int, int]:
+        if self._pos is None:
+            self._pos = self.source.position(self.start)
+        return self._pos
+
+    @property
+    def lexeme(self) -> str:
+        return self.source.text(self.start, self.end) if self.symbol != "$" else "$"
+
+    @property
+    def line(self) -> int:
+        return self.position()[0]
+
+    @property
+    def col(self) -> int:
+        return self.position()[1]
+
+    def to_scan_token(self) -> ScanToken:
+        line, col = self.position()
+        return ScanToken(self.symbol, self.lexeme, line, col)
+
+    def __repr__(self) -> str:
+        return f"<{self.symbol}@{self.start}:{self.end}>"
+
+
+class MappedScanner:
+    """
+    Scanner sobre un archivo mapeado: la regex de RegexScanner en bytes,
+    con finditer sobre el memoryview. iter_tokens() no guarda nada entre
+    tokens; tokenize_all() sí arma la lista (para archivos chicos).
+
+        with MappedScanner("entrada.txt", grammar) as sc:
+            res = parse_stream(table, sc.iter_tokens())
+    """
+
+    def __init__(self, path: str, grammar: Grammar) -> None:
+        ref = Scanner("", grammar)
+        self.literals = ref.literals
+        self._id_symbol = "id" if ref._has_id else "ERR"
+        self._num_symbol = "num" if ref._has_num else "ERR"
+        # lexema en bytes -> literal, para no decodificar los literales
+        self._literal_bytes: Dict[bytes, str] = {lit.encode("utf-8"): lit for lit in self.literals}
+        self._regex = _bytes_token_regex(tuple(self.literals))
+        self.source = MappedSource(path)
+
+    def tokenize_all(self) -> List[MappedToken]:
+        return list(self.iter_tokens())
+
+    def iter_tokens(self) -> Iterator[MappedToken]:
+        source = self.source
+        literals = self._literal_bytes
+        id_symbol = self._id_symbol
+        num_symbol = self._num_symbol
+        for m in self._regex.finditer(source.view):
+            kind = m.lastgroup
+            start, end = m.span(kind)
+            if kind == "lit":
+                sym = literals[m.group(kind)]
+            elif kind == "id":
+                sym = literals.get(m.group(kind), id_symbol)
+            elif kind == "num":
+                sym = num_symbol
+            else:
+                sym = "ERR"
+            yield MappedToken(sym, start, end, source)
+            if sym == "$":
+                return
+        yield MappedToken("$", source.size, source.size, source)
+
+    def close(self) -> None:
+        self.source.close()
+
+    def __enter__(self) -> "MappedScanner":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def parse_file(table: LR1ParseTable, grammar: Grammar, path: str,
+               max_steps: Optional[int] = None) -> ParseResult:
+    """
+    Reconoce el contenido de `path` sin cargarlo: MappedScanner + PushParser.
+    El resumen agrega el tamaño del archivo en bytes.
+    """
+    with MappedScanner(path, grammar) as scanner:
+        parser = PushParser(table, max_steps=max_steps)
+        for tok in scanner.iter_tokens():
+            if not parser.feed(tok):
+                break
+        res = parser.finish()
+        res.summary["bytes"] = scanner.source.size
+    return res
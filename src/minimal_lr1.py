@@ -0,0 +1,115 @@
+"""
+LR(1) mínimo (Pager, "weak compatibility").
+
+La colección se construye como la canónica, pero cada kernel nuevo se fusiona
+con un estado existente del mismo núcleo LR(0) cuando sus lookaheads son
+débilmente compatibles. La fusión ocurre durante la construcción: si un estado
+gana lookaheads se vuelve a procesar y el cambio se propaga a sus sucesores.
+La compatibilidad débil garantiza que no aparecen conflictos reduce/reduce que
+la colección canónica no tenga, así que la tabla acepta exactamente lo mismo.
+"""
+from __future__ import annotations
+from collections import deque
+from typing import Dict, FrozenSet, List
+
+from grammar_spec import Grammar
+from first_sets import FirstSets
+from lr1_items import LR1Automaton, LR1State
+from item_engine import ItemEngine, CoreLR1State
+
+
+def build_minimal_collection(grammar: Grammar, first_sets: FirstSets) -> LR1Automaton:
+    assert grammar.augmented_start is not None and grammar.start_symbol is not None
+
+    engine = ItemEngine(grammar, first_sets)
+    kernels: List[Dict[int, int]] = []
+    closures: List[Dict[int, int]] = []
+    trans: List[Dict[str, int]] = []
+    by_core: Dict[FrozenSet[int], List[int]] = {}
+    stats = {"merges": 0, "reprocessed": 0}
+
+    worklist: deque = deque()
+    queued: List[bool] = []
+
+    def enqueue(sid: int) -> None:
+        if not queued[sid]:
+            queued[sid] = True
+            worklist.append(sid)
+
+    def add_state(kernel: Dict[int, int]) -> int:
+        sid = len(kernels)
+        kernels.append(dict(kernel))
+        closures.append({})
+        trans.append({})
+        queued.append(False)
+        by_core.setdefault(frozenset(kernel), []).append(sid)
+        enqueue(sid)
+        return sid
+
+    def merge_into(sid: int, kernel: Dict[int, int]) -> None:
+        target = kernels[sid]
+        changed = False
+        for core, mask in kernel.items():
+            if mask & ~target[core]:
+                target[core] |= mask
+                changed = True
+        if changed:
+            enqueue(sid)
+
+    start_core = engine.core_of(engine.start_item())
+    add_state({start_core: 1 << engine.la_id["$"]})
+    processed = set()
+
+    while worklist:
+        sid = worklist.popleft()
+        queued[sid] = False
+        if sid in processed:
+            stats["reprocessed"] += 1
+        processed.add(sid)
+
+        closures[sid] = engine.closure_masks(kernels[sid])
+        for X, K in engine.successor_kernel_masks(closures[sid]).items():
+            tid = trans[sid].get(X)
+            if tid is not None:
+                # transición ya decidida: sólo se propagan lookaheads nuevos
+                merge_into(tid, K)
+                continue
+
+            for cand in by_core.get(frozenset(K), ()):
+                if kernels[cand] == K or _weakly_compatible(kernels[cand], K):
+                    if kernels[cand] != K:
+                        stats["merges"] += 1
+                    merge_into(cand, K)
+                    tid = cand
+                    break
+            else:
+                tid = add_state(K)
+            trans[sid][X] = tid
+
+    states: List[LR1State] = [CoreLR1State(sid, cl, engine) for sid, cl in enumerate(closures)]
+    transitions = {sid: edges for sid, edges in enumerate(trans) if edges}
+    stats["states"] = len(states)
+    return LR1Automaton(states, transitions, stats, mode="minimal")
+
+
+def _weakly_compatible(old: Dict[int, int], new: Dict[int, int]) -> bool:
+    """
+    Pager: para todo par de ítems i ≠ j del kernel,
+        (L_i ∩ L'_j = ∅ y L'_i ∩ L_j = ∅)  o  L_i ∩ L_j ≠ ∅  o  L'_i ∩ L'_j ≠ ∅
+    """
+    cores = list(old)
+    for a in range(len(cores)):
+        li, ni = old[cores[a]], new[cores[a]]
+        for b in range(a + 1, len(cores)):
+            lj, nj = old[cores[b]], new[cores[b]]
+            if (li & nj) == 0 and (ni & lj) == 0:
+                continue
+            if (li & lj) or (ni & nj):
+                continue
+            return False
+    return True
+
+
+def count_canonical_states(grammar: Grammar, first_sets: FirstSets) -> int:
+    """Cantidad de estados de la colección canónica (para comparar tamaños)."""
+    return len(ItemEngine(grammar, first_sets).build().states)
@@ -1,10 +1,11 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum, auto
 from typing import Dict, List, Optional, Tuple
 
 from grammar_spec import Grammar, Production
-from lr1_items import LR1Automaton
+from first_sets import FirstSets
+from lr1_items import LR1Automaton, build_collection
 
 # NUEVO: soporte de precedencia
 from precedence import PrecedenceConfig
@@ -61,10 +62,30 @@ class LR1ParseTable:
     conflicts: List[Conflict]
     terminals: List[str]
     nonterminals: List[str]
+    # "lr1", "lalr" o "minimal"; en LALR, conflictos r/r que no existían en la colección canónica
+    mode: str = "lr1"
+    merge_conflicts: List[Conflict] = field(default_factory=list)
+    automaton: Optional[LR1Automaton] = field(default=None, repr=False, compare=False)
+    # forma compilada (arrays de enteros) para el driver; se arma la primera vez que se pide
+    compiled_form: Optional["CompiledTable"] = field(default=None, repr=False, compare=False)
+    compressed_form: Optional["CompressedTable"] = field(default=None, repr=False, compare=False)
 
     def is_lr1(self) -> bool:
         return len(self.conflicts) == 0
 
+    def compiled(self) -> "CompiledTable":
+        if self.compiled_form is None:
+            from compiled_table import CompiledTable
+            self.compiled_form = CompiledTable(self)
+        return self.compiled_form
+
+    def compressed(self) -> "CompressedTable":
+        """Forma comprimida (reducciones por defecto + comb vector); ver compressed_table."""
+        if self.compressed_form is None:
+            from compressed_table import CompressedTable
+            self.compressed_form = CompressedTable(self.compiled())
+        return self.compressed_form
+
     def __str__(self) -> str:
         lines: List[str] = []
         term_hdr = "  ".join(self.terminals)
@@ -103,6 +124,23 @@ class LR1ParseTable:
 
         return "\n".join(lines)
 
+    @staticmethod
+    def from_grammar(
+        grammar: Grammar,
+        first_sets: Optional[FirstSets] = None,
+        precedence: Optional[PrecedenceConfig] = None,
+        mode: str = "lr1",
+    ) -> "LR1ParseTable":
+        """Construye autómata y tabla en el modo pedido ("lr1", "lalr" o "minimal"); el autómata queda en `table.automaton`."""
+        first = first_sets or FirstSets.compute_first_sets(grammar)
+        automaton = build_collection(grammar, first, mode)
+        table = LR1ParseTable.build_lr1_parse_table(grammar, automaton, precedence=precedence)
+        table.automaton = automaton
+        if mode == "lalr":
+            from lalr import find_merge_conflicts
+            table.merge_conflicts = find_merge_conflicts(grammar, first, table)
+        return table
+
     @staticmethod
     def build_lr1_parse_table(
         grammar: Grammar,
@@ -136,11 +174,7 @@ class LR1ParseTable:
 
         for state in automaton.states:
             sid = state.id
-            for it in state.items:
-                if not it.is_complete():
-                    continue
-                A = it.left
-                a = it.lookahead
+            for A, rhs, a in state.reductions():
                 if A == grammar.augmented_start and a == "$":
                     aug_prod = Production(grammar.augmented_start, (grammar.start_symbol,))
                     _set_action_with_conflict_check(
@@ -149,7 +183,7 @@ class LR1ParseTable:
                         precedence=precedence,  # <-- pasar precedencia
                     )
                     continue
-                p = prod_index.get((A, tuple(it.alpha))) or Production(A, tuple(it.alpha))
+                p = prod_index.get((A, rhs)) or Production(A, rhs)
                 _set_action_with_conflict_check(
                     action, conflicts, sid, a,
                     Action(ActionKind.REDUCE, production=p),
@@ -162,6 +196,7 @@ class LR1ParseTable:
             conflicts=conflicts,
             terminals=terminals,
             nonterminals=nonterminals,
+            mode=automaton.mode,
         )
 
 
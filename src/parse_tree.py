@@ -0,0 +1,286 @@
+"""
+Árbol de derivación con almacenamiento compacto.
+
+Cada nodo es un índice en arrays paralelos (no hay un objeto Python por nodo):
+
+    prod[n]                         producción (id de CompiledTable.productions); -1 = hoja/token
+    child_start[n], child_count[n]  rango de sus hijos dentro de `children`
+    span_start[n], span_end[n]      tokens que cubre: tokens[span_start:span_end]
+
+Las hojas son los tokens desplazados (span de uno). Los hijos de una reducción
+quedan contiguos en `children`, en orden de izquierda a derecha. `TreeNode` es
+una vista liviana (árbol, índice) que se crea sólo al recorrer.
+"""
+from __future__ import annotations
+import time
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from grammar_spec import Production
+from parse_table import LR1ParseTable
+from compiled_table import CompiledRun, ACCEPT
+from scanner import ScanToken
+
+
+class ParseTree:
+    def __init__(self, tokens: List[ScanToken], productions: List[Production]) -> None:
+        self.tokens = tokens
+        self.productions = productions
+        self.prod = array("i")
+        self.child_start = array("i")
+        self.child_count = array("i")
+        self.span_start = array("i")
+        self.span_end = array("i")
+        self.children = array("i")
+        self.root = -1
+
+    def __len__(self) -> int:
+        return len(self.prod)
+
+    def node(self, idx: int) -> "TreeNode":
+        return TreeNode(self, idx)
+
+    @property
+    def root_node(self) -> Optional["TreeNode"]:
+        return TreeNode(self, self.root) if self.root >= 0 else None
+
+    def symbol(self, idx: int) -> str:
+        p = self.prod[idx]
+        if p < 0:
+            return self.tokens[self.span_start[idx]].symbol
+        return self.productions[p].left
+
+    def child_ids(self, idx: int) -> array:
+        start = self.child_start[idx]
+        return self.children[start:start + self.child_count[idx]]
+
+    def add_leaf(self, i: int) -> int:
+        """Hoja del token i (un token desplazado); devuelve su índice."""
+        node = len(self.prod)
+        self.prod.append(-1)
+        self.child_start.append(0)
+        self.child_count.append(0)
+        self.span_start.append(i)
+        self.span_end.append(i + 1)
+        return node
+
+    def add_reduction(self, p: int, kids: List[int], i: int) -> int:
+        """Nodo de la producción p sobre `kids`; sin hijos cubre el span vacío en i."""
+        node = len(self.prod)
+        self.prod.append(p)
+        self.child_start.append(len(self.children))
+        self.child_count.append(len(kids))
+        if kids:
+            self.children.extend(kids)
+            self.span_start.append(self.span_start[kids[0]])
+            self.span_end.append(self.span_end[kids[-1]])
+        else:
+            self.span_start.append(i)
+            self.span_end.append(i)
+        return node
+
+    def nbytes(self) -> int:
+        """Bytes de los arrays del árbol (sin contar los tokens)."""
+        return sum(a.itemsize * len(a) for a in (
+            self.prod, self.child_start, self.child_count,
+            self.span_start, self.span_end, self.children,
+        ))
+
+    def to_json(self, idx: Optional[int] = None) -> Optional[Dict]:
+        """
+        Árbol como dicts anidados: {"symbol", "production", "children"} para nodos
+        internos y {"symbol", "lexeme", "line", "col"} para hojas. Iterativo, así que
+        no depende del límite de recursión.
+        """
+        if idx is None:
+            idx = self.root
+        if idx < 0:
+            return None
+        out: Dict = {}
+        stack: List[Tuple[int, Dict]] = [(idx, out)]
+        while stack:
+            n, d = stack.pop()
+            p = self.prod[n]
+            if p < 0:
+                tok = self.tokens[self.span_start[n]]
+                d.update(symbol=tok.symbol, lexeme=tok.lexeme, line=tok.line, col=tok.col)
+                continue
+            prod = self.productions[p]
+            kids = [{} for _ in range(self.child_count[n])]
+            d.update(
+                symbol=prod.left,
+                production=f"{prod.left} → {' '.join(prod.right) if prod.right else 'ε'}",
+                children=kids,
+            )
+            for c, kd in zip(self.child_ids(n), kids):
+                stack.append((c, kd))
+        return out
+
+
+class TreeNode:
+    """Vista de un nodo de ParseTree; se crea al acceder, no se guarda."""
+
+    __slots__ = ("tree", "idx")
+
+    def __init__(self, tree: ParseTree, idx: int) -> None:
+        self.tree = tree
+        self.idx = idx
+
+    @property
+    def is_leaf(self) -> bool:
+        return self.tree.prod[self.idx] < 0
+
+    @property
+    def symbol(self) -> str:
+        return self.tree.symbol(self.idx)
+
+    @property
+    def production(self) -> Optional[Production]:
+        p = self.tree.prod[self.idx]
+        return self.tree.productions[p] if p >= 0 else None
+
+    @property
+    def token(self) -> Optional[ScanToken]:
+        return self.tree.tokens[self.tree.span_start[self.idx]] if self.is_leaf else None
+
+    @property
+    def span(self) -> Tuple[int, int]:
+        return self.tree.span_start[self.idx], self.tree.span_end[self.idx]
+
+    def __len__(self) -> int:
+        return self.tree.child_count[self.idx]
+
+    def __getitem__(self, i: int) -> "TreeNode":
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return TreeNode(self.tree, self.tree.children[self.tree.child_start[self.idx] + i])
+
+    def __iter__(self) -> Iterator["TreeNode"]:
+        for c in self.tree.child_ids(self.idx):
+            yield TreeNode(self.tree, c)
+
+    @property
+    def children(self) -> List["TreeNode"]:
+        return list(self)
+
+    def text(self) -> str:
+        start, end = self.span
+        return " ".join(tok.lexeme for tok in self.tree.tokens[start:end])
+
+    def to_json(self) -> Optional[Dict]:
+        return self.tree.to_json(self.idx)
+
+    def __repr__(self) -> str:
+        return f"<{self.symbol} [{self.span[0]}:{self.span[1]}]>"
+
+
+def parse_to_tree(table: LR1ParseTable, tokens: List[ScanToken], max_steps: int = 10000,
+                  ids: Optional[array] = None) -> Tuple[CompiledRun, ParseTree]:
+    """
+    Mismo driver que CompiledTable.run, creando un nodo por token desplazado y
+    por reducción (lo mismo que add_leaf/add_reduction, con los arrays en
+    variables locales porque es el camino rápido). Si la entrada se acepta, `tree.root` es la raíz (el símbolo
+    inicial); si no, el árbol queda con los nodos armados hasta el error.
+    """
+    c = table.compiled()
+    if ids is None:
+        ids = c.encode_tokens(tokens)
+    tree = ParseTree(tokens, c.productions)
+    action = c.action
+    goto = c.goto
+    astride = c.action_stride
+    gstride = c.goto_stride
+    prod_lhs = c.prod_lhs
+    prod_len = c.prod_len
+    n = len(ids)
+    eof = c.eof_id
+
+    t_prod = tree.prod
+    t_cstart = tree.child_start
+    t_ccount = tree.child_count
+    t_sstart = tree.span_start
+    t_send = tree.span_end
+    t_children = tree.children
+
+    stack = [0]
+    nodes: List[int] = []
+    i = 0
+    a = ids[0] if n else eof
+    step = 0
+    reductions = 0
+    while step < max_steps:
+        step += 1
+        s = stack[-1]
+        code = action[s * astride + a]
+        if code > 0:
+            stack.append(code - 1)
+            nodes.append(len(t_prod))
+            t_prod.append(-1)
+            t_cstart.append(0)
+            t_ccount.append(0)
+            t_sstart.append(i)
+            t_send.append(i + 1)
+            i += 1
+            a = ids[i] if i < n else eof
+        elif code < ACCEPT:
+            reductions += 1
+            p = -code - 2
+            k = prod_len[p]
+            node = len(t_prod)
+            t_prod.append(p)
+            t_cstart.append(len(t_children))
+            t_ccount.append(k)
+            if k:
+                kids = nodes[-k:]
+                del nodes[-k:]
+                del stack[-k:]
+                t_children.extend(kids)
+                t_sstart.append(t_sstart[kids[0]])
+                t_send.append(t_send[kids[-1]])
+            else:
+                t_sstart.append(i)
+                t_send.append(i)
+            nodes.append(node)
+            t = stack[-1]
+            A = prod_lhs[p]
+            dst = goto[t * gstride + A] if A >= 0 else -1
+            if dst < 0:
+                return CompiledRun(False, step, i, t, c.productions[p].left, "goto", i, reductions), tree
+            stack.append(dst)
+        elif code == ACCEPT:
+            tree.root = nodes[-1] if nodes else -1
+            return CompiledRun(True, step, shifts=i, reductions=reductions), tree
+        else:
+            sym = c.terminals[a] if a < len(c.terminals) else None
+            return CompiledRun(False, step, i, s, sym, "syntax", i, reductions), tree
+    return CompiledRun(False, step, i, stack[-1], None, "max_steps", i, reductions), tree
+
+
+def measure_tree_overhead(table: LR1ParseTable, tokens: List[ScanToken], repeat: int = 5) -> Dict[str, float]:
+    """
+    Costo de armar el árbol frente al driver compilado sin traza, sobre los
+    mismos tokens (mejor de `repeat` corridas de cada uno).
+    """
+    c = table.compiled()
+    ids = c.encode_tokens(tokens)
+    max_steps = 10000 + 64 * len(tokens)
+
+    def best(fn) -> float:
+        times = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - t0)
+        return min(times)
+
+    plain = best(lambda: c.run(ids, max_steps=max_steps))
+    with_tree = best(lambda: parse_to_tree(table, tokens, max_steps=max_steps, ids=ids))
+    _, tree = parse_to_tree(table, tokens, max_steps=max_steps)
+    return {
+        "tokens": len(tokens),
+        "nodes": len(tree),
+        "tree_bytes": tree.nbytes(),
+        "plain_seconds": round(plain, 6),
+        "tree_seconds": round(with_tree, 6),
+        "overhead": round(with_tree / plain, 2) if plain else 0.0,
+    }
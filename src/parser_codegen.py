@@ -0,0 +1,247 @@
+"""
+Generación de un módulo Python autónomo a partir de una LR1ParseTable.
+
+El módulo generado no importa nada del proyecto: trae ACTION/GOTO como tuplas
+constantes (la codificación de compiled_table, densa o comprimida como en
+compressed_table), un scanner especializado para los terminales de la gramática
+y el driver LR. Importarlo no construye nada: las tuplas se cargan del .pyc.
+
+El scanner es el de RegexScanner (una sola regex, scanner.token_pattern) con
+los literales de la gramática fijos, así que da los mismos tokens, líneas y
+columnas que Scanner. Los mensajes de error son los de ParserDriver.recognize.
+"""
+from __future__ import annotations
+from typing import Iterable, List, Optional
+
+from grammar_spec import Grammar
+from parse_table import LR1ParseTable
+from scanner import Scanner, token_pattern
+
+
+def _wrap_ints(name: str, values: Iterable[int], per_line: int = 24) -> str:
+    vals = [str(v) for v in values]
+    if not vals:
+        return f"{name} = ()\n"
+    lines = [f"{name} = ("]
+    for i in range(0, len(vals), per_line):
+        lines.append("    " + ", ".join(vals[i:i + per_line]) + ",")
+    lines.append(")")
+    return "\n".join(lines) + "\n"
+
+
+def _wrap_strs(name: str, values: Iterable[str], per_line: int = 12) -> str:
+    vals = [repr(v) for v in values]
+    lines = [f"{name} = ("]
+    for i in range(0, len(vals), per_line):
+        lines.append("    " + ", ".join(vals[i:i + per_line]) + ",")
+    lines.append(")")
+    return "\n".join(lines) + "\n"
+
+
+_SCANNER = r'''
+_TOKEN = re.compile(@PATTERN@, re.S)
+_LITERALS = frozenset(LITERALS)
+_ID_SYMBOL = @ID_SYMBOL@
+_NUM_SYMBOL = @NUM_SYMBOL@
+
+
+def tokenize(text):
+    """Tokens (símbolo, lexema, línea, columna), terminando en '$'."""
+    out = []
+    append = out.append
+    literals = _LITERALS
+    last = 0
+    line = 1
+    line_start = 0
+    for m in _TOKEN.finditer(text):
+        kind = m.lastgroup
+        start = m.start(kind)
+        nl = text.count("\n", last, start)
+        if nl:
+            line += nl
+            line_start = text.rfind("\n", last, start) + 1
+        last = start
+        lex = m.group(kind)
+        if kind == "lit":
+            sym = lex
+        elif kind == "id":
+            sym = lex if lex in literals else _ID_SYMBOL
+        elif kind == "num":
+            sym = _NUM_SYMBOL
+        else:
+            sym = "ERR"
+        append((sym, lex, line, start - line_start + 1))
+        if sym == "$":
+            return out
+    end = len(text)
+    nl = text.count("\n", last, end)
+    if nl:
+        line += nl
+        line_start = text.rfind("\n", last, end) + 1
+    append(("$", "$", line, end - line_start + 1))
+    return out
+'''
+
+_DENSE_LOOKUP = {
+    "setup": """\
+    action = ACTION
+    goto = GOTO
+""",
+    "action": "code = action[s * ACTION_STRIDE + a]",
+    "goto": "dst = goto[t * GOTO_STRIDE + A] if A >= 0 else -1",
+}
+
+_COMPRESSED_LOOKUP = {
+    "setup": """\
+    ncheck = len(CHECK)
+    ngcheck = len(GOTO_CHECK)
+""",
+    "action": """\
+r = ROW_OF[s]
+        j = BASE[r] + a
+        code = VALUE[j] if 0 <= j < ncheck and CHECK[j] == r else DEFAULT_ACTION[s]""",
+    "goto": """\
+if A < 0:
+                dst = -1
+            else:
+                j = GOTO_BASE[A] + t
+                dst = GOTO_VALUE[j] if 0 <= j < ngcheck and GOTO_CHECK[j] == A else GOTO_DEFAULT[A]""",
+}
+
+_DRIVER = r'''
+_TERM_ID = {t: i for i, t in enumerate(TERMINALS)}
+
+
+class Result(tuple):
+    """(accepted, error, error_pos, error_state, error_symbol)."""
+    __slots__ = ()
+
+    def __new__(cls, accepted, error=None, error_pos=None, error_state=None, error_symbol=None):
+        return tuple.__new__(cls, (accepted, error, error_pos, error_state, error_symbol))
+
+    accepted = property(lambda self: self[0])
+    error = property(lambda self: self[1])
+    error_pos = property(lambda self: self[2])
+    error_state = property(lambda self: self[3])
+    error_symbol = property(lambda self: self[4])
+
+
+def parse_tokens(tokens, max_steps=None):
+    """Reconoce tokens (símbolo, lexema, línea, columna) como los de tokenize()."""
+    term_id = _TERM_ID
+    ids = [term_id.get(tok[0], UNKNOWN) for tok in tokens]
+    if max_steps is None:
+        max_steps = 10000 + 64 * len(ids)
+    prod_lhs = PROD_LHS
+    prod_len = PROD_LEN
+@SETUP@    n = len(ids)
+    eof = EOF
+
+    stack = [0]
+    i = 0
+    a = ids[0] if n else eof
+    step = 0
+    while step < max_steps:
+        step += 1
+        s = stack[-1]
+        @ACTION@
+        if code > 0:
+            stack.append(code - 1)
+            i += 1
+            a = ids[i] if i < n else eof
+        elif code < -1:
+            p = -code - 2
+            k = prod_len[p]
+            if k:
+                del stack[-k:]
+            t = stack[-1]
+            A = prod_lhs[p]
+            @GOTO@
+            if dst < 0:
+                left = PRODUCTIONS[p][0]
+                return Result(False, f"ERROR interno: GOTO(I{t}, {left}) indefinido.", i, t, left)
+            stack.append(dst)
+        elif code == -1:
+            return Result(True)
+        else:
+            tok = tokens[i] if i < len(tokens) else ("$", "$", -1, -1)
+            return Result(
+                False,
+                f"ERROR de sintaxis: en estado I{s}, con lookahead '{tok[0]}' "
+                f"(lexema='{tok[1]}' @ {tok[2]}:{tok[3]}).",
+                i, s, tok[0],
+            )
+    return Result(False, "Se superó el máximo de pasos (posible bucle).", i)
+
+
+def parse(text, max_steps=None):
+    """tokenize() + parse_tokens()."""
+    return parse_tokens(tokenize(text), max_steps)
+'''
+
+
+def generate_parser_module(table: LR1ParseTable, grammar: Grammar, compressed: bool = False,
+                           grammar_text: Optional[str] = None) -> str:
+    """
+    Código fuente del módulo. Con `compressed` las tablas van como en
+    CompressedTable (menos enteros; por las reducciones por defecto un error
+    puede informarse en otro estado, como en recognize(compressed=True)).
+    """
+    c = table.compiled()
+    scanner = Scanner("", grammar)
+
+    out: List[str] = []
+    out.append("# Parser LR generado por parser_codegen. No editar a mano.\n")
+    if grammar_text:
+        out.append("#\n")
+        for line in grammar_text.strip().splitlines():
+            out.append(f"#   {line}\n".rstrip() + "\n")
+    out.append("import re\n\n")
+
+    out.append(_wrap_strs("TERMINALS", c.terminals))
+    out.append(_wrap_strs("NONTERMINALS", c.nonterminals))
+    out.append("PRODUCTIONS = (\n")
+    for p in c.productions:
+        out.append(f"    ({p.left!r}, {tuple(p.right)!r}),\n")
+    out.append(")\n")
+    out.append(_wrap_strs("LITERALS", scanner.literals) if scanner.literals else "LITERALS = ()\n")
+    out.append(f"EOF = {c.eof_id}\nUNKNOWN = {c.unknown_id}\n")
+    out.append(f"ACTION_STRIDE = {c.action_stride}\nGOTO_STRIDE = {c.goto_stride}\n")
+    out.append(_wrap_ints("PROD_LHS", c.prod_lhs))
+    out.append(_wrap_ints("PROD_LEN", c.prod_len))
+    out.append("\n# ACTION: 0 error, s+1 shift, -1 accept, -(p+2) reduce por PRODUCTIONS[p]; GOTO: -1 vacío\n")
+
+    if compressed:
+        ct = table.compressed()
+        for name, values in (
+            ("DEFAULT_ACTION", ct.default_action), ("ROW_OF", ct.row_of),
+            ("BASE", ct.base), ("VALUE", ct.value), ("CHECK", ct.check),
+            ("GOTO_DEFAULT", ct.goto_default), ("GOTO_BASE", ct.goto_base),
+            ("GOTO_VALUE", ct.goto_value), ("GOTO_CHECK", ct.goto_check),
+        ):
+            out.append(_wrap_ints(name, values))
+        lookup = _COMPRESSED_LOOKUP
+    else:
+        out.append(_wrap_ints("ACTION", c.action))
+        out.append(_wrap_ints("GOTO", c.goto))
+        lookup = _DENSE_LOOKUP
+
+    out.append(
+        _SCANNER
+        .replace("@PATTERN@", repr(token_pattern(scanner.literals)))
+        .replace("@ID_SYMBOL@", repr("id" if scanner._has_id else "ERR"))
+        .replace("@NUM_SYMBOL@", repr("num" if scanner._has_num else "ERR"))
+    )
+    out.append(
+        _DRIVER
+        .replace("@SETUP@", lookup["setup"])
+        .replace("@ACTION@", lookup["action"])
+        .replace("@GOTO@", lookup["goto"])
+    )
+    return "".join(out)
+
+
+def save_parser_module(table: LR1ParseTable, grammar: Grammar, path: str, compressed: bool = False,
+                       grammar_text: Optional[str] = None) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(generate_parser_module(table, grammar, compressed=compressed, grammar_text=grammar_text))
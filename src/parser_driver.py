@@ -1,6 +1,7 @@
 from __future__ import annotations
+from array import array
 from dataclasses import dataclass
-from typing import List, Tuple, Optional, Dict
+from typing import Callable, Iterable, Iterator, List, Tuple, Optional, Dict
 
 from grammar_spec import Grammar, Production
 from first_sets import FirstSets
@@ -8,23 +9,194 @@ from lr1_items import build_canonical_collection
 from parse_table import LR1ParseTable, ActionKind, Action
 from scanner import Scanner, ScanToken
 
+# niveles de traza de ParserDriver.parse
+TRACE_LEVELS = ("none", "summary", "full", "stream")
+
 @dataclass
 class ParseStep:
     step: int
-    stack_states: List[int]          
-    stack_symbols: List[str]         
-    lookahead: str                   
+    stack_states: List[int]
+    stack_symbols: List[str]
+    lookahead: str
     action_str: str
     reduced_prod: Optional[str]
     input_window: str
 
+
+# tipo de paso en ParseTrace
+_SHIFT, _REDUCE, _ACCEPT, _ERROR = 0, 1, 2, 3
+
+
+def action_to_str(a: Action) -> str:
+    if a.kind == ActionKind.SHIFT:
+        return f"d{a.target}"
+    if a.kind == ActionKind.REDUCE:
+        rhs = " ".join(a.production.right) if a.production and a.production.right else "ε"
+        return f"r[{a.production.left}→{rhs}]"
+    if a.kind == ActionKind.ACCEPT and a.production is not None:
+        rhs = " ".join(a.production.right) if a.production.right else "ε"
+        return f"r[{a.production.left}→{rhs}]"
+    return "acc"
+
+
+class ParseTrace:
+    """
+    Traza completa guardada como deltas de la pila: por paso, cuántos elementos
+    se desapilan, qué (estado, símbolo) se apila, la acción y la posición en la
+    entrada. expand()/iter_steps() reconstruyen los ParseStep con la pila entera.
+    """
+
+    WINDOW = 7   # tokens que muestra input_window
+
+    def __init__(self, tokens: List[ScanToken]) -> None:
+        self.tokens = tokens
+        self.kinds = array("b")
+        self.pops = array("i")
+        self.push_states = array("i")      # -1: no se apila nada
+        self.push_symbols: List[Optional[str]] = []
+        self.actions: List[Optional[Action]] = []
+        self.positions = array("i")        # índice del lookahead al empezar el paso
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def record(self, kind: int, pos: int, act: Optional[Action] = None, pop: int = 0,
+               push_state: int = -1, push_symbol: Optional[str] = None) -> None:
+        self.kinds.append(kind)
+        self.pops.append(pop)
+        self.push_states.append(push_state)
+        self.push_symbols.append(push_symbol)
+        self.actions.append(act)
+        self.positions.append(pos)
+
+    def _lookahead(self, idx: int) -> str:
+        return self.tokens[idx].symbol if idx < len(self.tokens) else "$"
+
+    def _window(self, idx: int) -> str:
+        return " ".join(tok.lexeme for tok in self.tokens[idx:idx + self.WINDOW])
+
+    def _step(self, n: int, kind: int, pos: int, act: Optional[Action],
+              states: List[int], symbols: List[str]) -> ParseStep:
+        reduced = None
+        if kind == _SHIFT:
+            action_str = action_to_str(act)
+            window_pos = pos + 1
+        else:
+            window_pos = pos
+            if kind == _REDUCE:
+                action_str = action_to_str(act)
+                prod = act.production
+                reduced = f"{prod.left}→{' '.join(prod.right) if prod.right else 'ε'}"
+            elif kind == _ACCEPT:
+                action_str = "acc"
+            else:
+                action_str = "·"
+        return ParseStep(
+            step=n,
+            stack_states=list(states),
+            stack_symbols=list(symbols),
+            lookahead=self._lookahead(pos),
+            action_str=action_str,
+            reduced_prod=reduced,
+            input_window=self._window(window_pos),
+        )
+
+    def iter_steps(self) -> Iterator[ParseStep]:
+        states: List[int] = [0]
+        symbols: List[str] = []
+        for n in range(len(self.kinds)):
+            k = self.pops[n]
+            if k:
+                del states[-k:]
+                del symbols[-k:]
+            if self.push_states[n] >= 0:
+                states.append(self.push_states[n])
+                symbols.append(self.push_symbols[n])
+            yield self._step(n + 1, self.kinds[n], self.positions[n], self.actions[n], states, symbols)
+
+    def expand(self) -> List[ParseStep]:
+        """Pasos con la misma forma que guardaba parse() antes de las trazas por deltas."""
+        return list(self.iter_steps())
+
+
+class StreamingTrace(ParseTrace):
+    """
+    Traza que no se guarda: cada paso se entrega a `on_step` apenas ocurre, hasta
+    `window` pasos (None = todos); los siguientes sólo se cuentan. La memoria no
+    depende del largo de la traza.
+    """
+
+    def __init__(self, tokens: List[ScanToken], on_step: Callable[[ParseStep], None],
+                 window: Optional[int] = None) -> None:
+        super().__init__(tokens)
+        self.on_step = on_step
+        self.window = window
+        self.count = 0
+        self._states: List[int] = [0]
+        self._symbols: List[str] = []
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def streamed(self) -> int:
+        return self.count if self.window is None else min(self.count, self.window)
+
+    def record(self, kind: int, pos: int, act: Optional[Action] = None, pop: int = 0,
+               push_state: int = -1, push_symbol: Optional[str] = None) -> None:
+        self.count += 1
+        if self.window is not None and self.count > self.window:
+            return
+        if pop:
+            del self._states[-pop:]
+            del self._symbols[-pop:]
+        if push_state >= 0:
+            self._states.append(push_state)
+            self._symbols.append(push_symbol)
+        self.on_step(self._step(self.count, kind, pos, act, self._states, self._symbols))
+
+    def iter_steps(self) -> Iterator[ParseStep]:
+        return iter(())
+
+
+class _ExpandedSteps:
+    """
+    Campo `steps` de ParseResult: si no se pasó una lista, se expande de
+    `trace` la primera vez que se lee y queda guardada (expandir copia la pila
+    en cada paso, así que no se repite en cada acceso).
+    """
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return None     # valor por defecto del campo
+        steps = obj.__dict__.get("_steps")
+        if steps is None:
+            if obj.trace is None:
+                return []
+            steps = obj.__dict__["_steps"] = obj.trace.expand()
+        return steps
+
+    def __set__(self, obj, value: Optional[List[ParseStep]]) -> None:
+        obj.__dict__["_steps"] = value
+
+
 @dataclass
 class ParseResult:
     accepted: bool
-    steps: List[ParseStep]
+    # pasos expandidos (con traza "full"; si no, lista vacía), ver _ExpandedSteps
+    steps: Optional[List[ParseStep]] = _ExpandedSteps()
+    trace: Optional[ParseTrace] = None
     error_message: Optional[str] = None
     error_state: Optional[int] = None
     error_symbol: Optional[str] = None
+    # índice del token donde se detectó el error
+    error_pos: Optional[int] = None
+    # nivel "summary": pasos, desplazamientos, reducciones, tokens
+    summary: Optional[Dict[str, int]] = None
+    # árbol de derivación (sólo si se pidió y la entrada fue aceptada)
+    tree: Optional["ParseTree"] = None
+    # modo con recuperación: todos los errores encontrados (ver error_recovery)
+    errors: Optional[List["RecoveredError"]] = None
 
 class ParseError(Exception):
     pass
@@ -32,29 +204,56 @@ class ParseError(Exception):
 class ParserDriver:
     def __init__(self, table: LR1ParseTable) -> None:
         self.table = table
+        self._recovery = None
 
-    def parse(self, tokens: List[ScanToken], max_steps: int = 10000) -> ParseResult:
+    def parse(self, tokens: List[ScanToken], max_steps: int = 10000, trace: str = "full",
+              build_tree: bool = False, recover: bool = False, max_errors: int = 25,
+              max_attempts: int = 32, on_step: Optional[Callable[[ParseStep], None]] = None,
+              step_window: Optional[int] = None) -> ParseResult:
+        """
+        trace:
+          "none"    sólo aceptación/rechazo y posición del error (driver compilado);
+          "summary" además los conteos de pasos, desplazamientos y reducciones;
+          "full"    la traza paso a paso, guardada como deltas de pila (ver ParseTrace);
+          "stream"  cada paso se pasa a `on_step` al ocurrir, sin guardarlo, hasta
+                    `step_window` pasos (ver StreamingTrace); summary = {"steps", "streamed"}.
+        build_tree: arma el árbol de derivación en `result.tree` (compacto, ver parse_tree).
+        recover: no se detiene en el primer error (ver recover_all); sin traza ni árbol.
+        """
+        if trace not in TRACE_LEVELS:
+            raise ValueError(f"Nivel de traza desconocido: {trace!r} (usa {', '.join(TRACE_LEVELS)})")
+        if recover:
+            return self.recover_all(tokens, max_steps=max_steps, max_errors=max_errors,
+                                    max_attempts=max_attempts, with_summary=(trace != "none"))
+        if trace == "stream":
+            if on_step is None:
+                raise ValueError('trace="stream" requiere on_step')
+            log = StreamingTrace(tokens, on_step, step_window)
+            res = self._parse_traced(tokens, max_steps, log)
+            res.trace = None
+            res.summary = {"steps": len(log), "streamed": log.streamed}
+            return res
+        if trace != "full":
+            return self.recognize(tokens, max_steps=max_steps, with_summary=(trace == "summary"),
+                                  build_tree=build_tree)
+
+        # el árbol se arma en la misma pasada que la traza
+        tree = None
+        if build_tree:
+            from parse_tree import ParseTree
+            tree = ParseTree(tokens, self.table.compiled().productions)
+        return self._parse_traced(tokens, max_steps, tree=tree)
+
+    def _parse_traced(self, tokens: List[ScanToken], max_steps: int,
+                      log: Optional[ParseTrace] = None, tree: Optional["ParseTree"] = None) -> ParseResult:
         states: List[int] = [0]
         symbols: List[str] = []
         i = 0
-        steps: List[ParseStep] = []
-
-        def action_to_str(a: Action) -> str:
-            if a.kind == ActionKind.SHIFT:
-                return f"d{a.target}"
-            if a.kind == ActionKind.REDUCE:
-                rhs = " ".join(a.production.right) if a.production and a.production.right else "ε"
-                return f"r[{a.production.left}→{rhs}]"
-            if a.kind == ActionKind.ACCEPT and a.production is not None:
-                rhs = " ".join(a.production.right) if a.production.right else "ε"
-                return f"r[{a.production.left}→{rhs}]"
-            return "acc"
-
-        def make_input_window(idx: int) -> str:
-            frag = []
-            for j in range(idx, min(len(tokens), idx + 7)):
-                frag.append(tokens[j].lexeme)
-            return " ".join(frag)
+        if log is None:
+            log = ParseTrace(tokens)
+        if tree is not None:
+            compiled = self.table.compiled()
+            nodes: List[int] = []
 
         step = 0
         while True:
@@ -62,8 +261,9 @@ class ParserDriver:
             if step > max_steps:
                 return ParseResult(
                     accepted=False,
-                    steps=steps,
+                    trace=log,
                     error_message="Se superó el máximo de pasos (posible bucle).",
+                    error_pos=i,
                 )
 
             lookahead_tok = tokens[i] if i < len(tokens) else ScanToken("$", "$", -1, -1)
@@ -77,37 +277,24 @@ class ParserDriver:
                     f"ERROR de sintaxis: en estado I{s}, con lookahead '{a_sym}' "
                     f"(lexema='{lookahead_tok.lexeme}' @ {lookahead_tok.line}:{lookahead_tok.col})."
                 )
-                steps.append(ParseStep(
-                    step=step,
-                    stack_states=list(states),
-                    stack_symbols=list(symbols),
-                    lookahead=a_sym,
-                    action_str="·",
-                    reduced_prod=None,
-                    input_window=make_input_window(i),
-                ))
+                log.record(_ERROR, i)
                 return ParseResult(
                     accepted=False,
-                    steps=steps,
+                    trace=log,
                     error_message=err_msg,
                     error_state=s,
                     error_symbol=a_sym,
+                    error_pos=i,
                 )
 
             # ------ SHIFT ------
             if act.kind == ActionKind.SHIFT:
                 states.append(act.target)
                 symbols.append(a_sym)
+                log.record(_SHIFT, i, act, push_state=act.target, push_symbol=a_sym)
+                if tree is not None:
+                    nodes.append(tree.add_leaf(i))
                 i += 1
-                steps.append(ParseStep(
-                    step=step,
-                    stack_states=list(states),
-                    stack_symbols=list(symbols),
-                    lookahead=a_sym,
-                    action_str=action_to_str(act),
-                    reduced_prod=None,
-                    input_window=make_input_window(i),
-                ))
                 continue
 
             # ------ REDUCE ------
@@ -126,49 +313,354 @@ class ParserDriver:
                         f"ERROR interno: GOTO(I{t}, {A}) indefinido tras reducir "
                         f"{A}→{' '.join(prod.right) if prod.right else 'ε'}."
                     )
-                    steps.append(ParseStep(
-                        step=step,
-                        stack_states=list(states),
-                        stack_symbols=list(symbols),
-                        lookahead=a_sym,
-                        action_str=action_to_str(act),
-                        reduced_prod=f"{A}→{' '.join(prod.right) if prod.right else 'ε'}",
-                        input_window=make_input_window(i),
-                    ))
+                    log.record(_REDUCE, i, act, pop=k)
                     return ParseResult(
                         accepted=False,
-                        steps=steps,
+                        trace=log,
                         error_message=err_msg,
                         error_state=t,
                         error_symbol=A,
+                        error_pos=i,
                     )
 
                 # Apilar A y el estado goto
                 symbols.append(A)
                 states.append(goto_tA)
-                steps.append(ParseStep(
-                    step=step,
-                    stack_states=list(states),
-                    stack_symbols=list(symbols),
-                    lookahead=a_sym,
-                    action_str=action_to_str(act),
-                    reduced_prod=f"{A}→{' '.join(prod.right) if prod.right else 'ε'}",
-                    input_window=make_input_window(i),
-                ))
+                log.record(_REDUCE, i, act, pop=k, push_state=goto_tA, push_symbol=A)
+                if tree is not None:
+                    kids = nodes[len(nodes) - k:]
+                    del nodes[len(nodes) - k:]
+                    nodes.append(tree.add_reduction(-compiled.encode(act) - 2, kids, i))
                 continue
 
             # ACCEPT
             if act.kind == ActionKind.ACCEPT:
-                steps.append(ParseStep(
-                    step=step,
-                    stack_states=list(states),
-                    stack_symbols=list(symbols),
-                    lookahead=a_sym,
-                    action_str="acc",
-                    reduced_prod=None,
-                    input_window=make_input_window(i),
+                log.record(_ACCEPT, i, act)
+                if tree is not None:
+                    tree.root = nodes[-1] if nodes else -1
+                return ParseResult(accepted=True, trace=log, tree=tree)
+
+    def recognize(self, tokens: List[ScanToken], max_steps: int = 10000, compressed: bool = False,
+                  with_summary: bool = False, build_tree: bool = False) -> ParseResult:
+        """
+        Igual que parse() en aceptación y error, pero sin registrar pasos: corre
+        el driver sobre la tabla compilada (arrays de enteros). Con `compressed`
+        usa la tabla comprimida; acepta lo mismo, pero por las reducciones por
+        defecto el error puede informarse en otro estado. Con `build_tree` arma
+        además el árbol de derivación (ver parse_tree).
+        """
+        tree = None
+        if build_tree:
+            from parse_tree import parse_to_tree
+            run, tree = parse_to_tree(self.table, tokens, max_steps=max_steps)
+        else:
+            compiled = self.table.compressed() if compressed else self.table.compiled()
+            run = compiled.run(compiled.encode_tokens(tokens), max_steps=max_steps)
+        summary = None
+        if with_summary:
+            summary = {
+                "steps": run.steps,
+                "shifts": run.shifts,
+                "reductions": run.reductions,
+                "tokens": len(tokens),
+            }
+        if run.accepted:
+            return ParseResult(accepted=True, summary=summary, tree=tree)
+        if run.reason == "max_steps":
+            return ParseResult(
+                accepted=False,
+                error_message="Se superó el máximo de pasos (posible bucle).",
+                error_pos=run.error_pos,
+                summary=summary,
+            )
+        if run.reason == "goto":
+            return ParseResult(
+                accepted=False,
+                error_message=f"ERROR interno: GOTO(I{run.error_state}, {run.error_symbol}) indefinido.",
+                error_state=run.error_state,
+                error_symbol=run.error_symbol,
+                error_pos=run.error_pos,
+                summary=summary,
+            )
+        tok = tokens[run.error_pos] if run.error_pos < len(tokens) else ScanToken("$", "$", -1, -1)
+        return ParseResult(
+            accepted=False,
+            error_message=(
+                f"ERROR de sintaxis: en estado I{run.error_state}, con lookahead '{tok.symbol}' "
+                f"(lexema='{tok.lexeme}' @ {tok.line}:{tok.col})."
+            ),
+            error_state=run.error_state,
+            error_symbol=tok.symbol,
+            error_pos=run.error_pos,
+            summary=summary,
+        )
+
+    def recover_all(self, tokens: List[ScanToken], max_steps: int = 10000, max_errors: int = 25,
+                    max_attempts: int = 32, with_summary: bool = False) -> ParseResult:
+        """
+        Parse con recuperación en modo pánico: informa todos los errores de una
+        pasada (a lo sumo `max_errors`) en `result.errors`, probando hasta
+        `max_attempts` reparaciones por error. Los campos error_* describen el
+        primero, igual que recognize().
+        """
+        from error_recovery import RecoveryTable, parse_with_recovery
+        compiled = self.table.compiled()
+        if self._recovery is None:
+            self._recovery = RecoveryTable(compiled)
+        run = parse_with_recovery(compiled, tokens, max_errors=max_errors, max_attempts=max_attempts,
+                                  max_steps=max_steps, recovery=self._recovery)
+        summary = None
+        if with_summary:
+            summary = {
+                "steps": run.steps,
+                "shifts": run.shifts,
+                "reductions": run.reductions,
+                "tokens": len(tokens),
+                "errors": len(run.errors),
+                "completed": run.completed,
+                "truncated": run.truncated,
+            }
+        if run.accepted:
+            return ParseResult(accepted=True, summary=summary, errors=[])
+        if not run.errors:
+            return ParseResult(
+                accepted=False,
+                error_message="Se superó el máximo de pasos (posible bucle).",
+                summary=summary,
+                errors=[],
+            )
+        first = run.errors[0]
+        return ParseResult(
+            accepted=False,
+            error_message=first.message,
+            error_state=first.state,
+            error_symbol=first.symbol,
+            error_pos=first.pos,
+            summary=summary,
+            errors=run.errors,
+        )
+
+    def parse_fused(self, text: str, grammar: Grammar, max_steps: Optional[int] = None,
+                    with_summary: bool = False, tokens: Optional[List[ScanToken]] = None) -> ParseResult:
+        """
+        Scanner y parser en una pasada: cada token se pide recién cuando hace
+        falta, con los terminales válidos en el estado del tope de la pila
+        (CompiledTable.valid_terminals), así que el scanner sólo prueba esos
+        literales y una palabra clave que el estado no admite se lee como id
+        (ver ContextScanner). Aceptación y errores como en recognize();
+        summary agrega "contextual", las palabras clave leídas como id.
+
+        Si se pasa `tokens`, se le agregan los tokens leídos; tras un error
+        sigue el resto de la entrada con el scanner normal, así que la lista
+        sirve para repetir el parse con traza, árbol o recuperación.
+        """
+        from scanner import ContextScanner
+        c = self.table.compiled()
+        valid = c.valid_terminals()
+        scanner = ContextScanner(text, grammar)
+        if max_steps is None:
+            max_steps = 10000 + 64 * len(text)
+        term_id = c.term_id
+        unknown = c.unknown_id
+        action = c.action
+        astride = c.action_stride
+        goto = c.goto
+        gstride = c.goto_stride
+        prod_lhs = c.prod_lhs
+        prod_len = c.prod_len
+        keep = tokens.append if tokens is not None else None
+
+        stack = [0]
+        tok = scanner.next_token_in(valid[0])
+        if keep:
+            keep(tok)
+        a = term_id.get(tok.symbol, unknown)
+        i = 0
+        step = 0
+        reductions = 0
+        res = None
+        while step < max_steps:
+            step += 1
+            s = stack[-1]
+            code = action[s * astride + a]
+            if code > 0:
+                stack.append(code - 1)
+                i += 1
+                tok = scanner.next_token_in(valid[code - 1])
+                if keep:
+                    keep(tok)
+                a = term_id.get(tok.symbol, unknown)
+            elif code < -1:
+                reductions += 1
+                p = -code - 2
+                k = prod_len[p]
+                if k:
+                    del stack[-k:]
+                t = stack[-1]
+                A = prod_lhs[p]
+                dst = goto[t * gstride + A] if A >= 0 else -1
+                if dst < 0:
+                    res = ParseResult(
+                        accepted=False,
+                        error_message=f"ERROR interno: GOTO(I{t}, {c.productions[p].left}) indefinido.",
+                        error_state=t,
+                        error_symbol=c.productions[p].left,
+                        error_pos=i,
+                    )
+                    break
+                stack.append(dst)
+            elif code == -1:
+                res = ParseResult(accepted=True)
+                break
+            else:
+                res = ParseResult(
+                    accepted=False,
+                    error_message=(
+                        f"ERROR de sintaxis: en estado I{s}, con lookahead '{tok.symbol}' "
+                        f"(lexema='{tok.lexeme}' @ {tok.line}:{tok.col})."
+                    ),
+                    error_state=s,
+                    error_symbol=tok.symbol,
+                    error_pos=i,
+                )
+                break
+        else:
+            res = ParseResult(
+                accepted=False,
+                error_message="Se superó el máximo de pasos (posible bucle).",
+                error_pos=i,
+            )
+        if keep and tok.symbol != "$":
+            tokens.extend(scanner.iter_tokens())
+        if with_summary:
+            res.summary = {
+                "steps": step,
+                "shifts": i,
+                "reductions": reductions,
+                "tokens": i + 1,
+                "contextual": scanner.contextual,
+            }
+        return res
+
+class PushParser:
+    """
+    Parser incremental: recibe los tokens de a uno con feed() y cierra con
+    finish(). Corre sobre la tabla compilada y sólo guarda la pila de estados y
+    el último token, así que la memoria depende de la profundidad de la pila y
+    no del largo de la entrada.
+
+        p = PushParser(table)
+        for tok in scan_chunks(bloques, grammar):
+            if not p.feed(tok):
+                break
+        res = p.finish()
+    """
+
+    def __init__(self, table: LR1ParseTable, max_steps: Optional[int] = None) -> None:
+        self.compiled = table.compiled()
+        self.max_steps = max_steps
+        self.stack: List[int] = [0]
+        self.pos = 0                  # tokens consumidos
+        self.steps = 0
+        self.shifts = 0
+        self.reductions = 0
+        self.max_depth = 1
+        self.result: Optional[ParseResult] = None
+
+    def feed(self, tok: ScanToken) -> bool:
+        """Procesa un token; False si la entrada ya fue aceptada o rechazada."""
+        if self.result is not None:
+            return False
+        c = self.compiled
+        a = c.term_id.get(tok.symbol, c.unknown_id)
+        action = c.action
+        astride = c.action_stride
+        goto = c.goto
+        gstride = c.goto_stride
+        stack = self.stack
+        while True:
+            if self.max_steps is not None and self.steps >= self.max_steps:
+                self._fail(ParseResult(
+                    accepted=False,
+                    error_message="Se superó el máximo de pasos (posible bucle).",
+                    error_pos=self.pos,
                 ))
-                return ParseResult(accepted=True, steps=steps)
+                return False
+            self.steps += 1
+            s = stack[-1]
+            code = action[s * astride + a]
+            if code > 0:
+                stack.append(code - 1)
+                if len(stack) > self.max_depth:
+                    self.max_depth = len(stack)
+                self.pos += 1
+                self.shifts += 1
+                return True
+            if code < -1:
+                p = -code - 2
+                k = c.prod_len[p]
+                if k:
+                    del stack[-k:]
+                t = stack[-1]
+                A = c.prod_lhs[p]
+                dst = goto[t * gstride + A] if A >= 0 else -1
+                self.reductions += 1
+                if dst < 0:
+                    self._fail(ParseResult(
+                        accepted=False,
+                        error_message=f"ERROR interno: GOTO(I{t}, {c.productions[p].left}) indefinido.",
+                        error_state=t,
+                        error_symbol=c.productions[p].left,
+                        error_pos=self.pos,
+                    ))
+                    return False
+                stack.append(dst)
+                if len(stack) > self.max_depth:
+                    self.max_depth = len(stack)
+                continue
+            if code == -1:
+                self.result = ParseResult(accepted=True, summary=self.summary())
+                return False
+            self._fail(ParseResult(
+                accepted=False,
+                error_message=(
+                    f"ERROR de sintaxis: en estado I{s}, con lookahead '{tok.symbol}' "
+                    f"(lexema='{tok.lexeme}' @ {tok.line}:{tok.col})."
+                ),
+                error_state=s,
+                error_symbol=tok.symbol,
+                error_pos=self.pos,
+            ))
+            return False
+
+    def finish(self) -> ParseResult:
+        """Fin de la entrada: alimenta '$' si hace falta y devuelve el resultado."""
+        if self.result is None:
+            self.feed(ScanToken("$", "$", -1, -1))
+        return self.result
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "steps": self.steps,
+            "shifts": self.shifts,
+            "reductions": self.reductions,
+            "tokens": self.pos,
+            "max_stack_depth": self.max_depth,
+        }
+
+    def _fail(self, res: ParseResult) -> None:
+        res.summary = self.summary()
+        self.result = res
+
+
+def parse_stream(table: LR1ParseTable, tokens: Iterable[ScanToken]) -> ParseResult:
+    """Valida una secuencia de tokens (p. ej. Scanner.iter_tokens o scan_chunks) sin materializarla."""
+    parser = PushParser(table)
+    for tok in tokens:
+        if not parser.feed(tok):
+            break
+    return parser.finish()
+
 
 def compile_and_parse(grammar_text: str, input_text: str) -> Tuple[LR1ParseTable, ParseResult]:
     grammar = Grammar.from_text(grammar_text)
@@ -182,4 +674,4 @@ def compile_and_parse(grammar_text: str, input_text: str) -> Tuple[LR1ParseTable
     driver = ParserDriver(table)
     result = driver.parse(tokens)
 
-    return table, result    
\ No newline at end of file
+    return table, result
@@ -50,7 +50,9 @@ def main():
     num_states = len(aut.states)
     num_edges = sum(len(v) for v in aut.transitions.values())
     print("  Estados:", num_states)
-    print("  Transiciones:", num_edges, "\n")
+    print("  Transiciones:", num_edges)
+    print("  Closures calculados:", aut.stats.get("closures"),
+          "| evitados (kernel repetido):", aut.stats.get("closures_skipped"), "\n")
 
     print("[3.b] Renderizando imágenes del autómata...")
 
@@ -91,12 +93,13 @@ def main():
     if not result.accepted:
         print("  ERROR:", result.error_message)
     print("\n-- STEPS --")
-    for st in result.steps[:50]:
+    steps = result.steps
+    for st in steps[:50]:
         print(f"{st.step:02d} | states={st.stack_states} symbols={st.stack_symbols} "
               f"lookahead={st.lookahead} act={st.action_str} "
               f"reduced={st.reduced_prod} input='{st.input_window}'")
-    if len(result.steps) > 50:
-        print(f"... ({len(result.steps)-50} pasos más)")
+    if len(steps) > 50:
+        print(f"... ({len(steps)-50} pasos más)")
 
 
 if __name__ == "__main__":
@@ -1,7 +1,11 @@
 from __future__ import annotations
+from array import array
+from bisect import bisect_left
 from dataclasses import dataclass
-from typing import Iterable, List, Optional, Set, Tuple
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
 import re
+import time
 
 from grammar_spec import Grammar
 
@@ -14,6 +18,59 @@ class ScanToken:
     def __repr__(self) -> str:
         return f"<{self.symbol}:{self.lexeme}@{self.line}:{self.col}>"
 
+class LiteralTrie:
+    """
+    Trie de los literales de una gramática. match() recorre la entrada una sola
+    vez desde i, anotando cada literal que termina en el camino, y devuelve el
+    más largo que cumple la regla de borde de palabra: el mismo resultado que
+    probar los literales de mayor a menor largo con startswith.
+    """
+
+    def __init__(self, literals: Iterable[str]) -> None:
+        # nodo: dict carácter -> nodo; la clave None guarda el literal que termina ahí
+        self.root: Dict = {}
+        for lit in literals:
+            if not lit:
+                continue
+            node = self.root
+            for ch in lit:
+                node = node.setdefault(ch, {})
+            node[None] = lit
+
+    def match(self, s: str, i: int, n: int) -> Optional[str]:
+        node = self.root.get(s[i]) if i < n else None
+        if node is None:
+            return None
+        # todos los candidatos empiezan con s[i]: la regla del carácter previo es común
+        word = s[i].isalnum()
+        if word and i > 0 and (s[i-1].isalnum() or s[i-1] == "_"):
+            return None
+        found: List[str] = []
+        j = i + 1
+        while True:
+            lit = node.get(None)
+            if lit is not None:
+                found.append(lit)
+            if j >= n:
+                break
+            node = node.get(s[j])
+            if node is None:
+                break
+            j += 1
+        for lit in reversed(found):
+            end = i + len(lit)
+            if word and end < n and (s[end].isalnum() or s[end] == "_"):
+                continue
+            return lit
+        return None
+
+
+@lru_cache(maxsize=64)
+def _literal_trie(literals: Tuple[str, ...]) -> LiteralTrie:
+    """Un trie por conjunto de literales (se reutiliza entre Scanners de la misma gramática)."""
+    return LiteralTrie(literals)
+
+
 class Scanner:
     _re_ident = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
     _re_number = re.compile(r"\d+(?:\.\d+)?")
@@ -33,15 +90,28 @@ class Scanner:
             [t for t in declared_terminals if t not in ("id", "num")],
             key=lambda s: (-len(s), s)
         )
+        self._literal_set = frozenset(self.literals)
+        self._trie = _literal_trie(tuple(self.literals))
 
     def tokenize_all(self) -> List[ScanToken]:
-        out: List[ScanToken] = []
+        return list(self.iter_tokens())
+
+    def iter_tokens(self) -> Iterator[ScanToken]:
+        """Tokens uno a uno (generador sobre next_token), terminando en '$'."""
         while True:
             tok = self.next_token()
-            out.append(tok)
+            yield tok
             if tok.symbol == "$":
-                break
-        return out
+                return
+
+    def reset(self, text: str, start: int = 0) -> None:
+        """
+        Sigue escaneando sobre `text` desde `start`, conservando línea y columna
+        actuales (lo anterior a `start` sólo cuenta para la regla de borde de palabra).
+        """
+        self.text = text
+        self.n = len(text)
+        self.i = start
 
     def next_token(self) -> ScanToken:
         self._skip_space()
@@ -61,7 +131,7 @@ class Scanner:
             start_col = self.col
             self._advance(len(lex))
 
-            if lex in self.literals:
+            if lex in self._literal_set:
                 return ScanToken(lex, lex, self.line, start_col)
 
             if self._has_id:
@@ -112,22 +182,330 @@ class Scanner:
     def _match_any_literal(self) -> Optional[str]:
         if not self.literals:
             return None
-        s = self.text
-        i = self.i
-        n = self.n
+        return self._trie.match(self.text, self.i, self.n)
 
-        for lit in self.literals:
-            L = len(lit)
-            if L == 0 or i + L > n:
-                continue
-            if not s.startswith(lit, i):
-                continue
-            if lit[0].isalnum():
-                if i > 0 and (s[i-1].isalnum() or s[i-1] == "_"):
-                    continue
-                if i + L < n and (s[i+L].isalnum() or s[i+L] == "_"):
-                    continue
 
-            return lit
+class ContextScanner(Scanner):
+    """
+    Scanner guiado por el parser: next_token_in(valid) sólo prueba los
+    literales que pueden chocar con los terminales de `valid`, los que admite
+    el estado LR actual (ver CompiledTable.valid_terminals y
+    ParserDriver.parse_fused): los que empiezan con un carácter con el que
+    empieza algún terminal válido. Entre ellos vale la prioridad de
+    next_token (literal más largo, id, num), así que el token es el mismo que
+    daría Scanner salvo en un caso: una palabra clave que el estado no admite
+    se lee como id si el estado admite id. Un literal más largo que no vale
+    no se parte en uno más corto que sí (p. ej. '*=' no se lee como '*'):
+    se devuelve el token de next_token, con el que el parser informa el
+    error como siempre.
+    """
 
-        return None
+    def __init__(self, text: str, grammar: Grammar) -> None:
+        super().__init__(text, grammar)
+        # conjunto de terminales -> trie de los literales candidatos (None si no hay)
+        self._tries: Dict[FrozenSet[str], Optional[LiteralTrie]] = {}
+        # palabras clave que se leyeron como id por el contexto
+        self.contextual = 0
+
+    def _candidates(self, valid: FrozenSet[str]) -> Optional[LiteralTrie]:
+        """
+        Trie de los literales cuyo primer carácter puede empezar un terminal de
+        `valid`: en esas posiciones el literal más largo es el mismo que con
+        todos los literales (LiteralTrie.match sólo mira los que empiezan con
+        el carácter actual).
+        """
+        firsts = {lit[0] for lit in self.literals if lit in valid}
+        lits = tuple(lit for lit in self.literals if lit[0] in firsts
+                     or ("id" in valid and self._re_ident.match(lit[0]))
+                     or ("num" in valid and self._re_number.match(lit[0])))
+        return _literal_trie(lits) if lits else None
+
+    def next_token_in(self, valid: FrozenSet[str]) -> ScanToken:
+        self._skip_space()
+        if self.i >= self.n:
+            return ScanToken("$", "$", self.line, self.col)
+
+        if valid in self._tries:
+            trie = self._tries[valid]
+        else:
+            trie = self._tries[valid] = self._candidates(valid)
+        if trie is not None:
+            lit = trie.match(self.text, self.i, self.n)
+            if lit is not None:
+                if lit in valid:
+                    start_col = self.col
+                    lex = self._advance(len(lit))
+                    return ScanToken(lit, lex, self.line, start_col)
+                if "id" in valid and self._re_ident.fullmatch(lit):
+                    self.contextual += 1
+                    start_col = self.col
+                    lex = self._advance(len(lit))
+                    return ScanToken("id", lex, self.line, start_col)
+                return self.next_token()
+
+        if "id" in valid:
+            m = self._re_ident.match(self.text, self.i)
+            if m:
+                lex = m.group(0)
+                if lex in self._literal_set:
+                    if lex in valid:
+                        return self.next_token()
+                    self.contextual += 1
+                start_col = self.col
+                self._advance(len(lex))
+                return ScanToken("id", lex, self.line, start_col)
+
+        if "num" in valid:
+            m = self._re_number.match(self.text, self.i)
+            if m:
+                start_col = self.col
+                lex = self._advance(len(m.group(0)))
+                return ScanToken("num", lex, self.line, start_col)
+
+        return self.next_token()
+
+
+def _trie_regex(node: Dict, word: bool) -> str:
+    """
+    Regex de un subárbol de LiteralTrie: primero los hijos (literales más
+    largos) y después terminar acá, así que la primera alternativa que
+    encaja es el literal más largo, como en LiteralTrie.match.
+    """
+    branches = [re.escape(ch) + _trie_regex(child, word) for ch, child in sorted(
+        (k, v) for k, v in node.items() if k is not None)]
+    if None not in node:
+        return branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+    if word:
+        # borde de palabra al final: isalnum() o '_' es exactamente \w
+        return "(?:" + "|".join(branches + [r"(?!\w)"]) + ")"
+    return f"(?:{'|'.join(branches)})?" if branches else ""
+
+
+def token_pattern(literals: List[str], err: str = r"[^ \t\r\n]") -> str:
+    """
+    Regex de un token precedido de espacios, con un grupo por clase en el orden
+    de prioridad de Scanner.next_token: literales, id, num y un carácter de
+    error (`err`). Los literales van como un trie (_trie_regex), con la regla de
+    borde para los que empiezan con letra o dígito. id/num van siempre: sin esos
+    terminales su lexema sale como ERR.
+    """
+    root = LiteralTrie(literals).root
+    alts = []
+    for ch, child in sorted((k, v) for k, v in root.items() if k is not None):
+        word = ch.isalnum()
+        alts.append((r"(?<!\w)" if word else "") + re.escape(ch) + _trie_regex(child, word))
+    groups = []
+    if alts:
+        groups.append(f"(?P<lit>{'|'.join(alts)})")
+    groups.append(f"(?P<id>{Scanner._re_ident.pattern})")
+    groups.append(f"(?P<num>{Scanner._re_number.pattern})")
+    groups.append(f"(?P<err>{err})")
+    return r"[ \t\r\n]*(?:" + "|".join(groups) + ")"
+
+
+@lru_cache(maxsize=64)
+def _token_regex(literals: Tuple[str, ...]) -> "re.Pattern[str]":
+    return re.compile(token_pattern(list(literals)), re.S)
+
+
+class LineIndex:
+    """
+    Offsets de los saltos de línea de un texto, calculados una vez (al primer
+    pedido). position() da (línea, columna) de un offset por búsqueda binaria,
+    con la misma numeración que Scanner (desde 1; cada carácter es una columna).
+    """
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self._newlines: Optional[array] = None
+
+    @property
+    def newlines(self) -> array:
+        if self._newlines is None:
+            self._newlines = array("q", (m.start() for m in re.finditer("\n", self.text)))
+        return self._newlines
+
+    def position(self, offset: int) -> Tuple[int, int]:
+        nl = self.newlines
+        k = bisect_left(nl, offset)      # saltos de línea antes de offset
+        line_start = nl[k - 1] + 1 if k else 0
+        return k + 1, offset - line_start + 1
+
+
+class LazyToken:
+    """
+    Token que sólo guarda su offset en el texto; `line` y `col` se calculan con
+    el LineIndex compartido recién cuando se piden (p. ej. en un mensaje de error).
+    """
+
+    __slots__ = ("symbol", "lexeme", "start", "index")
+
+    def __init__(self, symbol: str, lexeme: str, start: int, index: LineIndex) -> None:
+        self.symbol = symbol
+        self.lexeme = lexeme
+        self.start = start
+        self.index = index
+
+    @property
+    def line(self) -> int:
+        return self.index.position(self.start)[0]
+
+    @property
+    def col(self) -> int:
+        return self.index.position(self.start)[1]
+
+    def to_scan_token(self) -> ScanToken:
+        line, col = self.index.position(self.start)
+        return ScanToken(self.symbol, self.lexeme, line, col)
+
+    def __repr__(self) -> str:
+        return f"<{self.symbol}:{self.lexeme}@{self.start}>"
+
+
+class RegexScanner:
+    """
+    Scanner de una sola pasada: todas las clases de token de la gramática van en
+    una regex con grupos con nombre (token_pattern) y se recorre con finditer.
+    Da los mismos tokens, líneas y columnas que Scanner, que queda como
+    referencia; la regex se compila una vez por gramática.
+
+    Con `lazy_positions` no se cuentan líneas al escanear: los tokens son
+    LazyToken (offset + LineIndex) y línea/columna se calculan sólo si se piden.
+    """
+
+    def __init__(self, text: str, grammar: Grammar, lazy_positions: bool = False) -> None:
+        self.text = text
+        self.lazy_positions = lazy_positions
+        self.line_index = LineIndex(text)
+        ref = Scanner("", grammar)
+        self.literals = ref.literals
+        self._literal_set = ref._literal_set
+        self._id_symbol = "id" if ref._has_id else "ERR"
+        self._num_symbol = "num" if ref._has_num else "ERR"
+        self._regex = _token_regex(tuple(self.literals))
+
+    def tokenize_all(self) -> List[ScanToken]:
+        return list(self.iter_tokens())
+
+    def iter_tokens(self) -> Iterator[ScanToken]:
+        if self.lazy_positions:
+            yield from self._iter_lazy()
+            return
+        text = self.text
+        literals = self._literal_set
+        id_symbol = self._id_symbol
+        num_symbol = self._num_symbol
+        last = 0
+        line = 1
+        line_start = 0
+        for m in self._regex.finditer(text):
+            kind = m.lastgroup
+            start = m.start(kind)
+            # saltos de línea desde el token anterior (incluido, por si contiene alguno)
+            nl = text.count("\n", last, start)
+            if nl:
+                line += nl
+                line_start = text.rfind("\n", last, start) + 1
+            last = start
+            lex = m.group(kind)
+            if kind == "lit":
+                sym = lex
+            elif kind == "id":
+                sym = lex if lex in literals else id_symbol
+            elif kind == "num":
+                sym = num_symbol
+            else:
+                sym = "ERR"
+            yield ScanToken(sym, lex, line, start - line_start + 1)
+            if sym == "$":
+                return
+        end = len(text)
+        nl = text.count("\n", last, end)
+        if nl:
+            line += nl
+            line_start = text.rfind("\n", last, end) + 1
+        yield ScanToken("$", "$", line, end - line_start + 1)
+
+    def _iter_lazy(self) -> Iterator[LazyToken]:
+        index = self.line_index
+        literals = self._literal_set
+        id_symbol = self._id_symbol
+        num_symbol = self._num_symbol
+        for m in self._regex.finditer(self.text):
+            kind = m.lastgroup
+            lex = m.group(kind)
+            if kind == "lit":
+                sym = lex
+            elif kind == "id":
+                sym = lex if lex in literals else id_symbol
+            elif kind == "num":
+                sym = num_symbol
+            else:
+                sym = "ERR"
+            yield LazyToken(sym, lex, m.end() - len(lex), index)
+            if sym == "$":
+                return
+        yield LazyToken("$", "$", len(self.text), index)
+
+
+def compare_scanners(text: str, grammar: Grammar, repeat: int = 3) -> Dict[str, float]:
+    """
+    Throughput de Scanner frente a RegexScanner sobre `text` (mejor de `repeat`
+    corridas de cada uno) y si los tokens coinciden.
+    """
+    def best(make) -> Tuple[float, List[ScanToken]]:
+        times = []
+        toks: List[ScanToken] = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            toks = make(text, grammar).tokenize_all()
+            times.append(time.perf_counter() - t0)
+        return min(times), toks
+
+    ref_secs, ref_toks = best(Scanner)
+    rx_secs, rx_toks = best(RegexScanner)
+    return {
+        "tokens": len(ref_toks),
+        "chars": len(text),
+        "identical": ref_toks == rx_toks,
+        "scanner_seconds": round(ref_secs, 6),
+        "regex_seconds": round(rx_secs, 6),
+        "scanner_tokens_per_sec": round(len(ref_toks) / ref_secs, 1) if ref_secs else 0.0,
+        "regex_tokens_per_sec": round(len(rx_toks) / rx_secs, 1) if rx_secs else 0.0,
+        "speedup": round(ref_secs / rx_secs, 2) if rx_secs else 0.0,
+    }
+
+
+def scan_chunks(chunks: Iterable[str], grammar: Grammar) -> Iterator[ScanToken]:
+    """
+    Tokens de un texto que llega por partes (p. ej. un archivo leído por bloques).
+    Un token sale en cuanto su escaneo no llegó al final de lo recibido: el trie
+    mira a lo sumo el literal más largo desde el inicio del token, y id/num un
+    carácter más allá de su fin (el "." de un decimal, dos). Sólo lo que falta
+    decidir (a lo sumo un token abierto y lo que le sigue) pasa al bloque
+    siguiente, así que los tokens son los mismos que daría Scanner sobre el
+    texto completo, con las mismas líneas y columnas.
+    """
+    scanner = Scanner("", grammar)
+    reach = len(scanner.literals[0]) if scanner.literals else 0
+    carry, skip = "", 0
+    for chunk in chunks:
+        buf = carry + chunk
+        n = len(buf)
+        scanner.reset(buf, skip)
+        while True:
+            scanner._skip_space()
+            start, line, col = scanner.i, scanner.line, scanner.col
+            if start + reach >= n:
+                break
+            tok = scanner.next_token()
+            if scanner.i + 1 >= n:
+                # puede seguir en el próximo bloque: se vuelve a escanear desde su inicio
+                scanner.i, scanner.line, scanner.col = start, line, col
+                break
+            yield tok
+        # el carácter previo al token abierto se conserva para la regla de borde de palabra
+        skip = 1 if start else 0
+        carry = buf[start - skip:]
+    scanner.reset(carry, skip)
+    yield from scanner.iter_tokens()
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# los módulos del proyecto se importan planos desde src/, como en los scripts
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
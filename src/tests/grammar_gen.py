@@ -0,0 +1,48 @@
+"""
+Gramáticas y cadenas al azar para las pruebas de equivalencia: gramáticas
+chicas (con ε, recursión y no terminales improductivos), cadenas de tokens al
+azar y oraciones derivadas de la gramática.
+"""
+import random
+from typing import List, Optional
+
+from grammar_spec import Grammar
+
+NONTERMINALS = ("S", "A", "B")
+TERMINALS = ("a", "b", "c")
+
+
+def random_grammar_text(rnd: random.Random) -> str:
+    nts = NONTERMINALS[:rnd.randint(1, len(NONTERMINALS))]
+    lines = []
+    for A in nts:
+        alts = []
+        for _ in range(rnd.randint(1, 4)):
+            rhs = [rnd.choice(nts + TERMINALS) for _ in range(rnd.randint(0, 3))]
+            alts.append(" ".join(rhs) or "ε")
+        lines.append(f"{A} -> " + " | ".join(alts))
+    return "\n".join(lines)
+
+
+def random_tokens(rnd: random.Random, grammar: Grammar, max_len: int = 8) -> List[str]:
+    terms = sorted(grammar.terminals)
+    return [rnd.choice(terms) for _ in range(rnd.randint(0, max_len))] if terms else []
+
+
+def random_sentence(rnd: random.Random, grammar: Grammar, budget: int = 30) -> Optional[List[str]]:
+    """Oración derivada desde el símbolo inicial, o None si no termina dentro de `budget` expansiones."""
+    out: List[str] = []
+    stack = [grammar.start_symbol]
+    while stack:
+        X = stack.pop()
+        if X not in grammar.nonterminals:
+            out.append(X)
+            continue
+        budget -= 1
+        if budget < 0:
+            return None
+        prods = list(grammar.productions_of(X))
+        if not prods:
+            return None
+        stack.extend(reversed(rnd.choice(prods).right))
+    return out
@@ -0,0 +1,111 @@
+"""
+Reparseo incremental: después de cada edición los tokens, la aceptación (o el
+error) y el árbol son los de un parse completo del texto nuevo.
+"""
+import random
+
+import pytest
+
+from grammar_spec import Grammar
+from incremental import IncrementalParser
+from parse_table import LR1ParseTable
+from parse_tree import parse_to_tree
+from parser_driver import ParserDriver
+from scanner import Scanner
+
+
+GRAMMARS = {
+    # lista recursiva a izquierda, bloques anidados y expresiones
+    "left": "S -> L\nL -> L st | st\nst -> id = E ; | { L } | if ( E ) st\nE -> E + T | T\nT -> num | id | ( E )",
+    # lista recursiva a derecha
+    "right": "S -> R\nR -> st R | st\nst -> id = num ; | { R }",
+}
+
+STATEMENTS = {
+    "left": ["x = 1 ;", "y = x + 2 ;", "{ z = ( 1 + y ) ; }", "if ( x ) w = 3 ;", "{ a = 1 ; b = a ; }"],
+    "right": ["x = 1 ;", "y = 22 ;", "{ z = 3 ; }", "{ a = 1 ; { b = 2 ; } }"],
+}
+
+WORDS = ["x", "1", "+", ";", "=", "(", ")", "{", "}", "if", "id9", " ", "\n", "?"]
+
+
+def full_parse(table, grammar, text):
+    tokens = Scanner(text, grammar).tokenize_all()
+    res = ParserDriver(table).parse(tokens, trace="none", max_steps=10000 + 64 * len(tokens))
+    tree = parse_to_tree(table, tokens, max_steps=10000 + 64 * len(tokens))[1].to_json() if res.accepted else None
+    return tokens[:-1], res, tree
+
+
+def random_edit(rnd, text, stmts):
+    kind = rnd.random()
+    if kind < 0.25:
+        i = rnd.randint(0, len(text))
+        return i, i, rnd.choice([" ", "\n", "  "])
+    if kind < 0.5:
+        # una sentencia entera en un borde de sentencia (o en cualquier lado)
+        cuts = [i + 1 for i, ch in enumerate(text) if ch in ";}\n"] + [0]
+        i = rnd.choice(cuts) if rnd.random() < 0.8 else rnd.randint(0, len(text))
+        return i, i, " " + rnd.choice(stmts) + " "
+    if kind < 0.7:
+        i = rnd.randint(0, len(text))
+        return i, min(len(text), i + rnd.randint(1, 8)), ""
+    i = rnd.randint(0, len(text))
+    j = min(len(text), i + rnd.randint(0, 3))
+    return i, j, "".join(rnd.choice(WORDS) for _ in range(rnd.randint(1, 3)))
+
+
+@pytest.mark.parametrize("name", sorted(GRAMMARS))
+@pytest.mark.parametrize("seed", range(30))
+def test_edits_match_full_parse(name, seed):
+    rnd = random.Random(seed)
+    g = Grammar.from_text(GRAMMARS[name])
+    table = LR1ParseTable.from_grammar(g)
+    stmts = STATEMENTS[name]
+    text = "\n".join(rnd.choice(stmts) for _ in range(rnd.randint(1, 40)))
+    ip = IncrementalParser(table, g)
+    ip.parse(text)
+    for _ in range(40):
+        start, end, new = random_edit(rnd, text, stmts)
+        text = text[:start] + new + text[end:]
+        res = ip.edit(start, end, new)
+        tokens, expected, tree = full_parse(table, g, text)
+        assert ip.text == text
+        assert ip.tokens() == tokens
+        assert (res.accepted, res.error_message, res.error_pos, res.error_state) == \
+            (expected.accepted, expected.error_message, expected.error_pos, expected.error_state)
+        assert ip.to_json() == tree
+
+
+def test_local_edits_keep_the_spine():
+    g = Grammar.from_text(GRAMMARS["left"])
+    ip = IncrementalParser(LR1ParseTable.from_grammar(g), g)
+    ip.parse("x = 1 ;\n" * 2000)
+    mid = 1000 * 8
+    # un espacio no cambia los símbolos: el árbol queda igual
+    assert ip.edit(mid + 1, mid + 1, " ").accepted
+    assert ip.last_stats["new_nodes"] == 0
+    # una sentencia nueva en el medio: sólo se rearma la zona, no la espina
+    assert ip.edit(mid, mid, "y = 2 ;\n").accepted
+    assert ip.last_stats["new_nodes"] < 20 and ip.last_stats["broken_down"] < 20
+    assert ip.edit(mid + 4, mid + 5, "( 1 + 2 )").accepted
+    assert ip.last_stats["new_nodes"] < 20
+
+
+def test_compaction_keeps_tree():
+    g = Grammar.from_text(GRAMMARS["left"])
+    table = LR1ParseTable.from_grammar(g)
+    ip = IncrementalParser(table, g)
+    text = "x = 1 ;\n" * 50
+    ip.parse(text)
+    compacted = False
+    for i in range(600):
+        at = (i * 56) % len(text) // 8 * 8
+        new = "{ y = ( 1 + x ) ; }\n"
+        text = text[:at] + new + text[at:]
+        ip.edit(at, at, new)
+        text = text[:at] + text[at + len(new):]
+        before = len(ip.prod)
+        assert ip.edit(at, at + len(new), "").accepted
+        compacted = compacted or len(ip.prod) < before
+    assert compacted
+    assert ip.to_json() == full_parse(table, g, text)[2]
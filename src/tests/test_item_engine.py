@@ -0,0 +1,68 @@
+"""
+ItemEngine (núcleo -> máscara de lookaheads) frente a la construcción de
+referencia con conjuntos de LR1Item (LR1Item.closure / goto): mismos estados
+en el mismo orden, mismas transiciones y la misma tabla, conflictos incluidos.
+"""
+import random
+from collections import deque
+from typing import Dict, List
+
+import pytest
+
+from grammar_gen import random_grammar_text
+from grammar_spec import Grammar
+from first_sets import FirstSets
+from lr1_items import LR1Automaton, LR1Item, LR1State, build_canonical_collection, goto, symbol_sort_key
+from parse_table import LR1ParseTable
+
+
+def reference_collection(grammar: Grammar, first: FirstSets) -> LR1Automaton:
+    start = LR1Item(grammar.augmented_start, (), (grammar.start_symbol,), "$")
+    states: List[LR1State] = [LR1State(0, LR1Item.closure([start], grammar, first))]
+    index = {states[0].items: 0}
+    transitions: Dict[int, Dict[str, int]] = {}
+    queue = deque([0])
+    while queue:
+        sid = queue.popleft()
+        items = states[sid].items
+        symbols = {it.next_symbol() for it in items if it.next_symbol() is not None}
+        for X in sorted(symbols, key=symbol_sort_key):
+            target = goto(items, X, grammar, first)
+            tid = index.get(target)
+            if tid is None:
+                tid = index[target] = len(states)
+                states.append(LR1State(tid, target))
+                queue.append(tid)
+            transitions.setdefault(sid, {})[X] = tid
+    return LR1Automaton(states, transitions)
+
+
+def conflict_cells(table: LR1ParseTable):
+    return sorted((c.state_id, c.symbol) for c in table.conflicts)
+
+
+def shifts_and_gotos(table: LR1ParseTable):
+    shifts = {(s, t, str(a)) for s, row in table.action.items() for t, a in row.items() if str(a).startswith("d")}
+    return shifts, table.goto
+
+
+GRAMMARS = [random_grammar_text(random.Random(seed)) for seed in range(300)]
+GRAMMARS.append("S -> ε | b A | ε\nA -> S S A | a b")
+GRAMMARS.append("S -> ε | a | A | b A A\nA -> A a a")
+
+
+@pytest.mark.parametrize("text", GRAMMARS)
+def test_engine_matches_item_sets(text):
+    g = Grammar.from_text(text)
+    first = FirstSets.compute_first_sets(g)
+    ref = reference_collection(g, first)
+    eng = build_canonical_collection(g, first)
+
+    assert [st.items for st in eng.states] == [st.items for st in ref.states]
+    assert eng.transitions == ref.transitions
+
+    ref_table = LR1ParseTable.build_lr1_parse_table(g, ref)
+    eng_table = LR1ParseTable.build_lr1_parse_table(g, eng)
+    assert len(eng_table.conflicts) == len(ref_table.conflicts)
+    assert conflict_cells(eng_table) == conflict_cells(ref_table)
+    assert shifts_and_gotos(eng_table) == shifts_and_gotos(ref_table)
@@ -0,0 +1,53 @@
+"""
+Comando parse del adaptador JSON: límites de pasos, variantes de scanner y
+parse fusionado.
+"""
+import pytest
+
+from lr1_adapter import cmd_parse
+
+
+LIST = "S -> L\nL -> L x | x"
+
+
+@pytest.mark.parametrize("trace", ["none", "summary", "full"])
+def test_long_input_within_default_steps(trace):
+    out = cmd_parse({"grammar": LIST, "input": "x " * 8000, "trace": trace})
+    assert out["success"], out.get("error")
+
+
+def test_explicit_max_steps():
+    out = cmd_parse({"grammar": LIST, "input": "x " * 8000, "trace": "none", "max_steps": 100})
+    assert not out["success"]
+
+
+def test_tree_stats():
+    out = cmd_parse({"grammar": LIST, "input": "x x x", "trace": "full", "tree": True,
+                     "tree_stats": True, "repeat": 1})
+    assert out["success"] and out["tree"]["symbol"] == "S"
+    assert out["tree_stats"]["nodes"] == 3 + 3 + 1
+
+
+KEYWORDS = "S -> S st | st\nst -> id = E ; | if ( E ) st\nE -> E + T | T\nT -> id | num"
+
+
+@pytest.mark.parametrize("trace", ["none", "summary"])
+def test_fused_single_pass(trace, monkeypatch):
+    from parser_driver import ParserDriver
+
+    def no_reparse(*args, **kwargs):
+        raise AssertionError("el parse fusionado no debe repetirse con el driver")
+
+    monkeypatch.setattr(ParserDriver, "parse", no_reparse)
+    out = cmd_parse({"grammar": KEYWORDS, "input": "x = if + 1 ; if ( x ) y = 2 ;",
+                     "trace": trace, "scanner": "fused"})
+    assert out["success"], out.get("error")
+    if trace == "summary":
+        assert out["summary"]["contextual"] == 1
+
+
+def test_fused_with_recovery_counts_contextual():
+    out = cmd_parse({"grammar": KEYWORDS, "input": "x = if + 1 ; y = ; z = 2 ;",
+                     "trace": "summary", "scanner": "fused", "recover": True})
+    assert not out["success"] and out["errors"]
+    assert out["summary"]["contextual"] == 1
@@ -0,0 +1,46 @@
+"""
+Entrada mapeada: las posiciones (línea, columna en caracteres) de
+MappedSource coinciden con las del texto decodificado, y los tokens de
+MappedScanner con los de Scanner.
+"""
+import random
+
+import pytest
+
+import mapped_input
+from grammar_spec import Grammar
+from mapped_input import MappedScanner, MappedSource
+from scanner import Scanner
+
+
+PIECES = ["x", "12", "=", ";", " ", "\n", "ñ", "€", "𝄞", "ab" * 20]
+
+
+def expected_position(text, k):
+    return text.count("\n", 0, k) + 1, k - (text.rfind("\n", 0, k) + 1) + 1
+
+
+@pytest.mark.parametrize("chunk", [3, 1 << 20])
+@pytest.mark.parametrize("seed", range(20))
+def test_positions_match_text(tmp_path, monkeypatch, chunk, seed):
+    monkeypatch.setattr(mapped_input, "_COUNT_CHUNK", chunk)
+    rnd = random.Random(seed)
+    text = "".join(rnd.choice(PIECES) for _ in range(rnd.randint(0, 200)))
+    path = tmp_path / "in.txt"
+    path.write_text(text, encoding="utf-8")
+    offsets = [len(text[:k].encode("utf-8")) for k in range(len(text) + 1)]
+    with MappedSource(str(path)) as src:
+        # en orden (avanzando desde la consulta anterior) y salteado (volviendo atrás)
+        order = list(range(len(text) + 1))
+        for k in order + rnd.sample(order, len(order)):
+            assert src.position(offsets[k]) == expected_position(text, k)
+
+
+def test_tokens_match_scanner(tmp_path):
+    g = Grammar.from_text("S -> S st | st\nst -> id = num ;")
+    text = "x = 1 ;\n  ñ  y = 22 ;\n" + "z" * 5000 + " = 3 ; € w = 4 ;"
+    path = tmp_path / "in.txt"
+    path.write_text(text, encoding="utf-8")
+    with MappedScanner(str(path), g) as scanner:
+        tokens = [t.to_scan_token() for t in scanner.tokenize_all()]
+    assert tokens == Scanner(text, g).tokenize_all()
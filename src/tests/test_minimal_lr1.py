@@ -0,0 +1,42 @@
+"""
+Modos de construcción: el LR(1) mínimo (Pager) y LALR(1) frente a la colección
+canónica. Sin conflictos, los tres aceptan exactamente las mismas cadenas; el
+mínimo no agrega conflictos ni tiene más estados que el canónico.
+"""
+import random
+
+import pytest
+
+from grammar_gen import random_grammar_text, random_sentence, random_tokens
+from grammar_spec import Grammar
+from first_sets import FirstSets
+from parse_table import LR1ParseTable
+from parser_driver import ParserDriver
+from scanner import ScanToken
+
+
+def accepts(driver: ParserDriver, symbols) -> bool:
+    tokens = [ScanToken(s, s, 1, i + 1) for i, s in enumerate(symbols)] + [ScanToken("$", "$", 1, len(symbols) + 1)]
+    return driver.recognize(tokens, max_steps=10000).accepted
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_modes_agree(seed):
+    rnd = random.Random(seed)
+    g = Grammar.from_text(random_grammar_text(rnd))
+    first = FirstSets.compute_first_sets(g)
+    tables = {mode: LR1ParseTable.from_grammar(g, first, mode=mode) for mode in ("lr1", "lalr", "minimal")}
+    sizes = {mode: len(t.automaton.states) for mode, t in tables.items()}
+
+    assert sizes["minimal"] <= sizes["lr1"]
+    if tables["lr1"].conflicts:
+        return
+    assert not tables["minimal"].conflicts
+    modes = ["lr1", "minimal"] + ([] if tables["lalr"].conflicts else ["lalr"])
+    drivers = {mode: ParserDriver(tables[mode]) for mode in modes}
+
+    inputs = [random_tokens(rnd, g) for _ in range(30)]
+    inputs += [s for s in (random_sentence(rnd, g) for _ in range(30)) if s is not None]
+    for symbols in inputs:
+        results = {mode: accepts(d, symbols) for mode, d in drivers.items()}
+        assert len(set(results.values())) == 1, (symbols, results)
@@ -0,0 +1,46 @@
+"""
+Árbol de derivación: el que se arma junto con la traza completa es el mismo
+que el de parse_to_tree sobre la tabla compilada.
+"""
+import random
+
+import pytest
+
+from grammar_gen import random_grammar_text, random_sentence
+from grammar_spec import Grammar
+from first_sets import FirstSets
+from parse_table import LR1ParseTable
+from parse_tree import measure_tree_overhead, parse_to_tree
+from parser_driver import ParserDriver
+from scanner import ScanToken
+
+
+def as_tokens(symbols):
+    return [ScanToken(s, s, 1, i + 1) for i, s in enumerate(symbols)] + [ScanToken("$", "$", 1, len(symbols) + 1)]
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_traced_tree_matches_compiled(seed):
+    rnd = random.Random(seed)
+    g = Grammar.from_text(random_grammar_text(rnd))
+    table = LR1ParseTable.from_grammar(g, FirstSets.compute_first_sets(g))
+    driver = ParserDriver(table)
+    for _ in range(10):
+        sentence = random_sentence(rnd, g)
+        if sentence is None:
+            continue
+        tokens = as_tokens(sentence)
+        res = driver.parse(tokens, trace="full", build_tree=True)
+        run, tree = parse_to_tree(table, tokens)
+        assert res.accepted == run.accepted
+        if res.accepted:
+            assert res.tree.to_json() == tree.to_json()
+            assert len(res.tree) == len(tree)
+
+
+def test_measure_tree_overhead():
+    g = Grammar.from_text("S -> L\nL -> L x | x")
+    table = LR1ParseTable.from_grammar(g, FirstSets.compute_first_sets(g))
+    stats = measure_tree_overhead(table, as_tokens(["x"] * 50), repeat=1)
+    assert stats["tokens"] == 51
+    assert stats["nodes"] == 50 + 50 + 1
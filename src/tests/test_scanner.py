@@ -0,0 +1,85 @@
+"""
+Escaneo por bloques: scan_chunks da los mismos tokens (con líneas y columnas)
+que Scanner sobre el texto completo, corte donde se corte. Escaneo guiado por
+el parser: ContextScanner da los mismos tokens que Scanner salvo palabras
+clave leídas como id.
+"""
+import random
+
+import pytest
+
+from grammar_spec import Grammar
+from parse_table import LR1ParseTable
+from parser_driver import ParserDriver
+from scanner import Scanner, scan_chunks
+
+
+GRAMMAR = Grammar.from_text(
+    "S -> S st | st\n"
+    "st -> if id == num ; | id = num ; | id <= id ; | a-b ; | id . id ; | while ( id ) st"
+)
+
+PIECES = ["if", "iff", "while", "x", "_y1", "a", "a-b", "b", "9", "12", "3.5", "7.", ".",
+          "=", "==", "<", "<=", ";", "(", ")", "-", " ", " ", "\n", "\t", "ñ", "#"]
+
+
+def chunked(text, rnd):
+    i = 0
+    while i < len(text):
+        k = rnd.randint(1, 6)
+        yield text[i:i + k]
+        i += k
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_chunks_match_full_scan(seed):
+    rnd = random.Random(seed)
+    text = "".join(rnd.choice(PIECES) for _ in range(rnd.randint(0, 60)))
+    expected = Scanner(text, GRAMMAR).tokenize_all()
+    assert list(scan_chunks(chunked(text, rnd), GRAMMAR)) == expected
+
+
+def test_whitespace_free_chunks():
+    text = "x=1;" * 5000
+    chunks = [text[i:i + 1000] for i in range(0, len(text), 1000)]
+    assert list(scan_chunks(chunks, GRAMMAR)) == Scanner(text, GRAMMAR).tokenize_all()
+
+
+OPS = Grammar.from_text(
+    "S -> S st | st\n"
+    "st -> id = E ; | id *= E ; | if ( E ) st | while ( E ) st\n"
+    "E -> E * T | E - T | T\n"
+    "T -> id | num | ( E ) | a-b"
+)
+
+OP_PIECES = ["if", "while", "iff", "x", "a", "b", "a-b", "9", "*", "*=", "=", "-", ";",
+             "(", ")", " ", " ", "\n", "ñ", "#"]
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_fused_tokens_differ_only_in_keywords(seed):
+    rnd = random.Random(seed)
+    table = LR1ParseTable.from_grammar(OPS)
+    text = "".join(rnd.choice(OP_PIECES) for _ in range(rnd.randint(0, 40)))
+    expected = Scanner(text, OPS).tokenize_all()
+    tokens = []
+    res = ParserDriver(table).parse_fused(text, OPS, with_summary=True, tokens=tokens)
+    assert [(t.lexeme, t.line, t.col) for t in tokens] == [(t.lexeme, t.line, t.col) for t in expected]
+    relabeled = 0
+    for got, want in zip(tokens, expected):
+        if got.symbol != want.symbol:
+            assert (got.symbol, want.symbol) == ("id", want.lexeme)
+            relabeled += 1
+    assert res.summary["contextual"] <= relabeled
+    if ParserDriver(table).parse(expected, trace="none").accepted:
+        assert res.accepted
+
+
+def test_fused_does_not_split_operators():
+    table = LR1ParseTable.from_grammar(OPS)
+    # tras 'y = x' valen '*', '-' y ';', no '*=': no se lee como '*' '='
+    res = ParserDriver(table).parse_fused("y = x *= 2 ;", OPS)
+    assert not res.accepted and "'*='" in res.error_message
+    # una palabra clave donde el estado espera id sí se lee como id
+    res = ParserDriver(table).parse_fused("x = if * 2 ;", OPS, with_summary=True)
+    assert res.accepted and res.summary["contextual"] == 1